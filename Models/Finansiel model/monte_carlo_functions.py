@@ -6,6 +6,9 @@ import seaborn as sns
 import numpy_financial as npf
 from tqdm.auto import tqdm
 from multiprocessing import Pool
+import os
+import shutil
+import tempfile
 
 N_ITERATIONS = 1000 # Number of Monte Carlo iterations
 CURRENT_YEAR = 2025
@@ -14,74 +17,75 @@ TREATMENT_AGE_LIMIT = 20 # Patients younger than this are eligible
 
 # R&D Phase Parameters (durations in years, costs in USD millions)
 # Using triangular distribution: (min, mode, max)
+# Samplers take an optional numpy Generator and an optional size (array of draws)
 # R&D Phase Functions
-def preclinical_duration():
-    return triang.rvs(c=0.4, loc=1, scale=2)  # 1 to 3 years, mode 1.8
+def preclinical_duration(rng=None, size=None):
+    return triang.rvs(c=0.4, loc=1, scale=2, size=size, random_state=rng)  # 1 to 3 years, mode 1.8
 
-def preclinical_cost():
-    return triang.rvs(c=0.33, loc=1, scale=2)  # 1 to 3M, mode 1.66M
+def preclinical_cost(rng=None, size=None):
+    return triang.rvs(c=0.33, loc=1, scale=2, size=size, random_state=rng)  # 1 to 3M, mode 1.66M
 
-def phase1_2_duration():
-    return triang.rvs(c=0.4, loc=2, scale=3)  # 2 to 5 years, mode 3.2
+def phase1_2_duration(rng=None, size=None):
+    return triang.rvs(c=0.4, loc=2, scale=3, size=size, random_state=rng)  # 2 to 5 years, mode 3.2
 
-def phase1_2_cost():
-    return triang.rvs(c=0.33, loc=3, scale=5)  # 20 to 80M, mode 40M
+def phase1_2_cost(rng=None, size=None):
+    return triang.rvs(c=0.33, loc=3, scale=5, size=size, random_state=rng)  # 20 to 80M, mode 40M
 
-def phase3_duration():
-    return triang.rvs(c=0.5, loc=2, scale=3)  # 2 to 5 years, mode 3.5
+def phase3_duration(rng=None, size=None):
+    return triang.rvs(c=0.5, loc=2, scale=3, size=size, random_state=rng)  # 2 to 5 years, mode 3.5
 
-def phase3_cost():
-    return triang.rvs(c=0.4, loc=10, scale=10)  # 50 to 300M, mode 150M
+def phase3_cost(rng=None, size=None):
+    return triang.rvs(c=0.4, loc=10, scale=10, size=size, random_state=rng)  # 50 to 300M, mode 150M
 
-def regulatory_duration():
-    return triang.rvs(c=0.33, loc=0.75, scale=0.75)  # 0.75 to 1.5 years, mode 1
+def regulatory_duration(rng=None, size=None):
+    return triang.rvs(c=0.33, loc=0.75, scale=0.75, size=size, random_state=rng)  # 0.75 to 1.5 years, mode 1
 
-def regulatory_cost():
-    return triang.rvs(c=0.5, loc=2, scale=3)  # 2 to 5M, mode 3.5M
+def regulatory_cost(rng=None, size=None):
+    return triang.rvs(c=0.5, loc=2, scale=3, size=size, random_state=rng)  # 2 to 5M, mode 3.5M
 
 # Commercial Functions
-def price_usd_millions():
-    return triang.rvs(c=0.5, loc=2.0, scale=1.5)  # 2.0M to 3.5M, mode 2.75M
+def price_usd_millions(rng=None, size=None):
+    return triang.rvs(c=0.5, loc=2.0, scale=1.5, size=size, random_state=rng)  # 2.0M to 3.5M, mode 2.75M
 
-def gt_net_factor():
-    return np.random.uniform(0.80, 0.90)  # 10-20% discount band
+def gt_net_factor(rng=None, size=None):
+    return (np.random if rng is None else rng).uniform(0.80, 0.90, size)  # 10-20% discount band
 
-def cogs_percent_revenue():
-    return uniform.rvs(loc=0.15, scale=0.10)  # 15% to 25%
+def cogs_percent_revenue(rng=None, size=None):
+    return uniform.rvs(loc=0.15, scale=0.10, size=size, random_state=rng)  # 15% to 25%
 
-def sga_percent_revenue():
-    return uniform.rvs(loc=0.20, scale=0.10)  # 20% to 30%
+def sga_percent_revenue(rng=None, size=None):
+    return uniform.rvs(loc=0.20, scale=0.10, size=size, random_state=rng)  # 20% to 30%
 
 # Market Penetration Functions
-def wave1_max_rate():
-    return uniform.rvs(loc=0.4, scale=0.15)  # 40% to 55%
+def wave1_max_rate(rng=None, size=None):
+    return uniform.rvs(loc=0.4, scale=0.15, size=size, random_state=rng)  # 40% to 55%
 
-def wave1_steepness():
-    return uniform.rvs(loc=0.3, scale=0.3)  # 0.3 to 0.5
+def wave1_steepness(rng=None, size=None):
+    return uniform.rvs(loc=0.3, scale=0.3, size=size, random_state=rng)  # 0.3 to 0.5
 
-def wave1_midpoint_years():
-    return triang.rvs(c=0.6, loc=2, scale=3)  # 1 to 4 years, mode 5
+def wave1_midpoint_years(rng=None, size=None):
+    return triang.rvs(c=0.6, loc=2, scale=3, size=size, random_state=rng)  # 1 to 4 years, mode 5
 
-def wave2_max_rate():
-    return uniform.rvs(loc=0.25, scale=0.2)  # 25% to 45%
+def wave2_max_rate(rng=None, size=None):
+    return uniform.rvs(loc=0.25, scale=0.2, size=size, random_state=rng)  # 25% to 45%
 
-def wave2_steepness():
-    return uniform.rvs(loc=0.3, scale=0.3)  # 0.3 to 0.5
+def wave2_steepness(rng=None, size=None):
+    return uniform.rvs(loc=0.3, scale=0.3, size=size, random_state=rng)  # 0.3 to 0.5
 
-def wave2_midpoint_years():
-    return triang.rvs(c=0.6, loc=2, scale=3)  # 1 to 4 years, mode 5
+def wave2_midpoint_years(rng=None, size=None):
+    return triang.rvs(c=0.6, loc=2, scale=3, size=size, random_state=rng)  # 1 to 4 years, mode 5
 
-def wave3_max_rate():
-    return uniform.rvs(loc=0.15, scale=0.15)  # 15% to 30%
+def wave3_max_rate(rng=None, size=None):
+    return uniform.rvs(loc=0.15, scale=0.15, size=size, random_state=rng)  # 15% to 30%
 
-def wave3_steepness():
-    return uniform.rvs(loc=0.3, scale=0.3)  # 0.3 to 0.5
+def wave3_steepness(rng=None, size=None):
+    return uniform.rvs(loc=0.3, scale=0.3, size=size, random_state=rng)  # 0.3 to 0.5
 
-def wave3_midpoint_years():
-    return triang.rvs(c=0.6, loc=2, scale=3)  # 1 to 4 years, mode 5
+def wave3_midpoint_years(rng=None, size=None):
+    return triang.rvs(c=0.6, loc=2, scale=3, size=size, random_state=rng)  # 1 to 4 years, mode 5
 
-def prv_sale_value_usd_millions():
-    return triang.rvs(c=0.4, loc=80, scale=70)  # 80M to 150M, mode 108M
+def prv_sale_value_usd_millions(rng=None, size=None):
+    return triang.rvs(c=0.4, loc=80, scale=70, size=size, random_state=rng)  # 80M to 150M, mode 108M
 
 # Updated PARAMS dictionary with named functions
 PARAMS = {
@@ -189,81 +193,178 @@ def get_eligible_patients(timeline_df, year, countries, age_limit):
     ]
     return len(eligible['patient_uuid'].unique())
 
+def build_eligibility_index(timeline_df, waves_config):
+    """
+    Builds a columnar index of the patient timeline for eligibility lookups.
 
+    Rows of living patients in each wave's countries are stored as integer
+    patient ids and ages, sorted by (wave, year, age), so the patients of a
+    (year, wave) pair are one contiguous slice and those under an age limit
+    are a prefix of it.
 
-def simulate_single_iteration(args):
-    i, params, waves_config, base_launch_year_w1, timeline_df, current_year, commercial_life_years, treatment_age_limit = args
-    
-    # Create a copy of the timeline_df to avoid sharing state
-    timeline_df = timeline_df.copy()
-    # Rest of your simulation logic...
-    iter_result = {}
-    #for i in tqdm(range(n_iterations)):
-    # --- R&D Phase Simulation ---
-    iter_rd_costs = {}
-    iter_rd_durations = {}
-    total_rd_cost = 0
-    total_rd_duration = 0
-    project_succeeded_through_phase = {} # Tracks success up to end of phase
-    
-    project_overall_succeeded = True # Will be set to False if any phase fails
-    phases = ['preclinical', 'phase1_2', 'phase3', 'regulatory']
-    
-    odd_obtained_this_run = bernoulli.rvs(params['odd_obtaining_prob'])
-    prv_obtained_this_run = False 
-    prv_value_this_run = 0
+    Returns a dict with:
+    - 'patient_ids': int32 array of patient ids (0 .. n_patients-1)
+    - 'ages': int16 array of ages, aligned with patient_ids
+    - 'offsets': {(year, wave_name): (start, stop)} slices into the arrays
+    - 'n_patients': number of distinct patients (size of a treated bitmap)
 
-    phase_costs_for_tax_credit = {'phase1_2': 0, 'phase3': 0}
-    annual_rd_costs_stream_M_iter = []
+    Raises ValueError if timeline_df lacks any of the columns year, iso3,
+    age, alive or patient_uuid.
+    """
+    required = {'year', 'iso3', 'age', 'alive', 'patient_uuid'}
+    missing = required - set(timeline_df.columns)
+    if missing:
+        raise ValueError(f"timeline_df is missing required columns: {sorted(missing)}")
+
+    patient_codes, uniques = pd.factorize(timeline_df['patient_uuid'])
+    alive = (timeline_df['alive'] == True).to_numpy()
+    years = timeline_df['year'].to_numpy()
+    ages = timeline_df['age'].to_numpy()
+
+    patient_ids, age_blocks, offsets = [], [], {}
+    start = 0
+    for wave_name, config in waves_config.items():
+        rows = np.flatnonzero(alive & timeline_df['iso3'].isin(config['countries']).to_numpy())
+        rows = rows[np.lexsort((ages[rows], years[rows]))]
+        wave_years = years[rows]
+        for year, first, count in zip(*np.unique(wave_years, return_index=True, return_counts=True)):
+            offsets[(int(year), wave_name)] = (int(start + first), int(start + first + count))
+        patient_ids.append(patient_codes[rows])
+        age_blocks.append(ages[rows])
+        start += len(rows)
+
+    return {
+        'patient_ids': np.concatenate(patient_ids).astype(np.int32),
+        'ages': np.concatenate(age_blocks).astype(np.int16),
+        'offsets': offsets,
+        'n_patients': len(uniques)
+    }
 
-    for phase_name in phases:
-        phase_duration = params[phase_name]['duration']()
-        phase_cost = params[phase_name]['cost']() 
-        
-        if phase_name == 'regulatory' and odd_obtained_this_run:
-            phase_cost = max(0, phase_cost - params['pdufa_fee_waiver_usd_millions'])
-
-        iter_rd_durations[phase_name] = phase_duration
-        iter_rd_costs[phase_name] = phase_cost # Store individual phase cost
-
-        total_rd_duration += phase_duration
-        total_rd_cost += phase_cost 
-
-        if phase_duration > 0:
-            cost_per_year_phase = phase_cost / phase_duration
-            for _ in range(int(np.floor(phase_duration))):
-                annual_rd_costs_stream_M_iter.append(-cost_per_year_phase)
-            if phase_duration % 1 != 0: 
-                annual_rd_costs_stream_M_iter.append(-cost_per_year_phase * (phase_duration % 1))
-        elif phase_cost > 0 : 
-                annual_rd_costs_stream_M_iter.append(-phase_cost)
-
-        if phase_name in ['phase1_2', 'phase3']:
-            phase_costs_for_tax_credit[phase_name] = phase_cost
-        
-        phase_pos_val = params[phase_name]['pos']
-        success_outcome = bernoulli.rvs(phase_pos_val)
-        project_succeeded_through_phase[phase_name] = success_outcome
-        
-        #if i < 5: # Debug print for first 5 iterations
-        #   print(f"Iter {i}, Phase {phase_name}, PoS: {phase_pos_val}, Actual Cost: {phase_cost:.2f}M, Actual Duration: {phase_duration:.2f}yrs, Outcome: {'Success' if success_outcome else 'Failure'}")
-
-        if not success_outcome: 
-            project_overall_succeeded = False
-            #if i < 5: 
-            #     print(f"Iter {i}, Project FAILED in phase {phase_name}")
-            break 
-    
-    if project_overall_succeeded: 
-        if bernoulli.rvs(params['prv_obtaining_prob']):
-            prv_obtained_this_run = True
-            prv_value_this_run = params['prv_sale_value_usd_millions']()
+def get_untreated_eligible_ids(index, treated, year, wave_name, age_limit):
+    """
+    Returns ids of untreated patients under age_limit in a wave's countries in a given year.
+    One entry per timeline row, like counting rows of the filtered timeline.
+    """
+    start, stop = index['offsets'].get((year, wave_name), (0, 0))
+    stop = start + np.searchsorted(index['ages'][start:stop], age_limit, side='left')
+    ids = index['patient_ids'][start:stop]
+    return ids[~treated[ids]]
+
+
+
+RD_PHASES = ['preclinical', 'phase1_2', 'phase3', 'regulatory']
+RD_BLOCK_SIZE = 1024 # Iterations per R&D random stream (see simulate_rd_range)
+RD_SPAWN_KEY = 0x5244 # Leading spawn-key word of the R&D streams, apart from iteration_seed
+
+def simulate_rd_phases(n_iterations, params, current_year, rng=None):
+    """
+    Simulates the R&D phases of n_iterations projects at once.
+
+    Durations, costs and phase outcomes are drawn as (n_iterations x 4) arrays
+    (columns in RD_PHASES order). A phase is run only if all earlier phases
+    succeeded (cumulative product of the outcomes); phases that are not run
+    get zero duration and cost. Each run phase spends its cost evenly over its
+    duration, one cash-flow entry per started year.
+
+    Returns a dict of arrays:
+    - 'durations', 'costs': (n, 4) per-phase values (0 for phases not run)
+    - 'succeeded': (n,) bool, all four phases succeeded
+    - 'odd_obtained': (n,) int; 'prv_obtained': (n,) bool; 'prv_value': (n,) float
+    - 'total_rd_cost', 'total_rd_duration': (n,) sums over the run phases
+    - 'launch_year_w1': (n,) float, NaN for failed projects
+    - 'rd_cash_flows': (n, width) annual R&D cash flows (negative), NaN padded
+    - 'rd_lengths': (n,) number of cash-flow entries per project
+    """
+    rng = np.random.default_rng(rng)
+    n = n_iterations
+
+    odd_obtained = bernoulli.rvs(params['odd_obtaining_prob'], size=n, random_state=rng)
+    durations = np.column_stack([params[phase]['duration'](rng, n) for phase in RD_PHASES])
+    costs = np.column_stack([params[phase]['cost'](rng, n) for phase in RD_PHASES])
+    costs[:, 3] = np.where(odd_obtained == 1,
+                           np.maximum(0, costs[:, 3] - params['pdufa_fee_waiver_usd_millions']), costs[:, 3])
+    outcomes = np.column_stack([bernoulli.rvs(params[phase]['pos'], size=n, random_state=rng)
+                                for phase in RD_PHASES]).astype(bool)
+
+    # Phase k is run if phases 0..k-1 all succeeded
+    reached = np.cumprod(np.column_stack([np.ones(n, dtype=bool), outcomes[:, :-1]]), axis=1).astype(bool)
+    succeeded = reached[:, -1] & outcomes[:, -1]
+    durations = np.where(reached, durations, 0.0)
+    costs = np.where(reached, costs, 0.0)
+    total_rd_duration = np.cumsum(durations, axis=1)[:, -1]
+
+    prv_obtained = succeeded & bernoulli.rvs(params['prv_obtaining_prob'], size=n, random_state=rng).astype(bool)
+    prv_value = np.where(prv_obtained, params['prv_sale_value_usd_millions'](rng, n), 0.0)
+
+    # R&D cash flows: floor(duration) full years plus a fractional year, placed
+    # after the entries of the earlier phases
+    whole_years = np.floor(durations).astype(int)
+    fraction = durations % 1
+    cost_per_year = np.divide(costs, durations, out=np.zeros_like(costs), where=durations > 0)
+    counts = np.where(durations > 0, whole_years + (fraction != 0), costs > 0) * reached
+    starts = np.cumsum(counts, axis=1) - counts
+    rd_lengths = counts.sum(axis=1)
+    rd_cash_flows = np.full((n, rd_lengths.max() if n else 0), np.nan)
+    for k in range(len(RD_PHASES)):
+        years = np.arange(counts[:, k].max() if n else 0)
+        values = np.where(years < whole_years[:, k, None], -cost_per_year[:, k, None],
+                          -cost_per_year[:, k, None] * fraction[:, k, None])
+        values = np.where(durations[:, k, None] > 0, values, -costs[:, k, None])
+        mask = years < counts[:, k, None]
+        rows = np.broadcast_to(np.arange(n)[:, None], mask.shape)
+        rd_cash_flows[rows[mask], (starts[:, k, None] + years)[mask]] = values[mask]
+
+    return {
+        'durations': durations, 'costs': costs, 'succeeded': succeeded,
+        'odd_obtained': odd_obtained, 'prv_obtained': prv_obtained, 'prv_value': prv_value,
+        'total_rd_cost': np.cumsum(costs, axis=1)[:, -1], 'total_rd_duration': total_rd_duration,
+        'launch_year_w1': np.where(succeeded, np.floor(current_year + total_rd_duration), np.nan),
+        'rd_cash_flows': rd_cash_flows, 'rd_lengths': rd_lengths
+    }
 
+def rd_block_seed(entropy, block):
+    """
+    Seed of the R&D random stream of iterations block*RD_BLOCK_SIZE .. (block+1)*RD_BLOCK_SIZE-1
+    in run_monte_carlo_simulation (distinct from every iteration_seed stream).
+    """
+    return np.random.SeedSequence(entropy, spawn_key=(RD_SPAWN_KEY, block))
+
+def simulate_rd_range(start, stop, params, current_year, entropy):
+    """
+    simulate_rd_phases output for iterations start .. stop-1 (row k is iteration start+k).
+
+    Iterations are drawn in fixed blocks of RD_BLOCK_SIZE, each vectorized on
+    its own stream (rd_block_seed), so the R&D of iteration i depends only on
+    (entropy, i): not on the number of iterations or on which other rows are
+    simulated alongside it.
+    """
+    blocks = [simulate_rd_phases(RD_BLOCK_SIZE, params, current_year, rd_block_seed(entropy, block))
+              for block in range(start // RD_BLOCK_SIZE, -(-stop // RD_BLOCK_SIZE))]
+    if not blocks:
+        return simulate_rd_phases(0, params, current_year)
+    offset = start - start // RD_BLOCK_SIZE * RD_BLOCK_SIZE
+    rows = slice(offset, offset + stop - start)
+    width = max(block['rd_cash_flows'].shape[1] for block in blocks)
+    rd = {}
+    for key in blocks[0]:
+        arrays = [block[key] for block in blocks]
+        if key == 'rd_cash_flows':
+            arrays = [np.pad(a, ((0, 0), (0, width - a.shape[1])), constant_values=np.nan) for a in arrays]
+        rd[key] = np.concatenate(arrays)[rows]
+    return rd
+
+def rd_iteration_result(i, rd, row, params):
+    """
+    Result dict of iteration i from row `row` of simulate_rd_phases output.
+    Commercial fields are left empty; for failed projects the result is final.
+    """
+    succeeded = bool(rd['succeeded'][row])
+    annual_rd_costs_stream_M_iter = rd['rd_cash_flows'][row, :rd['rd_lengths'][row]].tolist()
     iter_result = {
-        'iteration': i, 'project_succeeded': project_overall_succeeded,
-        'total_rd_cost_millions': total_rd_cost, 'total_rd_duration_years': total_rd_duration,
-        'prv_obtained': prv_obtained_this_run, 'prv_value_millions': prv_value_this_run,
-        'odd_obtained': odd_obtained_this_run,
+        'iteration': i, 'project_succeeded': succeeded,
+        'total_rd_cost_millions': rd['total_rd_cost'][row], 'total_rd_duration_years': rd['total_rd_duration'][row],
+        'prv_obtained': bool(rd['prv_obtained'][row]), 'prv_value_millions': rd['prv_value'][row],
+        'odd_obtained': rd['odd_obtained'][row],
         'annual_rd_costs_stream_M': annual_rd_costs_stream_M_iter,
         'annual_commercial_revenues_M': [], 'annual_patients_treated': [],
         'annual_commercial_ebit_M': [], 'annual_commercial_net_cash_flow_M': [],
@@ -274,164 +375,547 @@ def simulate_single_iteration(args):
         'rnpv_at_launch': np.nan
     }
     # Add individual phase costs and durations to iter_result
-    for phase_n in phases:
-        iter_result[f'cost_{phase_n}_M'] = iter_rd_costs.get(phase_n, 0)
-        iter_result[f'duration_{phase_n}_yrs'] = iter_rd_durations.get(phase_n, 0)
-        
-    if project_overall_succeeded:
-        actual_launch_year_w1 = int(current_year + total_rd_duration)
-        iter_result['launch_year_w1'] = actual_launch_year_w1
-
-        odd_rd_tax_credit_value = 0
-        if odd_obtained_this_run:
-            clinical_costs_for_credit = phase_costs_for_tax_credit['phase1_2'] + phase_costs_for_tax_credit['phase3']
-            odd_rd_tax_credit_value = clinical_costs_for_credit * params['odd_rd_tax_credit_rate']
-        iter_result['odd_tax_credit_millions'] = odd_rd_tax_credit_value if odd_obtained_this_run else 0
-        # --- PATIENT-LEVEL TREATMENT LOGIC ---
-        # Make a copy of the timeline for this simulation
-        timeline_sim = timeline_df.copy()
-        timeline_sim['treated'] = False
-        annual_commercial_revenues_M_iter = []
-        annual_patients_treated_iter = []
-        annual_commercial_ebit_M_iter = []
-        annual_commercial_net_cash_flow_M_iter = []
-        wave_annual_sales = {wave_name: [] for wave_name in waves_config}
-        wave_annual_patients = {wave_name: [] for wave_name in waves_config}
-        for year_offset in range(commercial_life_years):
-            operational_year = actual_launch_year_w1 + year_offset
-            annual_revenue_iter_yr = 0
-            current_patients_treated_iter_yr = 0
-            for wave_name, config in waves_config.items():
-                actual_wave_launch_year = actual_launch_year_w1 + config['launch_delay_from_base']
-                if operational_year >= actual_wave_launch_year:
-                    years_since_wave_launch = operational_year - actual_wave_launch_year
-                    # Only select untreated, eligible patients
-                    eligible_patients = timeline_sim[(timeline_sim['year'] == operational_year) &
-                                                    (timeline_sim['iso3'].isin(config['countries'])) &
-                                                    (timeline_sim['age'] < treatment_age_limit) &
-                                                    (timeline_sim['alive'] == True) &
-                                                    (timeline_sim['treated'] == False)]
-                    num_eligible_patients = len(eligible_patients)
-                    penetration_params_wave = params[f'penetration_{wave_name}']
-                    market_penetration = sigmoid_penetration(
-                        t=years_since_wave_launch,
-                        max_rate=penetration_params_wave['max_rate'](),
-                        steepness=penetration_params_wave['steepness'](),
-                        midpoint_years=penetration_params_wave['midpoint_years']()
-                    )
-                    #price = params['price_usd_millions']()
-                    list_price = params['price_usd_millions']()
-                    net_price  = list_price * params['gt_net_factor']() 
-                    n_to_treat = int(round(num_eligible_patients * market_penetration))
-                    n_to_treat = min(n_to_treat, num_eligible_patients)
-                    # Randomly select patients to treat
-                    if n_to_treat > 0 and num_eligible_patients > 0:
-                        patients_to_treat = eligible_patients.sample(n=n_to_treat, replace=False)
-                        # Mark ALL records for these patients as treated (across all years)
-                        patient_ids_to_treat = patients_to_treat['patient_uuid'].values  # Assuming there's a patient_id column
-                        timeline_sim.loc[timeline_sim['patient_uuid'].isin(patient_ids_to_treat), 'treated'] = True
-        
-                    patients_this_wave_year = n_to_treat
-                    annual_revenue_iter_yr += patients_this_wave_year * net_price
-                    current_patients_treated_iter_yr += patients_this_wave_year
-                    wave_annual_sales[wave_name].append(patients_this_wave_year * net_price)
-                    wave_annual_patients[wave_name].append(patients_this_wave_year)
-                    #if num_eligible_patients > 0 and i < 5:
-                    #   print(f"Iter {i}, OpYear {operational_year}, Wave {wave_name}, Countries {config['countries']}")
-                    #   print(f"  Eligible Patients: {num_eligible_patients}, Market Pen: {market_penetration:.4f}, List Price: ${list_price:.2f}M, Net Price: ${net_price:.2f}M, Revenue this wave-yr: ${patients_this_wave_year * net_price:.2f}M")
-
-            annual_commercial_revenues_M_iter.append(annual_revenue_iter_yr)
-            annual_patients_treated_iter.append(current_patients_treated_iter_yr)
-            cogs = annual_revenue_iter_yr * params['cogs_percent_revenue']()
-            sga = annual_revenue_iter_yr * params['sga_percent_revenue']()
-            ebit_iter = annual_revenue_iter_yr - cogs - sga
-            if year_offset == 0 and prv_obtained_this_run: ebit_iter += prv_value_this_run
-            if year_offset == 0 and odd_obtained_this_run: ebit_iter += odd_rd_tax_credit_value
-            annual_commercial_ebit_M_iter.append(ebit_iter)
-            tax = ebit_iter * params['tax_rate'] if ebit_iter > 0 else 0
-            net_cash_flow_iter = ebit_iter - tax
-            annual_commercial_net_cash_flow_M_iter.append(net_cash_flow_iter)
-        
-        #if i < 5:
-        #    print(f"Iter {i}, First Full Commercial Year Revenue (annual_commercial_revenues_M_iter[0]): ${annual_commercial_revenues_M_iter[0] if annual_commercial_revenues_M_iter else 0:.2f}M")
-
-        iter_result['annual_commercial_revenues_M'] = annual_commercial_revenues_M_iter
-        iter_result['annual_patients_treated'] = annual_patients_treated_iter
-        iter_result['annual_commercial_ebit_M'] = annual_commercial_ebit_M_iter
-        iter_result['annual_commercial_net_cash_flow_M'] = annual_commercial_net_cash_flow_M_iter
-        for wave_name in waves_config:
-            iter_result[f"{wave_name}_annual_sales_M"] = wave_annual_sales[wave_name]
-            iter_result[f"{wave_name}_annual_patients"] = wave_annual_patients[wave_name]
-            iter_result[f"{wave_name}_launch_year"] = actual_launch_year_w1 + waves_config[wave_name]['launch_delay_from_base']
-        
-        num_rd_years_full = len(annual_rd_costs_stream_M_iter)
-        start_commercial_relative_year = actual_launch_year_w1 - current_year
-        padding_zeros_count = max(0, start_commercial_relative_year - num_rd_years_full)
-        
-        current_full_cash_flow_stream = annual_rd_costs_stream_M_iter + [0] * padding_zeros_count + annual_commercial_net_cash_flow_M_iter
-        iter_result['full_project_cash_flow_stream_M'] = current_full_cash_flow_stream
-        iter_result['npv_usd_millions'] = npf.npv(params['discount_rate'], current_full_cash_flow_stream)
+    for k, phase_n in enumerate(RD_PHASES):
+        iter_result[f'cost_{phase_n}_M'] = rd['costs'][row, k]
+        iter_result[f'duration_{phase_n}_yrs'] = rd['durations'][row, k]
 
-        # Calculate rNPV at phase gates for successful runs
-        # rNPV at Launch
-        iter_result['rnpv_at_launch'] = npf.npv(params['discount_rate'], annual_commercial_net_cash_flow_M_iter)
-        
-        # rNPV at Start of Regulatory
-        val_at_reg = iter_result['rnpv_at_launch'] * params['regulatory']['pos'] 
-        val_at_reg_disc = val_at_reg / ((1 + params['discount_rate']) ** iter_rd_durations['regulatory'])
-        iter_result['rnpv_at_regulatory_start'] = val_at_reg_disc - iter_rd_costs['regulatory']
-
-        # rNPV at Start of Phase 3
-        val_at_p3 = iter_result['rnpv_at_regulatory_start'] * params['phase3']['pos']
-        val_at_p3_disc = val_at_p3 / ((1 + params['discount_rate']) ** iter_rd_durations['phase3'])
-        iter_result['rnpv_at_phase3_start'] = val_at_p3_disc - iter_rd_costs['phase3']
-
-        # rNPV at Start of Phase 1/2
-        val_at_p12 = iter_result['rnpv_at_phase3_start'] * params['phase1_2']['pos']
-        val_at_p12_disc = val_at_p12 / ((1 + params['discount_rate']) ** iter_rd_durations['phase1_2'])
-        iter_result['rnpv_at_phase1_2_start'] = val_at_p12_disc - iter_rd_costs['phase1_2']
-        
-        # rNPV at Start of Preclinical (this is effectively the rNPV from t=0 if project starts preclinical)
-        val_at_preclin = iter_result['rnpv_at_phase1_2_start'] * params['preclinical']['pos']
-        val_at_preclin_disc = val_at_preclin / ((1 + params['discount_rate']) ** iter_rd_durations['preclinical'])
-        iter_result['rnpv_at_preclinical_start'] = val_at_preclin_disc - iter_rd_costs['preclinical']
-        # Note: This rnpv_at_preclinical_start is NOT the same as the overall project NPV from t=0,
-        # as it doesn't include prior phase costs in its "cost" term, only its own phase cost.
-        # The 'npv_usd_millions' is the true t=0 rNPV for the iteration.
-
-    else: # Project failed
+    if not succeeded: # Project failed
         iter_result['full_project_cash_flow_stream_M'] = annual_rd_costs_stream_M_iter
         iter_result['npv_usd_millions'] = npf.npv(params['discount_rate'], annual_rd_costs_stream_M_iter)
         # For failed projects, rNPV at phase gates leading to failure would be negative (cost of that phase)
         # and 0 for phases after failure. For simplicity, we leave them as NaN or handle in analysis.
+    return iter_result
+
+def rd_compact_results(iterations, rd, params, waves_config, commercial_life_years):
+    """
+    Compact results (see compact_results) of failed iterations, built directly
+    from the simulate_rd_phases arrays (rows indexed by iteration) instead of
+    one result dict per iteration.
+
+    Rows equal those of rd_iteration_result. The keys that only successful
+    projects fill (ODD tax credit and per-wave sales, patients and launch year)
+    are included as missing, so every chunk carries the full set of result keys.
+    """
+    n = len(iterations)
+    missing = np.full(n, np.nan)
+    lengths = rd['rd_lengths'][iterations].astype(np.int32)
+    width = max(commercial_life_years, int(lengths.max()) if n else 0)
+    cash_flows = np.full((n, width), np.nan)
+    cash_flows[:, :rd['rd_cash_flows'].shape[1]] = rd['rd_cash_flows'][iterations, :width]
+
+    # NPV of each stream, computed as npf.npv over the entries of the row
+    npv = np.empty(n)
+    for length in np.unique(lengths):
+        rows = lengths == length
+        npv[rows] = (cash_flows[rows, :length] / (1 + params['discount_rate']) ** np.arange(length)).sum(axis=1)
+
+    rd_stream = (cash_flows, lengths, False)
+    no_flows = (np.full((n, commercial_life_years), np.nan), np.zeros(n, dtype=np.int32), True)
+    absent = (np.full((n, commercial_life_years), np.nan), np.full(n, -1, dtype=np.int32), True)
+
+    # Columns in the key order of a successful project's result dict;
+    # (matrix, lengths, is_integer) tuples are list-valued streams
+    columns = {
+        'iteration': np.asarray(iterations), 'project_succeeded': rd['succeeded'][iterations],
+        'total_rd_cost_millions': rd['total_rd_cost'][iterations],
+        'total_rd_duration_years': rd['total_rd_duration'][iterations],
+        'prv_obtained': rd['prv_obtained'][iterations], 'prv_value_millions': rd['prv_value'][iterations],
+        'odd_obtained': rd['odd_obtained'][iterations],
+        'annual_rd_costs_stream_M': rd_stream,
+        'annual_commercial_revenues_M': no_flows, 'annual_patients_treated': no_flows,
+        'annual_commercial_ebit_M': no_flows, 'annual_commercial_net_cash_flow_M': no_flows,
+        'full_project_cash_flow_stream_M': rd_stream, 'npv_usd_millions': npv,
+        'launch_year_w1': missing,
+        'rnpv_at_preclinical_start': missing, 'rnpv_at_phase1_2_start': missing,
+        'rnpv_at_phase3_start': missing, 'rnpv_at_regulatory_start': missing,
+        'rnpv_at_launch': missing
+    }
+    for k, phase_n in enumerate(RD_PHASES):
+        columns[f'cost_{phase_n}_M'] = rd['costs'][iterations, k]
+        columns[f'duration_{phase_n}_yrs'] = rd['durations'][iterations, k]
+    columns['odd_tax_credit_millions'] = missing
+    for wave_name in waves_config:
+        columns[f"{wave_name}_annual_sales_M"] = absent
+        columns[f"{wave_name}_annual_patients"] = absent
+        columns[f"{wave_name}_launch_year"] = missing
+
+    return {
+        'n': n, 'keys': list(columns),
+        'scalars': {key: value for key, value in columns.items() if not isinstance(value, tuple)},
+        'series': {key: value for key, value in columns.items() if isinstance(value, tuple)}
+    }
+
+def simulate_commercial_phase(iter_result, rd, row, params, waves_config, eligibility_index, current_year,
+                              commercial_life_years, treatment_age_limit, rng):
+    """
+    Completes the result dict of a successful project (see rd_iteration_result)
+    with launch, patient-level sales, cash flows, NPV and phase-gate rNPVs.
+    """
+    iter_rd_costs = dict(zip(RD_PHASES, rd['costs'][row]))
+    iter_rd_durations = dict(zip(RD_PHASES, rd['durations'][row]))
+    odd_obtained_this_run = rd['odd_obtained'][row]
+    prv_obtained_this_run = bool(rd['prv_obtained'][row])
+    prv_value_this_run = rd['prv_value'][row]
+    annual_rd_costs_stream_M_iter = iter_result['annual_rd_costs_stream_M']
+
+    actual_launch_year_w1 = int(rd['launch_year_w1'][row])
+    iter_result['launch_year_w1'] = actual_launch_year_w1
+
+    odd_rd_tax_credit_value = 0
+    if odd_obtained_this_run:
+        clinical_costs_for_credit = iter_rd_costs['phase1_2'] + iter_rd_costs['phase3']
+        odd_rd_tax_credit_value = clinical_costs_for_credit * params['odd_rd_tax_credit_rate']
+    iter_result['odd_tax_credit_millions'] = odd_rd_tax_credit_value if odd_obtained_this_run else 0
+    # --- PATIENT-LEVEL TREATMENT LOGIC ---
+    # Treated flags by patient id, shared across all years of this simulation
+    treated = np.zeros(eligibility_index['n_patients'], dtype=bool)
+    annual_commercial_revenues_M_iter = []
+    annual_patients_treated_iter = []
+    annual_commercial_ebit_M_iter = []
+    annual_commercial_net_cash_flow_M_iter = []
+    wave_annual_sales = {wave_name: [] for wave_name in waves_config}
+    wave_annual_patients = {wave_name: [] for wave_name in waves_config}
+    for year_offset in range(commercial_life_years):
+        operational_year = actual_launch_year_w1 + year_offset
+        annual_revenue_iter_yr = 0
+        current_patients_treated_iter_yr = 0
+        for wave_name, config in waves_config.items():
+            actual_wave_launch_year = actual_launch_year_w1 + config['launch_delay_from_base']
+            if operational_year >= actual_wave_launch_year:
+                years_since_wave_launch = operational_year - actual_wave_launch_year
+                # Only select untreated, eligible patients
+                eligible_ids = get_untreated_eligible_ids(eligibility_index, treated, operational_year,
+                                                          wave_name, treatment_age_limit)
+                num_eligible_patients = len(eligible_ids)
+                penetration_params_wave = params[f'penetration_{wave_name}']
+                market_penetration = sigmoid_penetration(
+                    t=years_since_wave_launch,
+                    max_rate=penetration_params_wave['max_rate'](rng),
+                    steepness=penetration_params_wave['steepness'](rng),
+                    midpoint_years=penetration_params_wave['midpoint_years'](rng)
+                )
+                #price = params['price_usd_millions']()
+                list_price = params['price_usd_millions'](rng)
+                net_price  = list_price * params['gt_net_factor'](rng) 
+                n_to_treat = int(round(num_eligible_patients * market_penetration))
+                n_to_treat = min(n_to_treat, num_eligible_patients)
+                # Randomly select patients to treat
+                if n_to_treat > 0 and num_eligible_patients > 0:
+                    patient_ids_to_treat = eligible_ids[rng.choice(num_eligible_patients, n_to_treat, replace=False)]
+                    # Mark these patients as treated (across all years)
+                    treated[patient_ids_to_treat] = True
+
+                patients_this_wave_year = n_to_treat
+                annual_revenue_iter_yr += patients_this_wave_year * net_price
+                current_patients_treated_iter_yr += patients_this_wave_year
+                wave_annual_sales[wave_name].append(patients_this_wave_year * net_price)
+                wave_annual_patients[wave_name].append(patients_this_wave_year)
+                #if num_eligible_patients > 0 and i < 5:
+                #   print(f"Iter {i}, OpYear {operational_year}, Wave {wave_name}, Countries {config['countries']}")
+                #   print(f"  Eligible Patients: {num_eligible_patients}, Market Pen: {market_penetration:.4f}, List Price: ${list_price:.2f}M, Net Price: ${net_price:.2f}M, Revenue this wave-yr: ${patients_this_wave_year * net_price:.2f}M")
+
+        annual_commercial_revenues_M_iter.append(annual_revenue_iter_yr)
+        annual_patients_treated_iter.append(current_patients_treated_iter_yr)
+        cogs = annual_revenue_iter_yr * params['cogs_percent_revenue'](rng)
+        sga = annual_revenue_iter_yr * params['sga_percent_revenue'](rng)
+        ebit_iter = annual_revenue_iter_yr - cogs - sga
+        if year_offset == 0 and prv_obtained_this_run: ebit_iter += prv_value_this_run
+        if year_offset == 0 and odd_obtained_this_run: ebit_iter += odd_rd_tax_credit_value
+        annual_commercial_ebit_M_iter.append(ebit_iter)
+        tax = ebit_iter * params['tax_rate'] if ebit_iter > 0 else 0
+        net_cash_flow_iter = ebit_iter - tax
+        annual_commercial_net_cash_flow_M_iter.append(net_cash_flow_iter)
+
+    #if i < 5:
+    #    print(f"Iter {i}, First Full Commercial Year Revenue (annual_commercial_revenues_M_iter[0]): ${annual_commercial_revenues_M_iter[0] if annual_commercial_revenues_M_iter else 0:.2f}M")
+
+    iter_result['annual_commercial_revenues_M'] = annual_commercial_revenues_M_iter
+    iter_result['annual_patients_treated'] = annual_patients_treated_iter
+    iter_result['annual_commercial_ebit_M'] = annual_commercial_ebit_M_iter
+    iter_result['annual_commercial_net_cash_flow_M'] = annual_commercial_net_cash_flow_M_iter
+    for wave_name in waves_config:
+        iter_result[f"{wave_name}_annual_sales_M"] = wave_annual_sales[wave_name]
+        iter_result[f"{wave_name}_annual_patients"] = wave_annual_patients[wave_name]
+        iter_result[f"{wave_name}_launch_year"] = actual_launch_year_w1 + waves_config[wave_name]['launch_delay_from_base']
+
+    num_rd_years_full = len(annual_rd_costs_stream_M_iter)
+    start_commercial_relative_year = actual_launch_year_w1 - current_year
+    padding_zeros_count = max(0, start_commercial_relative_year - num_rd_years_full)
+
+    current_full_cash_flow_stream = annual_rd_costs_stream_M_iter + [0] * padding_zeros_count + annual_commercial_net_cash_flow_M_iter
+    iter_result['full_project_cash_flow_stream_M'] = current_full_cash_flow_stream
+    iter_result['npv_usd_millions'] = npf.npv(params['discount_rate'], current_full_cash_flow_stream)
+
+    # Calculate rNPV at phase gates for successful runs
+    # rNPV at Launch
+    iter_result['rnpv_at_launch'] = npf.npv(params['discount_rate'], annual_commercial_net_cash_flow_M_iter)
+
+    # rNPV at Start of Regulatory
+    val_at_reg = iter_result['rnpv_at_launch'] * params['regulatory']['pos'] 
+    val_at_reg_disc = val_at_reg / ((1 + params['discount_rate']) ** iter_rd_durations['regulatory'])
+    iter_result['rnpv_at_regulatory_start'] = val_at_reg_disc - iter_rd_costs['regulatory']
+
+    # rNPV at Start of Phase 3
+    val_at_p3 = iter_result['rnpv_at_regulatory_start'] * params['phase3']['pos']
+    val_at_p3_disc = val_at_p3 / ((1 + params['discount_rate']) ** iter_rd_durations['phase3'])
+    iter_result['rnpv_at_phase3_start'] = val_at_p3_disc - iter_rd_costs['phase3']
+
+    # rNPV at Start of Phase 1/2
+    val_at_p12 = iter_result['rnpv_at_phase3_start'] * params['phase1_2']['pos']
+    val_at_p12_disc = val_at_p12 / ((1 + params['discount_rate']) ** iter_rd_durations['phase1_2'])
+    iter_result['rnpv_at_phase1_2_start'] = val_at_p12_disc - iter_rd_costs['phase1_2']
+
+    # rNPV at Start of Preclinical (this is effectively the rNPV from t=0 if project starts preclinical)
+    val_at_preclin = iter_result['rnpv_at_phase1_2_start'] * params['preclinical']['pos']
+    val_at_preclin_disc = val_at_preclin / ((1 + params['discount_rate']) ** iter_rd_durations['preclinical'])
+    iter_result['rnpv_at_preclinical_start'] = val_at_preclin_disc - iter_rd_costs['preclinical']
+    # Note: This rnpv_at_preclinical_start is NOT the same as the overall project NPV from t=0,
+    # as it doesn't include prior phase costs in its "cost" term, only its own phase cost.
+    # The 'npv_usd_millions' is the true t=0 rNPV for the iteration.
 
-    #results.append(iter_result)
-            
     return iter_result
 
 
+def simulate_single_iteration(args):
+    """
+    Simulates one project end to end (R&D, then the commercial phase if it succeeds).
+
+    args is (i, params, waves_config, base_launch_year_w1, timeline_df, current_year,
+    commercial_life_years, treatment_age_limit[, seed]). With a seed (an int, a
+    SeedSequence such as iteration_seed(seed, i), or None for fresh entropy) the
+    result is row i of run_monte_carlo_simulation(..., seed=seed): R&D comes
+    from iteration i's block stream and the commercial phase from
+    iteration_seed(seed, i). With a numpy Generator instead, both phases draw
+    from that one stream.
+    """
+    i, params, waves_config, base_launch_year_w1, timeline_df, current_year, commercial_life_years, treatment_age_limit = args[:8]
+    seed = args[8] if len(args) > 8 else None
+
+    # Eligibility lookups go through a prebuilt index (run_monte_carlo_simulation
+    # passes one in place of timeline_df); treatment state lives in a per-iteration bitmap
+    eligibility_index = timeline_df if isinstance(timeline_df, dict) else build_eligibility_index(timeline_df, waves_config)
+
+    # --- R&D Phase Simulation ---
+    if isinstance(seed, np.random.Generator):
+        rng = seed
+        rd = simulate_rd_phases(1, params, current_year, rng)
+    else:
+        entropy = (seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)).entropy
+        rng = np.random.default_rng(iteration_seed(entropy, i))
+        rd = simulate_rd_range(i, i + 1, params, current_year, entropy)
+    iter_result = rd_iteration_result(i, rd, 0, params)
+    if iter_result['project_succeeded']:
+        simulate_commercial_phase(iter_result, rd, 0, params, waves_config, eligibility_index, current_year,
+                                  commercial_life_years, treatment_age_limit, rng)
+    return iter_result
+
+
+# Per-process simulation inputs, set once by _init_worker
+_WORKER_STATE = {}
+
+def save_shared_arrays(data, directory):
+    """
+    Writes the array values of a dict (an eligibility index, R&D outcomes) to .npy files in directory.
+    Returns a small picklable spec in which each array is replaced by its file path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    spec = {}
+    for key, value in data.items():
+        if isinstance(value, np.ndarray):
+            spec[key] = os.path.join(directory, f'{key}.npy')
+            np.save(spec[key], value)
+        else:
+            spec[key] = value
+    return spec
+
+def load_shared_arrays(spec):
+    """
+    Opens a dict saved by save_shared_arrays with its arrays memory-mapped read-only,
+    so every process shares the same pages instead of holding its own copy.
+    """
+    return {key: np.load(value, mmap_mode='r') if isinstance(value, str) else value
+            for key, value in spec.items()}
+
+def _init_worker(index_spec, rd_spec, entropy, params, waves_config, base_launch_year_w1, current_year,
+                 commercial_life_years, treatment_age_limit):
+    _WORKER_STATE['entropy'] = entropy
+    _WORKER_STATE['rd'] = load_shared_arrays(rd_spec)
+    _WORKER_STATE['args'] = (params, waves_config, base_launch_year_w1, load_shared_arrays(index_spec),
+                             current_year, commercial_life_years, treatment_age_limit)
+
+def iteration_seed(entropy, i):
+    """
+    Seed of the commercial-phase random stream of iteration i in run_monte_carlo_simulation:
+    child i of SeedSequence(entropy), the same as SeedSequence(entropy).spawn(n)[i], so it
+    can be derived from the index alone.
+    """
+    return np.random.SeedSequence(entropy, spawn_key=(i,))
+
+def compact_results(results, commercial_life_years):
+    """
+    Packs a list of simulate_single_iteration result dicts into typed arrays.
+
+    Scalar results become one array per key (float with NaN where a key is
+    missing). List results (cash-flow, sales and patient streams) become
+    float matrices padded with NaN, at least commercial_life_years wide,
+    plus a length per row (-1 where the key is missing).
+
+    Returns a dict with 'n', 'keys' (result keys in order of first appearance),
+    'scalars' {key: array} and 'series' {key: (matrix, lengths, is_integer)}.
+    """
+    keys = list(dict.fromkeys(key for result in results for key in result))
+    scalars, series = {}, {}
+    for key in keys:
+        values = [result.get(key, np.nan) for result in results]
+        if not any(isinstance(value, list) for value in values):
+            scalars[key] = np.asarray(values) if all(key in result for result in results) \
+                else np.asarray(values, dtype=float)
+            continue
+        lengths = np.array([len(value) if isinstance(value, list) else -1 for value in values], dtype=np.int32)
+        matrix = np.full((len(values), max(commercial_life_years, lengths.max())), np.nan)
+        for row, value in enumerate(values):
+            if isinstance(value, list):
+                matrix[row, :len(value)] = value
+        is_integer = all(isinstance(v, (int, np.integer)) for value in values if isinstance(value, list) for v in value)
+        series[key] = (matrix, lengths, is_integer)
+    return {'n': len(results), 'keys': keys, 'scalars': scalars, 'series': series}
+
+def concat_compact_results(chunks):
+    """Concatenates compact result chunks, padding missing keys and narrower matrices."""
+    keys = list(dict.fromkeys(key for chunk in chunks for key in chunk['keys']))
+    series_keys = {key for chunk in chunks for key in chunk['series']}
+    scalars, series = {}, {}
+    for key in keys:
+        if key not in series_keys:
+            scalars[key] = np.concatenate([chunk['scalars'][key] if key in chunk['scalars']
+                                           else np.full(chunk['n'], np.nan) for chunk in chunks])
+            continue
+        width = max(chunk['series'][key][0].shape[1] for chunk in chunks if key in chunk['series'])
+        matrices, lengths = [], []
+        for chunk in chunks:
+            if key in chunk['series']:
+                matrix, chunk_lengths, _ = chunk['series'][key]
+                matrices.append(np.pad(matrix, ((0, 0), (0, width - matrix.shape[1])), constant_values=np.nan))
+                lengths.append(chunk_lengths)
+            else:
+                matrices.append(np.full((chunk['n'], width), np.nan))
+                lengths.append(np.full(chunk['n'], -1, dtype=np.int32))
+        is_integer = all(chunk['series'][key][2] for chunk in chunks if key in chunk['series'])
+        series[key] = (np.concatenate(matrices), np.concatenate(lengths), is_integer)
+    return {'n': sum(chunk['n'] for chunk in chunks), 'keys': keys, 'scalars': scalars, 'series': series}
+
+def compact_results_to_dataframe(compact):
+    """
+    Rebuilds the one-row-per-iteration DataFrame (list-valued stream columns,
+    NaN where a key was missing) from compact results.
+    """
+    columns = {}
+    for key in compact['keys']:
+        if key in compact['scalars']:
+            columns[key] = compact['scalars'][key]
+            continue
+        matrix, lengths, is_integer = compact['series'][key]
+        columns[key] = [
+            (row[:n].astype(int) if is_integer else row[:n]).tolist() if n >= 0 else np.nan
+            for row, n in zip(matrix, lengths)
+        ]
+    return pd.DataFrame(columns)
+
+def _new_summary(commercial_life_years):
+    return {'n_iterations': 0, 'n_succeeded': 0, 'npv_usd_millions': [],
+            'revenue_sum_M': np.zeros(commercial_life_years),
+            'net_cash_flow_sum_M': np.zeros(commercial_life_years)}
+
+def _update_summary(summary, compact, commercial_life_years):
+    """Folds one chunk of compact results into the running summary."""
+    succeeded = compact['scalars']['project_succeeded'].astype(bool)
+    summary['n_iterations'] += compact['n']
+    summary['n_succeeded'] += int(succeeded.sum())
+    summary['npv_usd_millions'].append(compact['scalars']['npv_usd_millions'].astype(float))
+    for summary_key, key in [('revenue_sum_M', 'annual_commercial_revenues_M'),
+                             ('net_cash_flow_sum_M', 'annual_commercial_net_cash_flow_M')]:
+        matrix = compact['series'][key][0][succeeded, :commercial_life_years]
+        summary[summary_key] += np.nansum(matrix, axis=0)
+
+def _finalize_summary(summary, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """
+    Turns the running sums into result statistics: P(success), NPV mean and
+    quantiles, P(NPV > 0) and mean annual revenue and net cash-flow curves
+    of successful projects (commercial year 1 .. commercial_life_years).
+    """
+    npv = np.concatenate(summary['npv_usd_millions']) if summary['npv_usd_millions'] else np.empty(0)
+    n_succeeded = summary['n_succeeded']
+    return {
+        'n_iterations': summary['n_iterations'],
+        'probability_success': n_succeeded / summary['n_iterations'] if summary['n_iterations'] else np.nan,
+        'npv_mean_usd_millions': npv.mean() if len(npv) else np.nan,
+        'npv_quantiles_usd_millions': dict(zip(quantiles, np.quantile(npv, quantiles))) if len(npv) else {},
+        'probability_positive_npv': (npv > 0).mean() if len(npv) else np.nan,
+        'mean_annual_revenues_M': summary['revenue_sum_M'] / n_succeeded if n_succeeded else summary['revenue_sum_M'],
+        'mean_annual_net_cash_flow_M': summary['net_cash_flow_sum_M'] / n_succeeded if n_succeeded else summary['net_cash_flow_sum_M'],
+    }
+
+def _compact_to_arrow(compact):
+    """Converts compact results to a pyarrow Table: float scalars, bool flags and list<double> streams."""
+    import pyarrow as pa
+
+    columns = {}
+    for key in compact['keys']:
+        if key in compact['scalars']:
+            values = compact['scalars'][key]
+            if values.dtype != bool and key != 'iteration':
+                values = values.astype(float)
+            columns[key] = pa.array(values)
+        else:
+            matrix, lengths, _ = compact['series'][key]
+            present = np.maximum(lengths, 0)
+            offsets = np.concatenate([[0], np.cumsum(present)]).astype(np.int32)
+            flat = matrix[np.arange(matrix.shape[1]) < present[:, None]]
+            columns[key] = pa.ListArray.from_arrays(pa.array(offsets), pa.array(flat, type=pa.float64()),
+                                                    mask=pa.array(lengths < 0))
+    return pa.table(columns)
+
+def _spill_to_parquet(spill, compact):
+    """
+    Appends the rows of one chunk to the Parquet file at spill['path'] (requires pyarrow).
+
+    Every chunk carries the full set of result keys (failed projects through
+    rd_compact_results), so the first chunk fixes the file schema and each
+    chunk is written as soon as it arrives.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = _compact_to_arrow(compact)
+    if spill['writer'] is None:
+        spill['writer'] = pq.ParquetWriter(spill['path'], table.schema)
+    schema = spill['writer'].schema
+    spill['writer'].write_table(pa.Table.from_arrays([table[name] for name in schema.names], schema=schema))
+
+def _take_compact(compact, rows):
+    """Selects (and reorders) rows of compact results."""
+    return {
+        'n': len(rows), 'keys': compact['keys'],
+        'scalars': {key: values[rows] for key, values in compact['scalars'].items()},
+        'series': {key: (matrix[rows], lengths[rows], is_integer)
+                   for key, (matrix, lengths, is_integer) in compact['series'].items()}
+    }
+
+def _simulate_worker_chunk(iterations):
+    """Runs the commercial phase of successful iterations, each on its own random stream."""
+    params, waves_config, _, eligibility_index, current_year, commercial_life_years, treatment_age_limit = _WORKER_STATE['args']
+    rd = _WORKER_STATE['rd']
+    results = []
+    for i in iterations:
+        iter_result = rd_iteration_result(i, rd, i, params)
+        simulate_commercial_phase(iter_result, rd, i, params, waves_config, eligibility_index, current_year,
+                                  commercial_life_years, treatment_age_limit,
+                                  np.random.default_rng(iteration_seed(_WORKER_STATE['entropy'], i)))
+        results.append(iter_result)
+    return compact_results(results, commercial_life_years)
+
+
 def run_monte_carlo_simulation(n_iterations, params, waves_config, base_launch_year_w1, 
                              timeline_df, current_year, commercial_life_years, 
-                             treatment_age_limit, n_processes=None):
+                             treatment_age_limit, n_processes=None, chunk_size=None,
+                             spill_path=None, keep_results=True, seed=None):
     """
     Run Monte Carlo simulation with multiprocessing and progress bar.
+
+    The R&D phases of all iterations are simulated at once in the parent
+    (simulate_rd_phases). Failed projects are complete at that point: their
+    rows are built straight from the R&D arrays (rd_compact_results), in
+    chunks of chunk_size. Only successful ones are dispatched to the workers
+    for the commercial phase, in chunks of chunk_size (default: about four
+    chunks per worker, at most 100 iterations each). Workers return compact typed arrays, and the parent
+    folds each chunk into running summary statistics as it arrives. If
+    spill_path is given, raw rows are appended chunk by chunk to that Parquet
+    file (requires pyarrow).
+
+    Random streams: R&D is drawn vectorized in fixed blocks of RD_BLOCK_SIZE
+    iterations, each on its own stream (simulate_rd_range); the commercial
+    phase of iteration i draws from its own Generator seeded with
+    iteration_seed(seed, i). Row i therefore depends only on (seed, i): not
+    on n_processes, chunk_size or n_iterations (a longer run extends a
+    shorter one), and simulate_single_iteration with the same seed
+    reproduces it. With seed=None fresh entropy is drawn; it is reported as
+    summary['seed'] so the run can be repeated.
+
+    Returns the one-row-per-iteration DataFrame, with the summary in
+    df.attrs['summary'] (see _finalize_summary). With keep_results=False
+    no rows are kept in memory and only the summary dict is returned.
+    Only that mode bounds memory for very large runs (e.g. 100k
+    iterations): the default keep_results=True still holds every chunk and
+    rebuilds the full DataFrame at the end. Combine keep_results=False with
+    spill_path to keep the raw rows on disk.
     """
     print(f"Starting Monte Carlo simulation with {n_iterations} iterations...")
     
-    # Prepare arguments for each iteration
-    args_list = [(i, params, waves_config, base_launch_year_w1, 
-                  timeline_df, current_year, 
-                  commercial_life_years, treatment_age_limit) 
-                 for i in range(n_iterations)]
-    
-    # Create process pool and run simulations
-    with Pool(processes=n_processes) as pool:
-        # Use imap for progress bar support
-        results = list(tqdm(
-            pool.imap(simulate_single_iteration, args_list),
-            total=n_iterations,
-            desc="Running simulations"
-        ))
+    if spill_path is not None:
+        import pyarrow.parquet  # Optional dependency, only needed for spilling; fail before simulating
+
+    entropy = np.random.SeedSequence(seed).entropy
+    summary = _new_summary(commercial_life_years)
+    kept_chunks = []
+    spill = {'path': spill_path, 'writer': None}
+
+    # --- R&D Phase Simulation (all iterations, in fixed blocks) ---
+    rd = simulate_rd_range(0, n_iterations, params, current_year, entropy)
+    succeeded = np.flatnonzero(rd['succeeded'])
+    failed = np.flatnonzero(~rd['succeeded'])
+
+    # Only successful projects need the commercial simulation
+    if chunk_size is None:
+        chunk_size = max(1, min(100, len(succeeded) // (4 * (n_processes or os.cpu_count() or 1))))
+    chunks = [succeeded[start:start + chunk_size] for start in range(0, len(succeeded), chunk_size)]
+
+    def collect(compact):
+        _update_summary(summary, compact, commercial_life_years)
+        if spill_path is not None:
+            _spill_to_parquet(spill, compact)
+        if keep_results:
+            kept_chunks.append(compact)
+
+    # Index the timeline once and share it with the workers through memory-mapped
+    # files; each worker receives the inputs once at startup and only the
+    # iteration indices per task
+    index_dir = tempfile.mkdtemp(prefix='mc_timeline_')
+    try:
+        index_spec = save_shared_arrays(build_eligibility_index(timeline_df, waves_config),
+                                        os.path.join(index_dir, 'eligibility'))
+        rd_spec = save_shared_arrays(rd, os.path.join(index_dir, 'rd'))
+        initargs = (index_spec, rd_spec, entropy, params, waves_config, base_launch_year_w1, current_year,
+                    commercial_life_years, treatment_age_limit)
+
+        with tqdm(total=n_iterations, desc="Running simulations") as progress:
+            # Failed projects are complete after R&D; emit them in chunks straight from the arrays
+            for start in range(0, len(failed), chunk_size):
+                compact = rd_compact_results(failed[start:start + chunk_size], rd, params, waves_config,
+                                             commercial_life_years)
+                collect(compact)
+                progress.update(compact['n'])
+
+            # Create process pool and run simulations
+            with Pool(processes=n_processes, initializer=_init_worker, initargs=initargs) as pool:
+                for compact in pool.imap(_simulate_worker_chunk, chunks):
+                    collect(compact)
+                    progress.update(compact['n'])
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+        if spill['writer'] is not None:
+            spill['writer'].close()
     
-    # Convert results to DataFrame
-    return pd.DataFrame(results)
+    summary = _finalize_summary(summary)
+    summary['seed'] = entropy
+    if not keep_results:
+        return summary
+
+    # Convert results to DataFrame, in iteration order
+    if kept_chunks:
+        compact = concat_compact_results(kept_chunks)
+        compact = _take_compact(compact, np.argsort(compact['scalars']['iteration'], kind='stable'))
+        results_df = compact_results_to_dataframe(compact)
+    else:
+        results_df = pd.DataFrame()
+    results_df.attrs['summary'] = summary
+    return results_df
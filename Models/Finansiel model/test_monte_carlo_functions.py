@@ -0,0 +1,293 @@
+"""
+Tests for the Monte Carlo simulation of the financial model on a small synthetic patient timeline.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from monte_carlo_functions import (
+    COMMERCIAL_LIFE_YEARS,
+    CURRENT_YEAR,
+    PARAMS,
+    RD_BLOCK_SIZE,
+    RD_PHASES,
+    TREATMENT_AGE_LIMIT,
+    WAVES,
+    build_eligibility_index,
+    compact_results,
+    compact_results_to_dataframe,
+    get_untreated_eligible_ids,
+    iteration_seed,
+    load_shared_arrays,
+    rd_compact_results,
+    rd_iteration_result,
+    run_monte_carlo_simulation,
+    save_shared_arrays,
+    simulate_rd_phases,
+    simulate_rd_range,
+    simulate_single_iteration,
+)
+
+
+def make_timeline(n_patients=400, seed=0):
+    """Synthetic patient-year timeline spread over countries of every wave (and one outside them)."""
+    rng = np.random.default_rng(seed)
+    countries = ['USA', 'DEU', 'FRA', 'AUS', 'JPN', 'SAU', 'CHE', 'COD']
+    iso3 = rng.choice(countries, n_patients)
+    birth = rng.integers(2000, 2055, n_patients)
+    death = birth + rng.integers(1, 45, n_patients)
+    frames = []
+    for p in range(n_patients):
+        years = np.arange(max(birth[p], 2025), min(death[p] + 2, 2075))
+        frames.append(pd.DataFrame({
+            'year': years, 'patient_uuid': f'id-{p:05d}', 'age': years - birth[p],
+            'alive': years <= death[p], 'iso3': iso3[p]
+        }))
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def run_simulation(timeline, n_iterations=60, params=PARAMS, **kwargs):
+    """run_monte_carlo_simulation with the module defaults."""
+    return run_monte_carlo_simulation(n_iterations, params, WAVES, 2030, timeline, CURRENT_YEAR,
+                                      COMMERCIAL_LIFE_YEARS, TREATMENT_AGE_LIMIT, **kwargs)
+
+
+def failing_price(rng=None, size=None):
+    raise RuntimeError("price sampler failed")
+
+
+def assert_same_rows(df, other):
+    """Rows of two result frames equal in iteration order; lists may come back as arrays, NaN as null."""
+    df, other = (frame.sort_values('iteration').reset_index(drop=True) for frame in (df, other))
+    assert list(other.columns) == list(df.columns) and len(other) == len(df)
+    for column in df.columns:
+        for expected, value in zip(df[column], other[column]):
+            if isinstance(expected, (list, np.ndarray)):
+                assert list(value) == list(expected), column
+            elif pd.isna(expected):
+                assert value is None or pd.isna(value), column
+            else:
+                assert value == expected, column
+
+
+def test_eligibility_index_matches_dataframe_filter():
+    """Index lookups return the same patients as filtering the timeline DataFrame."""
+    timeline = make_timeline()
+    index = build_eligibility_index(timeline, WAVES)
+    codes = {uuid: code for code, uuid in enumerate(pd.unique(timeline['patient_uuid']))}
+
+    rng = np.random.default_rng(1)
+    treated = rng.random(index['n_patients']) < 0.3
+    treated_uuids = {uuid for uuid, code in codes.items() if treated[code]}
+
+    for year in (2025, 2040, 2060, 2080):
+        for wave_name, config in WAVES.items():
+            for age_limit in (5, 20):
+                eligible = timeline[
+                    (timeline['year'] == year) &
+                    (timeline['iso3'].isin(config['countries'])) &
+                    (timeline['age'] < age_limit) &
+                    (timeline['alive'] == True) &
+                    (~timeline['patient_uuid'].isin(treated_uuids))
+                ]
+                expected = np.sort(eligible['patient_uuid'].map(codes).to_numpy())
+                ids = get_untreated_eligible_ids(index, treated, year, wave_name, age_limit)
+                assert np.array_equal(np.sort(ids), expected)
+
+    print("✓ Eligibility index matches the DataFrame filter")
+
+
+def test_eligibility_index_requires_columns():
+    """A timeline without the required columns is rejected instead of indexed as empty."""
+    with pytest.raises(ValueError, match='iso3'):
+        build_eligibility_index(make_timeline().drop(columns='iso3'), WAVES)
+    with pytest.raises(ValueError):
+        build_eligibility_index(pd.DataFrame(), WAVES)
+
+    empty = build_eligibility_index(make_timeline().iloc[:0], WAVES)
+    assert empty['n_patients'] == 0 and len(empty['patient_ids']) == 0
+
+    print("✓ Eligibility index validates its input")
+
+
+def test_shared_arrays_are_read_only_memmaps():
+    """Arrays saved for the workers are reopened as read-only memory maps; other values pass through."""
+    index = build_eligibility_index(make_timeline(), WAVES)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        spec = save_shared_arrays(index, os.path.join(tmpdir, 'eligibility'))
+        assert spec['offsets'] == index['offsets'] and spec['n_patients'] == index['n_patients']
+
+        loaded = load_shared_arrays(spec)
+        for key in ('patient_ids', 'ages'):
+            assert isinstance(loaded[key], np.memmap)
+            assert not loaded[key].flags.writeable
+            assert loaded[key].dtype == index[key].dtype
+            assert np.array_equal(loaded[key], index[key])
+        with pytest.raises(ValueError):
+            loaded['ages'][0] = 0
+        del loaded
+
+    print("✓ Shared arrays load as read-only memmaps")
+
+
+def test_shared_array_directory_is_removed(monkeypatch):
+    """The memmap directory is removed after a run, also when a worker raises."""
+    timeline = make_timeline(100)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        monkeypatch.setattr(tempfile, 'tempdir', tmpdir)
+
+        run_simulation(timeline, n_processes=2, seed=0)
+        assert os.listdir(tmpdir) == []
+
+        with pytest.raises(RuntimeError, match='price sampler failed'):
+            run_simulation(timeline, params={**PARAMS, 'price_usd_millions': failing_price},
+                           n_processes=2, seed=0)
+        assert os.listdir(tmpdir) == []
+
+    print("✓ Shared array directory is cleaned up")
+
+
+def test_parquet_spill_matches_results():
+    """Rows spilled to Parquet equal the returned DataFrame, also for chunks of failed projects only."""
+    pytest.importorskip('pyarrow')
+    timeline = make_timeline(200)
+    all_fail = {**PARAMS, 'regulatory': {**PARAMS['regulatory'], 'pos': 0.0}}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, params in [('mixed', PARAMS), ('all_failed', all_fail)]:
+            path = os.path.join(tmpdir, f'{name}.parquet')
+            df = run_simulation(timeline, params=params, n_processes=2, chunk_size=1, seed=3, spill_path=path)
+            assert_same_rows(df, pd.read_parquet(path))
+
+        assert not df['project_succeeded'].any()
+        summary = run_simulation(timeline, n_processes=2, seed=3, keep_results=False,
+                                 spill_path=os.path.join(tmpdir, 'summary_only.parquet'))
+        assert summary['n_iterations'] == 60
+        assert_same_rows(pd.read_parquet(os.path.join(tmpdir, 'mixed.parquet')),
+                         pd.read_parquet(os.path.join(tmpdir, 'summary_only.parquet')))
+
+    print("✓ Parquet spill round-trips the results")
+
+
+def test_failed_rows_built_from_rd_arrays():
+    """Failed-project rows built from the R&D arrays equal the per-iteration result dicts."""
+    rd = simulate_rd_phases(3000, PARAMS, CURRENT_YEAR, np.random.default_rng(9))
+    failed = np.flatnonzero(~rd['succeeded'])
+
+    compact = rd_compact_results(failed, rd, PARAMS, WAVES, COMMERCIAL_LIFE_YEARS)
+    df = compact_results_to_dataframe(compact)
+    expected = compact_results_to_dataframe(compact_results(
+        [rd_iteration_result(i, rd, i, PARAMS) for i in failed], COMMERCIAL_LIFE_YEARS))
+    pd.testing.assert_frame_equal(df[expected.columns], expected)
+
+    # Keys only successful projects fill are present, as missing
+    extra = [key for key in df.columns if key not in expected.columns]
+    assert extra[0] == 'odd_tax_credit_millions' and len(extra) == 1 + 3 * len(WAVES)
+    assert df[extra].isna().all().all()
+
+    print("✓ Failed-project rows match the result dicts")
+
+
+def test_results_depend_only_on_seed():
+    """Same seed gives identical results for any process count and chunk size; other seeds differ."""
+    timeline = make_timeline(200)
+    runs = [run_simulation(timeline, n_processes=n_processes, chunk_size=chunk_size, seed=11)
+            for n_processes, chunk_size in [(1, None), (2, 1), (3, 7)]]
+    for df in runs[1:]:
+        pd.testing.assert_frame_equal(df, runs[0])
+    assert runs[0].attrs['summary']['seed'] == 11
+    assert runs[0]['project_succeeded'].any() and not runs[0]['project_succeeded'].all()
+
+    other = run_simulation(timeline, n_processes=2, seed=12)
+    assert not np.array_equal(other['total_rd_cost_millions'], runs[0]['total_rd_cost_millions'])
+    assert not other['npv_usd_millions'].equals(runs[0]['npv_usd_millions'])
+
+    print("✓ Monte Carlo results depend only on the seed")
+
+
+def scalar_rd_stream(durations, costs):
+    """Annual R&D cash flows of one project, built phase by phase as in the per-iteration loop."""
+    stream = []
+    for duration, cost in zip(durations, costs):
+        if duration > 0:
+            stream += [-cost / duration] * int(np.floor(duration))
+            if duration % 1 != 0:
+                stream.append(-cost / duration * (duration % 1))
+        elif cost > 0:
+            stream.append(-cost)
+    return stream
+
+
+def test_rd_cash_flows_match_scalar_stream():
+    """Vectorized R&D cash flows equal the floor + fraction stream of each project."""
+    fixed = lambda value: (lambda rng=None, size=None: np.full(size, value))
+    edge_cases = {
+        **PARAMS,
+        'preclinical': {**PARAMS['preclinical'], 'duration': fixed(2.0)},
+        'phase1_2': {**PARAMS['phase1_2'], 'duration': fixed(0.0)},
+    }
+    for params in (PARAMS, edge_cases):
+        rd = simulate_rd_phases(2000, params, CURRENT_YEAR, np.random.default_rng(5))
+        for row in range(2000):
+            expected = scalar_rd_stream(rd['durations'][row], rd['costs'][row])
+            assert rd['rd_lengths'][row] == len(expected)
+            assert np.allclose(rd['rd_cash_flows'][row, :len(expected)], expected, rtol=1e-12)
+            assert np.isnan(rd['rd_cash_flows'][row, len(expected):]).all()
+            assert np.isclose(-sum(expected), rd['total_rd_cost'][row])
+
+    print("✓ R&D cash flows match the scalar stream")
+
+
+def test_rd_phase_reach_matches_probability_of_success():
+    """Phases are reached with the cumulative probability of success of the earlier phases."""
+    n = 200_000
+    rd = simulate_rd_phases(n, PARAMS, CURRENT_YEAR, np.random.default_rng(6))
+    cumulative_pos = np.cumprod([1.0] + [PARAMS[phase]['pos'] for phase in RD_PHASES])
+
+    frequencies = np.append((rd['durations'] > 0).mean(axis=0), rd['succeeded'].mean())
+    tolerance = 4 * np.sqrt(cumulative_pos * (1 - cumulative_pos) / n)
+    assert np.all(np.abs(frequencies - cumulative_pos) <= tolerance)
+
+    # Unreached phases cost nothing; launches exist exactly for successful projects
+    assert np.all((rd['durations'] > 0) | (rd['costs'] == 0))
+    assert np.array_equal(~np.isnan(rd['launch_year_w1']), rd['succeeded'])
+    assert not rd['prv_obtained'][~rd['succeeded']].any()
+
+    print("✓ R&D phase reach matches the cumulative PoS")
+
+
+def test_iteration_replays_from_seed():
+    """simulate_single_iteration with the run seed reproduces row i; longer runs extend shorter ones."""
+    timeline = make_timeline(200)
+    df = run_simulation(timeline, n_iterations=80, n_processes=2, seed=21)
+    index = build_eligibility_index(timeline, WAVES)
+
+    succeeded = np.flatnonzero(df['project_succeeded'])
+    failed = np.flatnonzero(~df['project_succeeded'])
+    for i, seed in [(succeeded[0], 21), (succeeded[-1], iteration_seed(21, succeeded[-1])), (failed[0], 21)]:
+        replay = simulate_single_iteration((int(i), PARAMS, WAVES, 2030, index, CURRENT_YEAR,
+                                            COMMERCIAL_LIFE_YEARS, TREATMENT_AGE_LIMIT, seed))
+        for key, value in replay.items():
+            assert np.array_equal(df.at[i, key], value, equal_nan=isinstance(value, float)), key
+
+    shorter = run_simulation(timeline, n_iterations=50, n_processes=1, seed=21)
+    pd.testing.assert_frame_equal(shorter, df.iloc[:50])
+
+    # R&D rows do not depend on which other rows are drawn, also across block boundaries
+    whole = simulate_rd_range(0, RD_BLOCK_SIZE + 100, PARAMS, CURRENT_YEAR, 21)
+    part = simulate_rd_range(RD_BLOCK_SIZE - 30, RD_BLOCK_SIZE + 20, PARAMS, CURRENT_YEAR, 21)
+    for key, values in part.items():
+        if key == 'rd_cash_flows':
+            width = values.shape[1]
+            assert np.isnan(whole[key][RD_BLOCK_SIZE - 30:RD_BLOCK_SIZE + 20, width:]).all()
+            values = values[:, :width]
+            expected = whole[key][RD_BLOCK_SIZE - 30:RD_BLOCK_SIZE + 20, :width]
+        else:
+            expected = whole[key][RD_BLOCK_SIZE - 30:RD_BLOCK_SIZE + 20]
+        assert np.array_equal(values, expected, equal_nan=values.dtype.kind == 'f'), key
+
+    print("✓ Iterations replay from the seed")
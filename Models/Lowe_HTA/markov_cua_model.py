@@ -30,32 +30,86 @@ Date: November 2025
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, field
+from scipy.optimize import brentq
+from typing import Any, Dict, List, Tuple, Optional
+from dataclasses import dataclass, field, fields, asdict, is_dataclass
+from collections import OrderedDict
+from functools import lru_cache
+import copy
+import hashlib
+import inspect
+import json
+import numbers
+import pickle
 import warnings
 import os
+from multiprocessing import Pool
 warnings.filterwarnings('ignore')
 
 
-def load_dst_life_table(file_path: str = None) -> Dict[int, float]:
+# Default DST life table read by MarkovCohortModel
+DEFAULT_LIFE_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "Life table",
+    "Life table (2 years tables) by life table, sex, age and time.csv"
+)
+
+# Parsed life tables keyed by (absolute path, modification time)
+_LIFE_TABLE_CACHE: Dict[Tuple[str, float], Tuple[Dict[int, float], np.ndarray]] = {}
+
+
+def load_dst_life_table(file_path: str = None, as_array: bool = False):
     """
     Load Danish (DST) life table and calculate annual mortality probabilities by age.
 
     Uses Danmarks Statistik life table (2023-2024) for males to derive background
     mortality rates q_x = (l_x - l_{x+1}) / l_x where l_x is survivors at age x.
 
+    The CSV is parsed once per process; later calls with the same file (and
+    unchanged modification time) are served from an in-memory cache.
+
     Args:
         file_path: Path to DST life table CSV. If None, uses default location.
+        as_array: If True, return a read-only dense array of mortality indexed
+            by integer age (see build_background_mortality_array) instead of a dict.
 
     Returns:
-        Dictionary mapping age (int) to annual mortality probability (float)
+        Dictionary mapping age (int) to annual mortality probability (float),
+        or a read-only NumPy array if as_array is True
     """
     if file_path is None:
-        # Default path relative to this script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(script_dir, "Life table",
-                                 "Life table (2 years tables) by life table, sex, age and time.csv")
+        file_path = DEFAULT_LIFE_TABLE_PATH
+
+    file_path = os.path.abspath(file_path)
+    cache_key = (file_path, os.path.getmtime(file_path))
+
+    if cache_key not in _LIFE_TABLE_CACHE:
+        # Drop stale entries for this file before caching the new version
+        for key in [k for k in _LIFE_TABLE_CACHE if k[0] == file_path]:
+            del _LIFE_TABLE_CACHE[key]
+
+        mortality_by_age = _read_dst_life_table(file_path)
+        mortality_array = build_background_mortality_array(mortality_by_age)
+        mortality_array.flags.writeable = False
+        _LIFE_TABLE_CACHE[cache_key] = (mortality_by_age, mortality_array)
 
+    mortality_by_age, mortality_array = _LIFE_TABLE_CACHE[cache_key]
+    if as_array:
+        return mortality_array
+
+    # Copy so callers can modify their table without touching the cache
+    return dict(mortality_by_age)
+
+
+def _read_dst_life_table(file_path: str) -> Dict[int, float]:
+    """
+    Parse a DST life table CSV into annual mortality probabilities by age.
+
+    Args:
+        file_path: Path to DST life table CSV
+
+    Returns:
+        Dictionary mapping age (int) to annual mortality probability (float)
+    """
     # Read CSV and extract age and survivors data
     df = pd.read_csv(file_path, header=None, skiprows=5)
 
@@ -91,6 +145,79 @@ def load_dst_life_table(file_path: str = None) -> Dict[int, float]:
     return mortality_by_age
 
 
+@lru_cache(maxsize=64)
+def discount_factors(discount_rate: float, n_cycles: int) -> np.ndarray:
+    """
+    Discount factor 1 / (1 + r)^t for cycles 0..n_cycles (cached, read-only).
+
+    Args:
+        discount_rate: Annual discount rate
+        n_cycles: Number of model cycles
+
+    Returns:
+        Array of length n_cycles + 1
+    """
+    factors = 1 / (1 + discount_rate) ** np.arange(n_cycles + 1)
+    factors.flags.writeable = False
+    return factors
+
+
+# Health states in model order
+HEALTH_STATES = ['Normal', 'CKD2', 'CKD3a', 'CKD3b', 'CKD4', 'ESKD', 'Death']
+
+# Fixed-width per-patient record written by the Monte Carlo validation
+# (eskd_age is -1 if ESKD was not reached; final_state indexes HEALTH_STATES)
+PATIENT_RECORD_DTYPE = np.dtype([
+    ('death_age', np.int16),
+    ('eskd_age', np.int16),
+    ('final_state', np.int8),
+])
+
+
+def _percentile_from_counts(values: np.ndarray, counts: np.ndarray, q: float) -> float:
+    """
+    Percentile of data summarized as sorted values with counts.
+
+    Matches np.percentile (linear interpolation) on the expanded data, so
+    exact percentiles can be computed from mergeable histograms.
+
+    Args:
+        values: Sorted distinct values
+        counts: Number of observations of each value
+        q: Percentile (0-100)
+
+    Returns:
+        Percentile value
+    """
+    cumulative = np.cumsum(counts)
+    position = q / 100 * (cumulative[-1] - 1)
+    lower, upper = int(np.floor(position)), int(np.ceil(position))
+    lower_value = values[np.searchsorted(cumulative, lower, side='right')]
+    upper_value = values[np.searchsorted(cumulative, upper, side='right')]
+    return lower_value + (position - lower) * (upper_value - lower_value)
+
+
+def build_background_mortality_array(background_mortality: Dict[int, float]) -> np.ndarray:
+    """
+    Expand a life table into a dense array of mortality indexed by integer age.
+
+    Applies the same rules as MarkovCohortModel.calculate_mortality_rate once,
+    up front: ages below the youngest tabulated age take its value, ages
+    between tabulated ages are linearly interpolated. The last entry is the
+    oldest tabulated age; callers clip older ages to it.
+
+    Args:
+        background_mortality: Dictionary mapping age (int) to annual mortality probability
+
+    Returns:
+        Array of length max_age + 1 where element a is mortality at age a
+    """
+    table_ages = np.array(sorted(background_mortality), dtype=float)
+    table_mortality = np.array([background_mortality[a] for a in sorted(background_mortality)])
+    ages = np.arange(int(table_ages[-1]) + 1)
+    return np.interp(ages, table_ages, table_mortality)
+
+
 @dataclass
 class ModelParameters:
     """Container for all model parameters with defaults."""
@@ -215,8 +342,260 @@ class ModelParameters:
         # Death always has utility 0
         self.utilities['Death'] = 0.00
 
-        # Load Danish life table for background mortality
+        # Load Danish life table for background mortality (cached after first load)
         self.background_mortality = load_dst_life_table()
+        self._background_mortality_by_age = load_dst_life_table(as_array=True)
+        self._mortality_source = self.background_mortality
+
+    @property
+    def background_mortality_by_age(self) -> np.ndarray:
+        """
+        Dense background mortality array indexed by integer age.
+
+        Built once from background_mortality and rebuilt only if that
+        dictionary is reassigned.
+        """
+        if getattr(self, '_mortality_source', None) is not self.background_mortality:
+            self._background_mortality_by_age = build_background_mortality_array(
+                self.background_mortality
+            )
+            self._mortality_source = self.background_mortality
+        return self._background_mortality_by_age
+
+    @property
+    def mortality_matrix(self) -> np.ndarray:
+        """
+        Capped state-specific mortality probabilities by age.
+
+        Row a is age a (as in background_mortality_by_age), columns follow
+        HEALTH_STATES: min(background × RR_state, 1), with 0 for Death.
+        """
+        relative_risks = np.array([
+            self.ckd_relative_risks.get(state, 1.0) for state in HEALTH_STATES
+        ])
+        matrix = np.minimum(self.background_mortality_by_age[:, None] * relative_risks, 1.0)
+        matrix[:, HEALTH_STATES.index('Death')] = 0.0
+        return matrix
+
+    def get_parameter(self, path: str) -> Any:
+        """
+        Value of a parameter given as a dotted path.
+
+        Args:
+            path: e.g. 'discount_rate', 'annual_costs.ESKD' or
+                  'caregiver_params.num_caregivers'
+
+        Returns:
+            Parameter value
+        """
+        container = self
+        for part in path.split('.'):
+            container = _get_member(container, part, path)
+        return container
+
+    def with_overrides(self, overrides: Dict[str, Any]) -> 'ModelParameters':
+        """
+        Copy of these parameters with values replaced at dotted paths.
+
+        The copy is shallow: only the dictionaries and nested dataclasses on
+        an overridden path are copied, so unchanged data (including the life
+        table) is shared and nothing is reloaded. Paths and value types are
+        validated against the dataclass fields. Overriding base_utilities or
+        lowe_utility_multiplier recomputes utilities as in __post_init__;
+        explicit 'utilities.<state>' overrides are applied after that.
+
+        Args:
+            overrides: Mapping of dotted path to new value, e.g.
+                       {'annual_costs.ESKD': 180000, 'ckd_relative_risks.CKD4': 10.0}
+
+        Returns:
+            New parameters object of the same class
+
+        Raises:
+            ValueError: If a path does not name an existing parameter
+            TypeError: If a value has the wrong type for its parameter
+        """
+        params = copy.copy(self)
+        copied = {id(params)}
+
+        utility_overrides = {p: v for p, v in overrides.items() if p.startswith('utilities.')}
+        for path, value in overrides.items():
+            if path not in utility_overrides:
+                _set_parameter(params, path, value, copied)
+
+        if any(p.split('.')[0] in ('base_utilities', 'lowe_utility_multiplier') for p in overrides):
+            params.utilities = {
+                state: base_util * params.lowe_utility_multiplier
+                for state, base_util in params.base_utilities.items()
+            }
+            params.utilities['Death'] = 0.00
+            copied.add(id(params.utilities))
+
+        for path, value in utility_overrides.items():
+            _set_parameter(params, path, value, copied)
+
+        return params
+
+
+def _get_member(container: Any, name: str, path: str) -> Any:
+    """One step of a dotted parameter path (dataclass field or dictionary key)."""
+    if isinstance(container, dict):
+        if name not in container:
+            raise ValueError(f"Unknown parameter '{path}': no key '{name}'")
+        return container[name]
+    if is_dataclass(container) and name in {f.name for f in fields(container)}:
+        return getattr(container, name)
+    raise ValueError(f"Unknown parameter '{path}': no field '{name}'")
+
+
+def _set_parameter(params: Any, path: str, value: Any, copied: set):
+    """
+    Set a dotted-path parameter, copying containers on the path that are still shared.
+
+    Args:
+        params: Parameters object (already copied)
+        path: Dotted parameter path
+        value: New value
+        copied: ids of objects already private to params
+    """
+    parts = path.split('.')
+    container = params
+    for part in parts[:-1]:
+        member = _get_member(container, part, path)
+        if not (isinstance(member, dict) or is_dataclass(member)):
+            raise ValueError(f"Unknown parameter '{path}': '{part}' has no members")
+        if id(member) not in copied:
+            member = dict(member) if isinstance(member, dict) else copy.copy(member)
+            copied.add(id(member))
+            if isinstance(container, dict):
+                container[part] = member
+            else:
+                setattr(container, part, member)
+        container = member
+
+    name = parts[-1]
+    current = _get_member(container, name, path)
+
+    # Expected type: dataclass field annotation (dictionary entries: any number
+    # replaces a number), else the type of the current value
+    expected = None
+    if not isinstance(container, dict):
+        expected = next(f.type for f in fields(container) if f.name == name)
+
+    if expected is bool or isinstance(current, bool):
+        valid = isinstance(value, (bool, np.bool_))
+    elif expected is int:
+        valid = isinstance(value, numbers.Integral) and not isinstance(value, bool)
+    elif expected is float or isinstance(current, numbers.Real):
+        valid = isinstance(value, numbers.Real) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, type(current))
+    if not valid:
+        raise TypeError(f"Invalid value for '{path}': {value!r}")
+
+    if isinstance(container, dict):
+        container[name] = value
+    else:
+        setattr(container, name, value)
+
+
+class ParameterDraws:
+    """
+    Lightweight view of N sampled parameter sets in batched-engine layout.
+
+    Holds one row per draw (state-indexed columns in HEALTH_STATES order)
+    instead of N ModelParameters objects. Indexing returns the same view
+    for a subset of rows, ready for MarkovCohortModel.run_model_batch.
+    """
+
+    __slots__ = (
+        'utilities',
+        'annual_costs',
+        'relative_risks',
+        'discount_rates',
+        'natural_decline_rates',
+    )
+
+    def __init__(
+        self,
+        utilities: np.ndarray,
+        annual_costs: np.ndarray,
+        relative_risks: np.ndarray,
+        discount_rates: np.ndarray,
+        natural_decline_rates: np.ndarray
+    ):
+        """
+        Args:
+            utilities: Health state utilities, shape (N, n_states)
+            annual_costs: Annual costs by state, shape (N, n_states)
+            relative_risks: Mortality relative risks by state, shape (N, n_states)
+            discount_rates: Annual discount rates, shape (N,)
+            natural_decline_rates: Early/middle/late natural decline rates, shape (N, 3)
+        """
+        self.utilities = utilities
+        self.annual_costs = annual_costs
+        self.relative_risks = relative_risks
+        self.discount_rates = discount_rates
+        self.natural_decline_rates = natural_decline_rates
+
+    @classmethod
+    def from_inputs(cls, inputs, params: ModelParameters) -> 'ParameterDraws':
+        """
+        Build draws from columns of sampled values keyed by parameter path.
+
+        Recognized paths are 'base_utilities.<state>' (before the Lowe
+        multiplier), 'annual_costs.<state>', 'ckd_relative_risks.<state>',
+        'discount_rate' and 'decline_rate_early/middle/late'. Parameters
+        without a column take their value from params.
+
+        Args:
+            inputs: Mapping (dict or DataFrame) of path to (N,) array
+            params: Parameters supplying non-sampled values
+
+        Returns:
+            ParameterDraws with N rows
+        """
+        n_draws = len(inputs[next(iter(inputs))])
+
+        def column(path, default):
+            if path in inputs:
+                return np.asarray(inputs[path], dtype=float)
+            return np.full(n_draws, float(default))
+
+        utilities = np.column_stack([
+            column(f'base_utilities.{s}', params.base_utilities[s]) * params.lowe_utility_multiplier
+            if s != 'Death' else np.zeros(n_draws)
+            for s in HEALTH_STATES
+        ])
+        annual_costs = np.column_stack([
+            column(f'annual_costs.{s}', params.annual_costs[s]) for s in HEALTH_STATES
+        ])
+        relative_risks = np.column_stack([
+            column(f'ckd_relative_risks.{s}', params.ckd_relative_risks.get(s, 1.0))
+            for s in HEALTH_STATES
+        ])
+        natural_decline_rates = np.column_stack([
+            column('decline_rate_early', params.decline_rate_early),
+            column('decline_rate_middle', params.decline_rate_middle),
+            column('decline_rate_late', params.decline_rate_late),
+        ])
+        discount_rates = column('discount_rate', params.discount_rate)
+
+        return cls(utilities, annual_costs, relative_risks, discount_rates, natural_decline_rates)
+
+    def __len__(self) -> int:
+        return len(self.discount_rates)
+
+    def __getitem__(self, rows) -> 'ParameterDraws':
+        if isinstance(rows, (int, np.integer)):
+            rows = slice(rows, rows + 1)
+        return ParameterDraws(
+            self.utilities[rows],
+            self.annual_costs[rows],
+            self.relative_risks[rows],
+            self.discount_rates[rows],
+            self.natural_decline_rates[rows]
+        )
 
 
 class MarkovCohortModel:
@@ -235,7 +614,7 @@ class MarkovCohortModel:
             params: ModelParameters object with all model inputs
         """
         self.params = params
-        self.states = ['Normal', 'CKD2', 'CKD3a', 'CKD3b', 'CKD4', 'ESKD', 'Death']
+        self.states = list(HEALTH_STATES)
         self.n_states = len(self.states)
         self.n_cycles = params.time_horizon_years
 
@@ -310,6 +689,67 @@ class MarkovCohortModel:
 
             return treated_rate
 
+    def get_decline_rates(
+        self,
+        ages: np.ndarray,
+        base_decline: np.ndarray,
+        natural_rates: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        Vectorized get_decline_rate over ages and (optionally) many decline settings.
+
+        Applies the same age bands, natural-history detection and θ mapping as
+        get_decline_rate, broadcasting base_decline (N,) against ages (T,).
+
+        Args:
+            ages: Ages at which to evaluate the decline rate, shape (T,)
+            base_decline: Treatment effect parameter(s), scalar or shape (N,)
+            natural_rates: Optional (N, 3) array of early/middle/late natural
+                decline rates (one row per parameter set). Defaults to params.
+
+        Returns:
+            Array of decline rates with shape (N, T) (or (T,) for scalar base_decline)
+        """
+        ages = np.asarray(ages)
+        base = np.asarray(base_decline, dtype=float)
+        scalar_input = base.ndim == 0
+        base = np.atleast_1d(base)[:, None]
+
+        if natural_rates is None:
+            natural_rates = np.array([[
+                self.params.decline_rate_early,
+                self.params.decline_rate_middle,
+                self.params.decline_rate_late,
+            ]])
+        natural_rates = np.asarray(natural_rates, dtype=float).reshape(-1, 3)
+
+        # Natural rate for each age band
+        band = np.where(
+            ages < self.params.decline_transition_age_1, 0,
+            np.where(ages < self.params.decline_transition_age_2, 1, 2)
+        )
+        natural_rate = natural_rates[:, band]
+
+        # Treatment scenario: D_treated = D_age + (1-θ)×D_path
+        D_age = 0.3
+        D_path = natural_rate - D_age
+        theta = np.select(
+            [
+                np.abs(base - 0.30) < 0.05,
+                np.abs(base - 0.52) < 0.05,
+                np.abs(base - 0.74) < 0.05,
+                np.abs(base - 1.04) < 0.05,
+            ],
+            [1.00, 0.85, 0.70, 0.50],
+            (self.params.natural_decline_rate - base) / self.params.natural_decline_rate
+        )
+        treated_rate = D_age + (1 - theta) * D_path
+
+        is_natural_history = np.abs(base - self.params.natural_decline_rate) < 0.01
+        rates = np.where(is_natural_history, natural_rate, treated_rate)
+
+        return rates[0] if scalar_input else rates
+
     def egfr_to_state(self, egfr: float) -> str:
         """
         Convert eGFR value to CKD health state.
@@ -333,6 +773,33 @@ class MarkovCohortModel:
 
         return 'ESKD'  # Default to ESKD if no match
 
+    def egfr_to_state_index(self, egfr) -> np.ndarray:
+        """
+        Vectorized version of egfr_to_state returning state indices.
+
+        Applies the same rules as egfr_to_state (first matching threshold band,
+        ≥90 falls back to Normal, anything else to ESKD) to an array of eGFR values.
+
+        Args:
+            egfr: eGFR value(s) in ml/min/1.73m²
+
+        Returns:
+            Integer array of indices into self.states
+        """
+        egfr = np.asarray(egfr, dtype=float)
+        normal_idx = self.states.index('Normal')
+        eskd_idx = self.states.index('ESKD')
+
+        conditions = [
+            (egfr >= lower) & (egfr < upper)
+            for lower, upper in self.params.ckd_thresholds.values()
+        ]
+        choices = [self.states.index(state) for state in self.params.ckd_thresholds]
+        default = np.where(egfr >= 90, normal_idx, eskd_idx)
+
+        state_idx = np.select(conditions, choices, default)
+        return np.where(egfr < 0, eskd_idx, state_idx)
+
     def calculate_transition_probability(
         self,
         current_state: str,
@@ -384,6 +851,26 @@ class MarkovCohortModel:
             # No transition to this state
             return 0.0
 
+    def background_mortality_rate(self, age: int) -> float:
+        """
+        Look up background (general population) mortality for one age.
+
+        Ages below/above the life table use the youngest/oldest tabulated value;
+        ages missing inside the table are linearly interpolated. Both rules are
+        precomputed in ModelParameters.background_mortality_by_age.
+
+        Args:
+            age: Current age
+
+        Returns:
+            Annual background mortality probability
+        """
+        table = self.params.background_mortality_by_age
+        if float(age).is_integer():
+            return table[min(max(int(age), 0), len(table) - 1)]
+        # Fractional ages: interpolate on the dense grid (clamped at both ends)
+        return float(np.interp(age, np.arange(len(table)), table))
+
     def calculate_mortality_rate(self, state: str, age: int) -> float:
         """
         Calculate age and state-specific mortality rate using:
@@ -412,26 +899,7 @@ class MarkovCohortModel:
         if state == 'Death':
             return 0.0
 
-        # Get background mortality from life table
-        # If age not in table, use nearest age or extrapolate
-        if age in self.params.background_mortality:
-            background_mort = self.params.background_mortality[age]
-        elif age < min(self.params.background_mortality.keys()):
-            # Use youngest age in table
-            background_mort = self.params.background_mortality[min(self.params.background_mortality.keys())]
-        elif age > max(self.params.background_mortality.keys()):
-            # Use oldest age in table (typically ~100% mortality)
-            background_mort = self.params.background_mortality[max(self.params.background_mortality.keys())]
-        else:
-            # Linear interpolation for missing ages
-            ages = sorted(self.params.background_mortality.keys())
-            lower_age = max([a for a in ages if a < age])
-            upper_age = min([a for a in ages if a > age])
-            lower_mort = self.params.background_mortality[lower_age]
-            upper_mort = self.params.background_mortality[upper_age]
-            # Interpolate
-            weight = (age - lower_age) / (upper_age - lower_age)
-            background_mort = lower_mort + weight * (upper_mort - lower_mort)
+        background_mort = self.background_mortality_rate(age)
 
         # Get CKD-related relative risk for this health state
         relative_risk = self.params.ckd_relative_risks.get(state, 1.0)
@@ -443,6 +911,26 @@ class MarkovCohortModel:
         # Cap at 1.0 (100% mortality)
         return min(total_mortality, 1.0)
 
+    def state_mortality_vector(self, age: int) -> np.ndarray:
+        """
+        Annual mortality probability for every health state at one age.
+
+        Equivalent to calling calculate_mortality_rate for each state in
+        self.states, but with a single life-table lookup.
+
+        Args:
+            age: Current age
+
+        Returns:
+            Array of length n_states (Death entry is 0)
+        """
+        relative_risks = np.array([
+            self.params.ckd_relative_risks.get(state, 1.0) for state in self.states
+        ])
+        mortality = np.minimum(self.background_mortality_rate(age) * relative_risks, 1.0)
+        mortality[self.states.index('Death')] = 0.0
+        return mortality
+
     def build_transition_matrix(
         self,
         egfr_decline: float,
@@ -452,6 +940,10 @@ class MarkovCohortModel:
         """
         Build transition probability matrix for one cycle.
 
+        The whole matrix is assembled from the per-state mortality vector and
+        the predicted next CKD state in one pass; results are identical to
+        evaluating calculate_transition_probability for every cell.
+
         Args:
             egfr_decline: Annual eGFR decline rate
             age: Current age
@@ -460,30 +952,50 @@ class MarkovCohortModel:
         Returns:
             Transition matrix (n_states x n_states)
         """
-        matrix = np.zeros((self.n_states, self.n_states))
-
         # Use cohort eGFR for all state transitions
         # If not provided, use midpoint of each state's range
         if cohort_egfr is None:
             # Fallback: use state midpoints (shouldn't happen with new logic)
-            for i, from_state in enumerate(self.states):
-                if from_state == 'Death':
-                    current_egfr = 0
-                else:
-                    lower, upper = self.params.ckd_thresholds[from_state]
-                    current_egfr = (lower + upper) / 2
-
-                for j, to_state in enumerate(self.states):
-                    matrix[i, j] = self.calculate_transition_probability(
-                        from_state, to_state, egfr_decline, current_egfr, age
-                    )
+            current_egfr = np.array([
+                0 if state == 'Death' else sum(self.params.ckd_thresholds[state]) / 2
+                for state in self.states
+            ], dtype=float)
         else:
             # Use cohort eGFR for all transitions (correct approach)
-            for i, from_state in enumerate(self.states):
-                for j, to_state in enumerate(self.states):
-                    matrix[i, j] = self.calculate_transition_probability(
-                        from_state, to_state, egfr_decline, cohort_egfr, age
-                    )
+            current_egfr = np.full(self.n_states, cohort_egfr, dtype=float)
+
+        # Predicted CKD state after one year of decline, for every origin state
+        next_egfr = np.maximum(0, current_egfr - egfr_decline)
+        predicted_idx = self.egfr_to_state_index(next_egfr)
+
+        return self.transition_matrix_from_prediction(predicted_idx, age)
+
+    def transition_matrix_from_prediction(
+        self,
+        predicted_idx: np.ndarray,
+        age: int
+    ) -> np.ndarray:
+        """
+        Assemble the transition matrix from predicted next-state indices.
+
+        Args:
+            predicted_idx: Predicted next state index for each origin state (n_states,)
+            age: Current age
+
+        Returns:
+            Transition matrix (n_states x n_states)
+        """
+        matrix = np.zeros((self.n_states, self.n_states))
+        death_idx = self.states.index('Death')
+        mortality = self.state_mortality_vector(age)
+
+        # Alive states: survive into the predicted state or die
+        alive_rows = np.flatnonzero(np.arange(self.n_states) != death_idx)
+        matrix[alive_rows, predicted_idx[alive_rows]] = 1.0 - mortality[alive_rows]
+        matrix[alive_rows, death_idx] = mortality[alive_rows]
+
+        # Death is absorbing
+        matrix[death_idx, death_idx] = 1.0
 
         # Normalize rows to sum to 1 (accounting for rounding errors)
         row_sums = matrix.sum(axis=1, keepdims=True)
@@ -491,6 +1003,84 @@ class MarkovCohortModel:
 
         return matrix
 
+    def cohort_egfr_trajectory(
+        self,
+        egfr_decline_rate,
+        treatment_waning: bool = False,
+        waning_start_year: int = 10,
+        waning_decline_rate: float = None,
+        natural_decline_rates: np.ndarray = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Precompute the cohort eGFR path and predicted CKD state for every cycle.
+
+        The eGFR path depends only on the starting eGFR, age, decline
+        parameters and waning settings, not on the state trace, so it is
+        computed in one vectorized pass: age-banded decline rates are
+        accumulated with np.subtract.accumulate (same operation order as the
+        cycle-by-cycle update) and floored at 0.
+
+        Accepts a scalar decline rate, or an (N,) array together with optional
+        (N, 3) natural decline rates to compute N trajectories at once.
+
+        Args:
+            egfr_decline_rate: Annual eGFR decline rate(s) (ml/min/1.73m²/year)
+            treatment_waning: Whether treatment effect wanes over time
+            waning_start_year: Year when waning begins (default: 10)
+            waning_decline_rate: Decline rate after waning (if None, use natural history)
+            natural_decline_rates: Optional early/middle/late natural rates, shape (N, 3)
+
+        Returns:
+            Dictionary of arrays with n_cycles + 1 entries along the last axis
+            (index 0 is the starting point):
+            - 'egfr_track': cohort eGFR at the end of each cycle
+            - 'decline_rates': eGFR decline applied in each cycle (0 at cycle 0)
+            - 'predicted_state_idx': CKD state predicted for transitions in each
+              cycle (index of the starting state at cycle 0)
+        """
+        cycles = np.arange(1, self.n_cycles + 1)
+        ages = self.params.starting_age + cycles
+        decline = self.get_decline_rates(ages, egfr_decline_rate, natural_decline_rates)
+
+        if treatment_waning:
+            # GRADUAL waning over 10 years from waning_start_year
+            waning_duration = 10
+            if waning_decline_rate is None:
+                waning_rate = self.params.natural_decline_rate
+            else:
+                waning_rate = waning_decline_rate
+            final = self.get_decline_rates(
+                ages, np.full(np.shape(egfr_decline_rate), waning_rate), natural_decline_rates
+            )
+            waning_fraction = (cycles - waning_start_year) / waning_duration
+            decline = np.where(
+                cycles < waning_start_year, decline,
+                np.where(waning_fraction >= 1, final, decline + waning_fraction * (final - decline))
+            )
+
+        # Prepend cycle 0 (no decline) and accumulate in cycle order
+        decline = np.concatenate([np.zeros(decline.shape[:-1] + (1,)), decline], axis=-1)
+        start = np.full(decline.shape[:-1] + (1,), float(self.params.starting_egfr))
+        if np.all(decline >= 0):
+            egfr_track = np.maximum(
+                0, np.subtract.accumulate(np.concatenate([start, decline[..., 1:]], axis=-1), axis=-1)
+            )
+        else:
+            # Negative decline (eGFR gain) after hitting 0: floor cycle by cycle
+            egfr_track = np.repeat(start, self.n_cycles + 1, axis=-1)
+            for cycle in cycles:
+                egfr_track[..., cycle] = np.maximum(0, egfr_track[..., cycle - 1] - decline[..., cycle])
+
+        # Transitions in each cycle use the state one more year of decline ahead
+        predicted_state_idx = self.egfr_to_state_index(np.maximum(0, egfr_track - decline))
+        predicted_state_idx[..., 0] = self.states.index(self.egfr_to_state(self.params.starting_egfr))
+
+        return {
+            'egfr_track': egfr_track,
+            'decline_rates': decline,
+            'predicted_state_idx': predicted_state_idx,
+        }
+
     def run_model(
         self,
         egfr_decline_rate: float,
@@ -517,246 +1107,392 @@ class MarkovCohortModel:
         # Initialize cohort trace matrix
         trace = np.zeros((self.n_cycles + 1, self.n_states))
 
-        # Starting distribution - all in initial state based on starting eGFR
-        initial_state = self.egfr_to_state(self.params.starting_egfr)
-        initial_state_idx = self.states.index(initial_state)
-        trace[0, initial_state_idx] = 1.0
-
         # Track eGFR over time for the cohort
-        # Use single continuous eGFR that declines smoothly (no resets)
-        egfr_track = np.zeros(self.n_cycles + 1)
-        egfr_track[0] = self.params.starting_egfr
+        # Single continuous eGFR that declines smoothly (no resets), precomputed
+        trajectory = self.cohort_egfr_trajectory(
+            egfr_decline_rate,
+            treatment_waning=treatment_waning,
+            waning_start_year=waning_start_year,
+            waning_decline_rate=waning_decline_rate
+        )
+        egfr_track = trajectory['egfr_track']
+        predicted_state_idx = trajectory['predicted_state_idx']
 
-        # Single cohort eGFR (not per-state tracking)
-        cohort_egfr = self.params.starting_egfr
+        # Starting distribution - all in initial state based on starting eGFR
+        trace[0, predicted_state_idx[0]] = 1.0
 
         for cycle in range(1, self.n_cycles + 1):
             age = self.params.starting_age + cycle
 
-            # Get age-dependent decline rate for this cycle
-            # Check if treatment waning applies (GRADUAL waning over time)
-            if treatment_waning and cycle >= waning_start_year:
-                # GRADUAL waning: linear interpolation from full effect to reduced effect
-                # Waning occurs over 10 years (years 10-20)
-                waning_duration = 10  # years over which waning occurs
-                years_since_waning_start = cycle - waning_start_year
-
-                if years_since_waning_start >= waning_duration:
-                    # Fully waned - use final waning rate
-                    if waning_decline_rate is None:
-                        waning_rate = self.params.natural_decline_rate
-                    else:
-                        waning_rate = waning_decline_rate
-                    current_decline_rate = self.get_decline_rate(age, waning_rate)
-                else:
-                    # Gradual waning - interpolate between initial and final rates
-                    waning_fraction = years_since_waning_start / waning_duration
-
-                    # Get initial rate (full treatment effect)
-                    initial_rate = self.get_decline_rate(age, egfr_decline_rate)
-
-                    # Get final waning rate
-                    if waning_decline_rate is None:
-                        waning_rate = self.params.natural_decline_rate
-                    else:
-                        waning_rate = waning_decline_rate
-                    final_rate = self.get_decline_rate(age, waning_rate)
-
-                    # Linear interpolation
-                    current_decline_rate = initial_rate + waning_fraction * (final_rate - initial_rate)
-            else:
-                # Before waning or no waning scenario
-                current_decline_rate = self.get_decline_rate(age, egfr_decline_rate)
-
-            # Decline cohort eGFR continuously (no resets!)
-            cohort_egfr = max(0, cohort_egfr - current_decline_rate)
-            egfr_track[cycle] = cohort_egfr
-
-            # Build transition matrix using current cohort eGFR for all states
+            # Transition matrix from the cohort eGFR for all states
             # This ensures state transitions are based on actual declining eGFR
-            trans_matrix = self.build_transition_matrix(
-                current_decline_rate,
-                age,
-                cohort_egfr  # Pass single eGFR value, not dict
+            trans_matrix = self.transition_matrix_from_prediction(
+                np.full(self.n_states, predicted_state_idx[cycle]),
+                age
             )
 
             # Apply transitions
             trace[cycle, :] = trace[cycle - 1, :] @ trans_matrix
 
-        # Calculate costs and QALYs for each cycle
-        costs_by_cycle = np.zeros(self.n_cycles + 1)
-        qalys_by_cycle = np.zeros(self.n_cycles + 1)
+        # Store results
+        results = {
+            'scenario': scenario_name,
+            'egfr_decline_rate': egfr_decline_rate,
+            **self.outcomes_from_trace(trace, include_gene_therapy_cost),
+            'trace': trace,
+            'egfr_track': egfr_track
+        }
+
+        return results
 
-        for cycle in range(self.n_cycles + 1):
-            # State-based costs and utilities
-            for state_idx, state in enumerate(self.states):
-                proportion = trace[cycle, state_idx]
-                costs_by_cycle[cycle] += proportion * self.params.annual_costs[state]
-                qalys_by_cycle[cycle] += proportion * self.params.utilities[state]
+    def outcomes_from_trace(
+        self,
+        trace: np.ndarray,
+        include_gene_therapy_cost: bool = False,
+        discount_rate: float = None
+    ) -> Dict:
+        """
+        Calculate costs, QALYs, life-years and time to ESKD from a cohort trace.
 
-        # Add gene therapy costs if applicable
-        if include_gene_therapy_cost:
-            # One-time gene therapy cost at cycle 0
-            costs_by_cycle[0] += self.params.gene_therapy_cost
-
-            # Monitoring costs
-            for cycle in range(min(6, self.n_cycles + 1)):
-                if cycle == 0:
-                    costs_by_cycle[cycle] += self.params.monitoring_year1
-                elif cycle <= 4:
-                    costs_by_cycle[cycle] += self.params.monitoring_year2_5
-                else:
-                    costs_by_cycle[cycle] += self.params.monitoring_ongoing
-
-            # Ongoing monitoring for remaining cycles
-            for cycle in range(6, self.n_cycles + 1):
-                costs_by_cycle[cycle] += self.params.monitoring_ongoing
+        Rewards are applied as state vectors (trace @ costs, trace @ utilities)
+        and discounted with a cached discount vector, so saved traces can be
+        re-evaluated (e.g. with different costs or discount rates) without
+        rerunning the model. Leading dimensions are supported, e.g. a stack
+        of traces with shape (N, n_cycles + 1, n_states).
 
-        # Apply discounting
-        discount_factors = np.array([
-            1 / (1 + self.params.discount_rate) ** cycle
-            for cycle in range(self.n_cycles + 1)
-        ])
+        Args:
+            trace: Cohort distribution over time, shape (..., n_cycles + 1, n_states)
+            include_gene_therapy_cost: Whether to include gene therapy costs
+            discount_rate: Annual discount rate (default: params.discount_rate)
+
+        Returns:
+            Dictionary with total and per-cycle costs and QALYs (discounted and
+            undiscounted), life_years and time_to_eskd
+        """
+        if discount_rate is None:
+            discount_rate = self.params.discount_rate
+        n_cycles = trace.shape[-2] - 1
 
-        discounted_costs = costs_by_cycle * discount_factors
-        discounted_qalys = qalys_by_cycle * discount_factors
+        cost_vector = np.array([self.params.annual_costs[state] for state in self.states], dtype=float)
+        utility_vector = np.array([self.params.utilities[state] for state in self.states], dtype=float)
 
-        # Calculate time to ESKD
-        eskd_idx = self.states.index('ESKD')
-        time_to_eskd = None
-        for cycle in range(self.n_cycles + 1):
-            if trace[cycle, eskd_idx] > 0.5:  # >50% of cohort in ESKD
-                time_to_eskd = cycle
-                break
+        # State-based costs and utilities
+        costs_by_cycle = trace @ cost_vector
+        qalys_by_cycle = trace @ utility_vector
 
-        # Calculate life years
-        death_idx = self.states.index('Death')
-        life_years = 0
-        for cycle in range(self.n_cycles + 1):
-            life_years += (1 - trace[cycle, death_idx])
+        # Add gene therapy and monitoring costs if applicable
+        if include_gene_therapy_cost:
+            costs_by_cycle = costs_by_cycle + self.gene_therapy_costs_by_cycle()[:n_cycles + 1]
 
-        # Store results
-        results = {
-            'scenario': scenario_name,
-            'egfr_decline_rate': egfr_decline_rate,
-            'total_costs': np.sum(discounted_costs),
-            'total_qalys': np.sum(discounted_qalys),
-            'total_costs_undiscounted': np.sum(costs_by_cycle),
-            'total_qalys_undiscounted': np.sum(qalys_by_cycle),
+        # Apply discounting
+        discount = discount_factors(discount_rate, n_cycles)
+        discounted_costs = costs_by_cycle * discount
+        discounted_qalys = qalys_by_cycle * discount
+
+        # Time to ESKD: first cycle with >50% of cohort in ESKD
+        in_eskd = trace[..., self.states.index('ESKD')] > 0.5
+        time_to_eskd = np.where(in_eskd.any(axis=-1), np.argmax(in_eskd, axis=-1), 0)
+        # Never reached (or reached at cycle 0) -> full horizon
+        time_to_eskd = np.where(time_to_eskd > 0, time_to_eskd, n_cycles)
+
+        # Life years
+        life_years = np.sum(1 - trace[..., self.states.index('Death')], axis=-1)
+
+        if trace.ndim == 2:
+            time_to_eskd = int(time_to_eskd)
+            life_years = float(life_years)
+
+        return {
+            'total_costs': np.sum(discounted_costs, axis=-1),
+            'total_qalys': np.sum(discounted_qalys, axis=-1),
+            'total_costs_undiscounted': np.sum(costs_by_cycle, axis=-1),
+            'total_qalys_undiscounted': np.sum(qalys_by_cycle, axis=-1),
             'life_years': life_years,
-            'time_to_eskd': time_to_eskd if time_to_eskd else self.n_cycles,
-            'trace': trace,
+            'time_to_eskd': time_to_eskd,
             'costs_by_cycle': costs_by_cycle,
             'qalys_by_cycle': qalys_by_cycle,
             'discounted_costs_by_cycle': discounted_costs,
             'discounted_qalys_by_cycle': discounted_qalys,
-            'egfr_track': egfr_track
         }
 
-        return results
+    def gene_therapy_costs_by_cycle(self) -> np.ndarray:
+        """
+        One-time gene therapy price plus monitoring costs for each cycle.
 
-    def run_monte_carlo_validation(
+        Returns:
+            Undiscounted cost vector of length n_cycles + 1
+        """
+        costs = np.full(self.n_cycles + 1, float(self.params.monitoring_ongoing))
+        costs[1:5] = self.params.monitoring_year2_5
+        costs[0] = self.params.gene_therapy_cost + self.params.monitoring_year1
+        return costs
+
+    def run_model_batch(
         self,
-        egfr_decline_rate: float,
-        n_simulations: int = 1000,
-        random_seed: int = 42
-    ) -> Dict:
+        egfr_decline_rates: np.ndarray,
+        utilities: np.ndarray = None,
+        annual_costs: np.ndarray = None,
+        relative_risks: np.ndarray = None,
+        discount_rates: np.ndarray = None,
+        natural_decline_rates: np.ndarray = None,
+        include_gene_therapy_cost: bool = False,
+        draws: ParameterDraws = None
+    ) -> Dict[str, np.ndarray]:
         """
-        Run Monte Carlo simulation of individual patients to validate cohort model.
+        Run the Markov model for N parameter sets in one array pass.
+
+        All N cohorts are advanced together as an (N, n_states) trace using
+        per-draw transition matrices, giving the same outcomes as N separate
+        run_model calls (without treatment waning). Parameters not supplied
+        are taken from draws if given, otherwise from self.params for every draw.
+
+        State-indexed arrays have one column per entry of self.states (the
+        Death column of relative_risks is ignored).
 
         Args:
-            egfr_decline_rate: Annual eGFR decline rate for natural history
-            n_simulations: Number of patient simulations to run
-            random_seed: Random seed for reproducibility
+            egfr_decline_rates: Decline rate passed to run_model, shape (N,)
+            utilities: Health state utilities, shape (N, n_states)
+            annual_costs: Annual costs by state, shape (N, n_states)
+            relative_risks: Mortality relative risks by state, shape (N, n_states)
+            discount_rates: Annual discount rates, shape (N,)
+            natural_decline_rates: Early/middle/late natural decline rates, shape (N, 3)
+            include_gene_therapy_cost: Whether to include gene therapy costs
+            draws: Sampled parameter sets supplying any of the arrays above
 
         Returns:
-            Dictionary with validation results including distributions
+            Dictionary of (N,) arrays: total_costs, total_qalys,
+            total_costs_undiscounted, total_qalys_undiscounted, life_years,
+            time_to_eskd
         """
-        np.random.seed(random_seed)
-
-        # Track outcomes for each patient
-        times_to_eskd = []
-        times_to_death = []
-        final_states = []
-        ckd_stage_durations = {state: [] for state in self.states if state != 'Death'}
-
-        for sim in range(n_simulations):
-            # Initialize patient
-            egfr = self.params.starting_egfr
-            age = self.params.starting_age
-            state = self.egfr_to_state(egfr)
-            is_alive = True
-            eskd_age = None
-
-            # Track time in each CKD stage
-            stage_durations = {s: 0 for s in self.states if s != 'Death'}
+        egfr_decline_rates = np.asarray(egfr_decline_rates, dtype=float).ravel()
+        n_draws = egfr_decline_rates.shape[0]
+
+        if draws is not None:
+            utilities = draws.utilities if utilities is None else utilities
+            annual_costs = draws.annual_costs if annual_costs is None else annual_costs
+            relative_risks = draws.relative_risks if relative_risks is None else relative_risks
+            discount_rates = draws.discount_rates if discount_rates is None else discount_rates
+            if natural_decline_rates is None:
+                natural_decline_rates = draws.natural_decline_rates
+
+        def stack(values, default):
+            if values is None:
+                return np.tile(np.asarray(default, dtype=float), (n_draws, 1))
+            return np.asarray(values, dtype=float).reshape(n_draws, -1)
+
+        utilities = stack(utilities, [self.params.utilities[s] for s in self.states])
+        annual_costs = stack(annual_costs, [self.params.annual_costs[s] for s in self.states])
+        relative_risks = stack(
+            relative_risks,
+            [self.params.ckd_relative_risks.get(s, 1.0) for s in self.states]
+        )
+        discount_rates = stack(discount_rates, [self.params.discount_rate])[:, 0]
 
-            # Simulate until death or end of time horizon
-            for year in range(self.n_cycles):
-                age = self.params.starting_age + year + 1
+        death_idx = self.states.index('Death')
+        eskd_idx = self.states.index('ESKD')
+        alive_idx = np.flatnonzero(np.arange(self.n_states) != death_idx)
+        draw_idx = np.arange(n_draws)
+
+        # Per-cycle predicted CKD state for every draw
+        ages = self.params.starting_age + np.arange(1, self.n_cycles + 1)
+        predicted_state_idx = self.cohort_egfr_trajectory(
+            egfr_decline_rates, natural_decline_rates=natural_decline_rates
+        )['predicted_state_idx']
+        background = np.array([self.background_mortality_rate(age) for age in ages])
+
+        gt_costs = (
+            self.gene_therapy_costs_by_cycle() if include_gene_therapy_cost
+            else np.zeros(self.n_cycles + 1)
+        )
 
-                # Apply eGFR decline (age-dependent)
-                decline = self.get_decline_rate(age, egfr_decline_rate)
-                egfr = max(0, egfr - decline)
+        # Starting distribution
+        cohort = np.zeros((n_draws, self.n_states))
+        cohort[:, self.states.index(self.egfr_to_state(self.params.starting_egfr))] = 1.0
 
-                # Update state based on new eGFR
-                new_state = self.egfr_to_state(egfr)
+        costs_undiscounted = np.zeros(n_draws)
+        qalys_undiscounted = np.zeros(n_draws)
+        total_costs = np.zeros(n_draws)
+        total_qalys = np.zeros(n_draws)
+        life_years = np.zeros(n_draws)
+        time_to_eskd = np.full(n_draws, -1)
 
-                # Record ESKD timing
-                if new_state == 'ESKD' and eskd_age is None:
-                    eskd_age = age
+        for cycle in range(self.n_cycles + 1):
+            if cycle > 0:
+                predicted_idx = predicted_state_idx[:, cycle]
+                mortality = np.minimum(background[cycle - 1] * relative_risks, 1.0)
 
-                # Check for death (stochastic)
-                if new_state != 'Death':
-                    mortality_prob = self.calculate_mortality_rate(new_state, age)
-                    if np.random.rand() < mortality_prob:
-                        is_alive = False
-                        times_to_death.append(age)
-                        final_states.append(new_state)
-                        break
+                matrices = np.zeros((n_draws, self.n_states, self.n_states))
+                matrices[draw_idx[:, None], alive_idx[None, :], predicted_idx[:, None]] = (
+                    1.0 - mortality[:, alive_idx]
+                )
+                matrices[:, alive_idx, death_idx] = mortality[:, alive_idx]
+                matrices[:, death_idx, death_idx] = 1.0
+                matrices /= matrices.sum(axis=2, keepdims=True)
+
+                cohort = np.einsum('ni,nij->nj', cohort, matrices)
+
+            cycle_costs = np.einsum('ni,ni->n', cohort, annual_costs) + gt_costs[cycle]
+            cycle_qalys = np.einsum('ni,ni->n', cohort, utilities)
+            discount = 1 / (1 + discount_rates) ** cycle
+
+            costs_undiscounted += cycle_costs
+            qalys_undiscounted += cycle_qalys
+            total_costs += cycle_costs * discount
+            total_qalys += cycle_qalys * discount
+            life_years += 1 - cohort[:, death_idx]
+
+            newly_eskd = (time_to_eskd < 0) & (cohort[:, eskd_idx] > 0.5)
+            time_to_eskd[newly_eskd] = cycle
+
+        # Same convention as run_model: never (or at cycle 0) -> full horizon
+        time_to_eskd[time_to_eskd <= 0] = self.n_cycles
+
+        return {
+            'egfr_decline_rate': egfr_decline_rates,
+            'total_costs': total_costs,
+            'total_qalys': total_qalys,
+            'total_costs_undiscounted': costs_undiscounted,
+            'total_qalys_undiscounted': qalys_undiscounted,
+            'life_years': life_years,
+            'time_to_eskd': time_to_eskd,
+        }
 
-                    # Track time in current state
-                    stage_durations[new_state] += 1
+    def run_monte_carlo_validation(
+        self,
+        egfr_decline_rate: float,
+        n_simulations: int = 1000,
+        random_seed: int = 42,
+        rng: np.random.Generator = None,
+        chunk_size: int = None,
+        output_path: str = None
+    ) -> Dict:
+        """
+        Run Monte Carlo simulation of individual patients to validate cohort model.
 
-                state = new_state
+        All patients are advanced together: each year the surviving patients
+        (boolean alive mask) draw one block of uniforms from a seeded
+        numpy.random.Generator and die if the draw falls below the mortality
+        of their current CKD stage. The eGFR path itself is deterministic and
+        shared by all patients (see cohort_egfr_trajectory).
 
-            # Record outcomes
-            if eskd_age is not None:
-                times_to_eskd.append(eskd_age)
+        Streaming mode (chunk_size and/or output_path given) simulates patients
+        in chunks, writes one fixed-width record per patient (PATIENT_RECORD_DTYPE)
+        to a typed array or a memory-mapped .npy file, and returns the records
+        instead of per-patient lists. Summary statistics are always computed
+        from mergeable per-age and per-stage counts, so they are exact in
+        both modes.
 
-            # If survived entire time horizon
-            if is_alive:
-                times_to_death.append(age)
-                final_states.append(state)
+        Args:
+            egfr_decline_rate: Annual eGFR decline rate for natural history
+            n_simulations: Number of patient simulations to run
+            random_seed: Random seed for reproducibility
+            rng: Optional Generator to draw from (overrides random_seed)
+            chunk_size: Number of patients simulated per chunk (streaming mode)
+            output_path: Optional .npy file for per-patient records (streaming mode)
 
-            # Record stage durations for this patient
-            for s in ckd_stage_durations:
-                ckd_stage_durations[s].append(stage_durations[s])
+        Returns:
+            Dictionary with validation results including distributions
+        """
+        if rng is None:
+            rng = np.random.default_rng(random_seed)
+
+        streaming = chunk_size is not None or output_path is not None
+        if chunk_size is None:
+            chunk_size = n_simulations
+
+        n_years = self.n_cycles
+        starting_age = self.params.starting_age
+        ages = starting_age + np.arange(1, n_years + 1)
+
+        # CKD stage and mortality in each simulated year (same for every patient)
+        egfr_by_year = self.cohort_egfr_trajectory(egfr_decline_rate)['egfr_track'][1:]
+        state_by_year = self.egfr_to_state_index(egfr_by_year)
+        mortality_matrix = self.params.mortality_matrix
+        age_rows = np.clip(ages, 0, mortality_matrix.shape[0] - 1)
+        mortality_by_year = mortality_matrix[age_rows, state_by_year]
+
+        # First year in ESKD (n_years + 1 if never reached)
+        eskd_years = np.flatnonzero(state_by_year == self.states.index('ESKD'))
+        first_eskd_year = eskd_years[0] if eskd_years.size else n_years + 1
+
+        # Years spent in each stage before dying in year d (rows d = 0..n_years)
+        stage_years_before = np.zeros((n_years + 1, self.n_states))
+        stage_years_before[1:] = np.cumsum(np.eye(self.n_states)[state_by_year], axis=0)
+
+        # Per-patient records
+        if output_path is not None:
+            records = np.lib.format.open_memmap(
+                output_path, mode='w+', dtype=PATIENT_RECORD_DTYPE, shape=(n_simulations,)
+            )
+        else:
+            records = np.empty(n_simulations, dtype=PATIENT_RECORD_DTYPE)
+
+        # Mergeable summaries: counts by age (offset from starting age) and by years lived
+        death_age_counts = np.zeros(n_years + 1, dtype=np.int64)
+        eskd_age_counts = np.zeros(n_years + 1, dtype=np.int64)
+        years_lived_counts = np.zeros(n_years + 1, dtype=np.int64)
+
+        for chunk_start in range(0, n_simulations, chunk_size):
+            n_chunk = min(chunk_size, n_simulations - chunk_start)
+
+            # Year of death for each patient (n_years = survived the time horizon)
+            death_year = np.full(n_chunk, n_years)
+            alive = np.ones(n_chunk, dtype=bool)
+            for year in range(n_years):
+                n_alive = np.count_nonzero(alive)
+                if n_alive == 0:
+                    break
+                dies = rng.random(n_alive) < mortality_by_year[year]
+                alive_idx = np.flatnonzero(alive)
+                death_year[alive_idx[dies]] = year
+                alive[alive_idx[dies]] = False
+
+            # Age at death (or at end of time horizon) and final CKD stage
+            death_age_offset = np.minimum(death_year + 1, n_years)
+            # ESKD is recorded if the patient is alive at the start of the first ESKD year
+            reached_eskd = death_year >= first_eskd_year
+
+            chunk = records[chunk_start:chunk_start + n_chunk]
+            chunk['death_age'] = starting_age + death_age_offset
+            chunk['eskd_age'] = np.where(reached_eskd, starting_age + first_eskd_year + 1, -1)
+            chunk['final_state'] = state_by_year[np.minimum(death_year, n_years - 1)]
+
+            death_age_counts += np.bincount(death_age_offset, minlength=n_years + 1)
+            if reached_eskd.any():
+                eskd_age_counts[first_eskd_year + 1] += np.count_nonzero(reached_eskd)
+            years_lived_counts += np.bincount(death_year, minlength=n_years + 1)
+
+        if output_path is not None:
+            records.flush()
+
+        age_values = starting_age + np.arange(n_years + 1)
+        n_eskd = eskd_age_counts.sum()
 
         # Calculate summary statistics
-        eskd_reached_pct = 100 * len(times_to_eskd) / n_simulations
-        median_eskd = np.median(times_to_eskd) if times_to_eskd else None
-        median_death = np.median(times_to_death)
-        mean_death = np.mean(times_to_death)
+        eskd_reached_pct = 100 * n_eskd / n_simulations
+        median_eskd = _percentile_from_counts(age_values, eskd_age_counts, 50) if n_eskd else None
+        median_death = _percentile_from_counts(age_values, death_age_counts, 50)
+        mean_death = age_values @ death_age_counts / n_simulations
 
         # Calculate percentiles
         eskd_percentiles = {
-            '25th': np.percentile(times_to_eskd, 25) if times_to_eskd else None,
+            '25th': _percentile_from_counts(age_values, eskd_age_counts, 25) if n_eskd else None,
             '50th': median_eskd,
-            '75th': np.percentile(times_to_eskd, 75) if times_to_eskd else None,
+            '75th': _percentile_from_counts(age_values, eskd_age_counts, 75) if n_eskd else None,
         }
 
         death_percentiles = {
-            '25th': np.percentile(times_to_death, 25),
+            '25th': _percentile_from_counts(age_values, death_age_counts, 25),
             '50th': median_death,
-            '75th': np.percentile(times_to_death, 75),
+            '75th': _percentile_from_counts(age_values, death_age_counts, 75),
         }
 
         # Calculate proportion of patients in each CKD stage (average across time)
-        avg_stage_proportions = {}
-        for stage in ckd_stage_durations:
-            durations = ckd_stage_durations[stage]
-            avg_stage_proportions[stage] = np.mean(durations) / self.n_cycles if durations else 0
+        mean_stage_years = years_lived_counts @ stage_years_before / n_simulations
+        avg_stage_proportions = {
+            stage: mean_stage_years[i] / self.n_cycles
+            for i, stage in enumerate(self.states) if stage != 'Death'
+        }
 
         results = {
             'n_simulations': n_simulations,
@@ -766,15 +1502,404 @@ class MarkovCohortModel:
             'mean_death_age': mean_death,
             'eskd_percentiles': eskd_percentiles,
             'death_percentiles': death_percentiles,
-            'times_to_eskd': times_to_eskd,
-            'times_to_death': times_to_death,
-            'final_states': final_states,
             'avg_stage_proportions': avg_stage_proportions,
         }
 
+        if streaming:
+            results['patient_records'] = records
+        else:
+            results['times_to_eskd'] = records['eskd_age'][records['eskd_age'] >= 0].astype(int)
+            results['times_to_death'] = records['death_age'].astype(int)
+            results['final_states'] = np.array(self.states)[records['final_state']]
+
         return results
 
 
+# Parameters that only enter run_model through the gene therapy cost stream
+_TREATMENT_COST_FIELDS = ('gene_therapy_cost', 'monitoring_year1', 'monitoring_year2_5', 'monitoring_ongoing')
+
+
+def _json_default(value):
+    """JSON encoding of numpy values for parameter hashing."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot hash value of type {type(value).__name__}")
+
+
+def _model_source_hash() -> str:
+    """SHA-256 of this module's source, so cached results expire when the model code changes."""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class RunCache:
+    """
+    Content-addressed cache of MarkovCohortModel.run_model results.
+
+    Results are keyed by a SHA-256 hash of every ModelParameters field plus
+    the run arguments (the scenario label is not part of the key), so the
+    same run requested by different analyses is computed once. The life
+    table is a parameter field and so part of the key; the key also covers
+    the model version (hash of this module's source), so on-disk results
+    from an older model are never returned. Up to max_entries results are
+    kept in memory with least-recently-used eviction; if cache_dir is given,
+    results are also pickled to disk, keeping at most max_disk_entries
+    files (least recently used removed first).
+
+    Cached arrays are read-only; each call returns a new results dict.
+    """
+
+    _run_signature = inspect.signature(MarkovCohortModel.run_model)
+    model_version = _model_source_hash()
+
+    def __init__(self, max_entries: int = 1024, cache_dir: str = None, max_disk_entries: int = 16384):
+        """
+        Initialize run cache.
+
+        Args:
+            max_entries: Maximum number of results held in memory
+            cache_dir: Optional directory for the on-disk tier
+            max_disk_entries: Maximum number of result files kept in cache_dir
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._disk_entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Files already on disk, least recently used first
+            paths = [entry for entry in os.scandir(cache_dir) if entry.name.endswith('.pkl')]
+            for entry in sorted(paths, key=lambda entry: entry.stat().st_mtime):
+                self._disk_entries[entry.name[:-len('.pkl')]] = None
+            self._prune_disk()
+
+    def key(self, params: ModelParameters, **run_kwargs) -> str:
+        """
+        Stable hash of parameters and run arguments.
+
+        Args:
+            params: Model parameters
+            **run_kwargs: Arguments to MarkovCohortModel.run_model
+
+        Returns:
+            Hex digest identifying the run
+        """
+        bound = self._run_signature.bind(None, **run_kwargs)
+        bound.apply_defaults()
+        arguments = {k: v for k, v in bound.arguments.items() if k not in ('self', 'scenario_name')}
+
+        fields = asdict(params)
+        if not arguments['include_gene_therapy_cost']:
+            for name in _TREATMENT_COST_FIELDS:
+                fields.pop(name, None)
+
+        payload = json.dumps(
+            {'class': type(params).__name__, 'params': fields, 'run': arguments, 'model': self.model_version},
+            sort_keys=True,
+            default=_json_default
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def run_model(
+        self,
+        params: ModelParameters,
+        scenario_name: str = "Baseline",
+        **run_kwargs
+    ) -> Dict:
+        """
+        Return cached run_model results, running the model on a miss.
+
+        Args:
+            params: Model parameters
+            scenario_name: Scenario label stored in the returned results
+            **run_kwargs: Other arguments to MarkovCohortModel.run_model
+
+        Returns:
+            Results dictionary as returned by run_model
+        """
+        key = self.key(params, **run_kwargs)
+        results = self._lookup(key)
+        if results is None:
+            results = MarkovCohortModel(params).run_model(scenario_name=scenario_name, **run_kwargs)
+            self._insert(key, results)
+
+        return {**results, 'scenario': scenario_name}
+
+    def run_many(
+        self,
+        requests: List[Tuple[ModelParameters, Dict]],
+        n_processes: int = None
+    ) -> List[Dict]:
+        """
+        Return results for many runs, computing all cache misses in one batch.
+
+        Args:
+            requests: List of (params, run_model keyword arguments)
+            n_processes: Worker processes for the misses (None = serial)
+
+        Returns:
+            List of results dictionaries in request order
+        """
+        keys = [self.key(params, **kwargs) for params, kwargs in requests]
+
+        found = {}
+        missing = {}
+        for key, request in zip(keys, requests):
+            if key in found or key in missing:
+                continue
+            results = self._lookup(key)
+            if results is None:
+                missing[key] = request
+            else:
+                found[key] = results
+
+        if n_processes is not None and len(missing) > 1:
+            with Pool(processes=n_processes) as pool:
+                computed = pool.map(_run_model_task, list(missing.values()))
+        else:
+            computed = [_run_model_task(request) for request in missing.values()]
+
+        for key, results in zip(missing, computed):
+            self._insert(key, results)
+            found[key] = results
+
+        return [
+            {**found[key], 'scenario': kwargs.get('scenario_name', "Baseline")}
+            for key, (params, kwargs) in zip(keys, requests)
+        ]
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        """Cached results for key from memory or disk, or None."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        path = os.path.join(self.cache_dir, f'{key}.pkl') if self.cache_dir else None
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as f:
+                results = pickle.load(f)
+            os.utime(path)
+            self._disk_entries[key] = None
+            self._disk_entries.move_to_end(key)
+            self.hits += 1
+            self._insert(key, results, write_disk=False)
+            return results
+
+        self.misses += 1
+        return None
+
+    def _insert(self, key: str, results: Dict, write_disk: bool = True):
+        """Store results under key (read-only arrays, LRU eviction, disk tier)."""
+        if write_disk and self.cache_dir is not None:
+            with open(os.path.join(self.cache_dir, f'{key}.pkl'), 'wb') as f:
+                pickle.dump(results, f)
+            self._disk_entries[key] = None
+            self._disk_entries.move_to_end(key)
+            self._prune_disk()
+
+        for value in results.values():
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+
+        self._entries[key] = results
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _prune_disk(self):
+        """Delete the least recently used result files beyond max_disk_entries."""
+        while len(self._disk_entries) > self.max_disk_entries:
+            key, _ = self._disk_entries.popitem(last=False)
+            self._remove_disk_file(key)
+
+    def _remove_disk_file(self, key: str):
+        """Delete the result file of key, if it still exists."""
+        try:
+            os.remove(os.path.join(self.cache_dir, f'{key}.pkl'))
+        except FileNotFoundError:
+            pass
+
+    def clear(self, disk: bool = False):
+        """
+        Remove all in-memory entries.
+
+        Args:
+            disk: Also delete the result files of the on-disk tier
+        """
+        self._entries.clear()
+        if disk and self.cache_dir is not None:
+            for key in self._disk_entries:
+                self._remove_disk_file(key)
+            self._disk_entries.clear()
+
+
+def _run_model_task(request: Tuple[ModelParameters, Dict]) -> Dict:
+    """Worker for RunCache.run_many: run one (params, run_model kwargs) request."""
+    params, kwargs = request
+    return MarkovCohortModel(params).run_model(**kwargs)
+
+
+# Shared cache used by the analysis classes
+RUN_CACHE = RunCache()
+
+
+def threshold_label(threshold: float) -> str:
+    """Short label for a WTP threshold, e.g. 150000 -> '€150K'."""
+    return f"€{threshold/1000:.0f}K"
+
+
+class ValueBasedPrices:
+    """
+    Maximum justifiable gene therapy prices for a batch of health gains.
+
+    Solves Max Price = max(0, Threshold × Gain − Incremental Costs excl. GT)
+    for every scenario, threshold, health-gain metric (QALY, evLYG) and draw
+    in one broadcast. A metric with no gain gives a price of 0. Deterministic
+    scenarios are the single-draw case; PSA draws fill the last axis.
+    """
+
+    METRICS = ('QALY', 'evLYG')
+
+    def __init__(
+        self,
+        scenario_names: List[str],
+        thresholds: np.ndarray,
+        prices: np.ndarray
+    ):
+        """
+        Args:
+            scenario_names: Scenario labels, one per row of prices
+            thresholds: WTP thresholds (€/QALY or €/evLYG)
+            prices: Max prices, shape (n_scenarios, n_thresholds, n_metrics, n_draws)
+        """
+        self.scenario_names = list(scenario_names)
+        self.thresholds = thresholds
+        self.prices = prices
+
+    @classmethod
+    def solve(
+        cls,
+        scenario_names: List[str],
+        incremental_qalys,
+        evlyg,
+        costs_excl_gt,
+        thresholds: List[float]
+    ) -> 'ValueBasedPrices':
+        """
+        Solve max prices from arrays of incremental outcomes.
+
+        Outcome arrays have shape (n_scenarios,) for deterministic results or
+        (n_scenarios, n_draws) for PSA draws.
+
+        Args:
+            scenario_names: Scenario labels
+            incremental_qalys: Incremental QALYs vs comparator
+            evlyg: Equal-value life years gained vs comparator
+            costs_excl_gt: Incremental costs excluding the gene therapy price
+            thresholds: WTP thresholds
+
+        Returns:
+            ValueBasedPrices with the dense price tensor
+        """
+        def as_draws(values):
+            values = np.asarray(values, dtype=float)
+            return values[:, None] if values.ndim == 1 else values
+
+        thresholds = np.asarray(thresholds, dtype=float)
+        gains = np.stack([as_draws(incremental_qalys), as_draws(evlyg)], axis=1)
+        costs = as_draws(costs_excl_gt)[:, None, None, :]
+
+        prices = thresholds[None, :, None, None] * gains[:, None, :, :] - costs
+        prices = np.where(gains[:, None, :, :] > 0, np.maximum(prices, 0), 0.0)
+        return cls(scenario_names, thresholds, prices)
+
+    @property
+    def n_draws(self) -> int:
+        return self.prices.shape[3]
+
+    def price(self, metric: str = 'QALY', draw: int = 0) -> np.ndarray:
+        """
+        Max prices of one metric and draw.
+
+        Args:
+            metric: 'QALY' or 'evLYG'
+            draw: Draw index (0 for deterministic results)
+
+        Returns:
+            Array of shape (n_scenarios, n_thresholds)
+        """
+        return self.prices[:, :, self.METRICS.index(metric), draw]
+
+    def quantiles(self, q: Tuple[float, ...] = (0.025, 0.5, 0.975)) -> pd.DataFrame:
+        """
+        Mean and quantiles of the max price over draws.
+
+        Args:
+            q: Quantile levels
+
+        Returns:
+            DataFrame with one row per scenario × threshold × metric
+        """
+        index = pd.MultiIndex.from_product(
+            [self.scenario_names, self.thresholds, self.METRICS],
+            names=['Scenario', 'Threshold', 'Metric']
+        )
+        summary = pd.DataFrame({'Mean': self.prices.mean(axis=3).ravel()}, index=index)
+        for level, values in zip(q, np.quantile(self.prices, q, axis=3)):
+            summary[f'Q{level*100:g}'] = values.ravel()
+        return summary.reset_index()
+
+    def price_at_probability(
+        self,
+        probabilities: Tuple[float, ...] = (0.5, 0.8, 0.95)
+    ) -> pd.DataFrame:
+        """
+        Highest price at which P(cost-effective) still reaches each probability.
+
+        A price is cost-effective in a draw when it does not exceed that
+        draw's max price, so the answer is read off the sorted draws: the
+        k-th largest max price, k = ceil(probability × n_draws).
+
+        Args:
+            probabilities: Target probabilities of cost-effectiveness
+
+        Returns:
+            DataFrame with one row per scenario × threshold × metric
+        """
+        index = pd.MultiIndex.from_product(
+            [self.scenario_names, self.thresholds, self.METRICS],
+            names=['Scenario', 'Threshold', 'Metric']
+        )
+        ordered = np.sort(self.prices, axis=3)
+        summary = pd.DataFrame(index=index)
+        for probability in probabilities:
+            k = max(1, int(np.ceil(np.round(probability * self.n_draws, 9))))
+            summary[f'P(CE) {probability*100:g}%'] = ordered[..., self.n_draws - k].ravel()
+        return summary.reset_index()
+
+    def acceptability(self, prices) -> np.ndarray:
+        """
+        Price-acceptability curves: share of draws whose max price is at least each price.
+
+        Args:
+            prices: Candidate gene therapy prices, shape (n_prices,)
+
+        Returns:
+            Array of shape (n_scenarios, n_thresholds, n_metrics, n_prices)
+        """
+        prices = np.asarray(prices, dtype=float)
+        ordered = np.sort(self.prices, axis=3).reshape(-1, self.n_draws)
+        below = np.stack([np.searchsorted(row, prices, side='left') for row in ordered])
+        accepted = 1.0 - below / self.n_draws
+        return accepted.reshape(self.prices.shape[:3] + (len(prices),))
+
+
 class ScenarioAnalysis:
     """
     Runs multiple scenarios and calculates incremental cost-effectiveness.
@@ -855,7 +1980,8 @@ class ScenarioAnalysis:
         # Run each scenario
         for scenario_name, config in scenarios.items():
             print(f"Running {scenario_name}...")
-            results = self.model.run_model(
+            results = RUN_CACHE.run_model(
+                self.params,
                 egfr_decline_rate=config['decline_rate'],
                 scenario_name=scenario_name,
                 include_gene_therapy_cost=config['include_gt_cost'],
@@ -1015,63 +2141,33 @@ class ScenarioAnalysis:
             raise ValueError("Must run run_all_scenarios() first")
 
         baseline = self.results['Scenario 0: Natural History']
-        pricing_data = []
-
-        for scenario_name, results in self.results.items():
-            # Skip natural history
-            if scenario_name == 'Scenario 0: Natural History':
-                continue
-
-            # Get health outcomes
-            inc_qalys = results.get('incremental_qalys', 0)
-            evlyg = results.get('evlyg', 0)
-            inc_life_years = results.get('incremental_life_years', 0)
-
-            # Calculate costs excluding gene therapy price
-            # Total costs include: GT acquisition + monitoring + CKD management
-            # We need to subtract GT acquisition to get other costs
-            gt_price = self.params.gene_therapy_cost
-            total_costs = results['total_costs']
-            baseline_costs = baseline['total_costs']
-
-            # Incremental costs excluding gene therapy acquisition price
-            # = (total intervention costs - GT price) - baseline costs
-            costs_excl_gt = (total_costs - gt_price) - baseline_costs
-
-            # For each threshold, solve for maximum price using BOTH metrics
-            max_prices_qaly = {}
-            max_prices_evlyg = {}
-
-            for threshold in thresholds:
-                # QALY-based max price
-                # Max price = (threshold × inc_QALYs) - costs_excl_gt
-                # This ensures: (costs_excl_gt + max_price) / inc_QALYs = threshold
-                if inc_qalys > 0:
-                    max_price_qaly = (threshold * inc_qalys) - costs_excl_gt
-                    max_prices_qaly[f'QALY: €{threshold/1000:.0f}K'] = max(0, max_price_qaly)
-                else:
-                    max_prices_qaly[f'QALY: €{threshold/1000:.0f}K'] = 0
-
-                # evLYG-based max price
-                # Max price = (threshold × evLYG) - costs_excl_gt
-                # Same threshold value, but applied to evLYG gains
-                if evlyg > 0:
-                    max_price_evlyg = (threshold * evlyg) - costs_excl_gt
-                    max_prices_evlyg[f'evLYG: €{threshold/1000:.0f}K'] = max(0, max_price_evlyg)
-                else:
-                    max_prices_evlyg[f'evLYG: €{threshold/1000:.0f}K'] = 0
-
-            row = {
-                'Scenario': scenario_name,
-                'Incremental QALYs': inc_qalys,
-                'evLYG': evlyg,
-                'Life Years Gained': inc_life_years,
-                **max_prices_qaly,
-                **max_prices_evlyg
-            }
-            pricing_data.append(row)
+        scenarios = {
+            name: results for name, results in self.results.items()
+            if name != 'Scenario 0: Natural History'
+        }
 
-        df = pd.DataFrame(pricing_data)
+        # Incremental costs excluding gene therapy acquisition price
+        # = (total intervention costs - GT price) - baseline costs
+        gt_price = self.params.gene_therapy_cost
+        costs_excl_gt = [
+            (results['total_costs'] - gt_price) - baseline['total_costs']
+            for results in scenarios.values()
+        ]
+
+        df = pd.DataFrame({
+            'Scenario': list(scenarios),
+            'Incremental QALYs': [results.get('incremental_qalys', 0) for results in scenarios.values()],
+            'evLYG': [results.get('evlyg', 0) for results in scenarios.values()],
+            'Life Years Gained': [results.get('incremental_life_years', 0) for results in scenarios.values()],
+        })
+
+        # Solve max prices for every scenario, threshold and metric at once
+        prices = ValueBasedPrices.solve(
+            df['Scenario'], df['Incremental QALYs'], df['evLYG'], costs_excl_gt, thresholds
+        )
+        for metric in ValueBasedPrices.METRICS:
+            for j, threshold in enumerate(prices.thresholds):
+                df[f'{metric}: {threshold_label(threshold)}'] = prices.price(metric)[:, j]
         return df
 
 
@@ -1094,82 +2190,76 @@ class SensitivityAnalysis:
         self,
         parameter_ranges: Dict[str, Tuple[float, float]],
         scenario_decline_rate: float = 0.0,  # Stabilization scenario
-        include_gt_cost: bool = True
+        include_gt_cost: bool = True,
+        n_processes: int = None
     ) -> pd.DataFrame:
         """
         Perform one-way sensitivity analysis on key parameters.
 
+        Each parameter is varied on a copy of the base case parameters and
+        compared with a baseline under the same change. All runs are
+        requested from the run cache at once, so repeated calls (e.g. from
+        generate_tornado_data) reuse the same evaluations, unaffected
+        baselines are shared, and cache misses can be spread over a process
+        pool.
+
         Args:
             parameter_ranges: Dict mapping parameter names to (low, high) tuples
             scenario_decline_rate: eGFR decline rate for intervention scenario
             include_gt_cost: Whether to include gene therapy costs
+            n_processes: Worker processes for uncached runs (None = serial)
 
         Returns:
             DataFrame with sensitivity analysis results
         """
-        results_list = []
-
-        # Get baseline results
-        baseline_params = ModelParameters()
-        baseline_model = MarkovCohortModel(baseline_params)
-        baseline_results = baseline_model.run_model(
-            egfr_decline_rate=baseline_params.natural_decline_rate,
-            scenario_name="Baseline",
-            include_gene_therapy_cost=False
-        )
+        # Baseline and base case intervention, shared by all parameters
+        requests = [
+            (self.base_params, {
+                'egfr_decline_rate': self.base_params.natural_decline_rate,
+                'scenario_name': "Baseline",
+                'include_gene_therapy_cost': False
+            }),
+            (self.base_params, {
+                'egfr_decline_rate': scenario_decline_rate,
+                'scenario_name': "Base",
+                'include_gene_therapy_cost': include_gt_cost
+            }),
+        ]
+
+        # Intervention (and, if affected, baseline) run for each parameter bound
+        run_index = {}
+        for param_name, bounds in parameter_ranges.items():
+            for bound, value in zip(['low', 'high'], bounds):
+                params_varied = self._create_varied_params(param_name, value)
+                run_index[param_name, bound] = len(requests)
+                requests.append((params_varied, {
+                    'egfr_decline_rate': scenario_decline_rate,
+                    'scenario_name': f"{param_name}_{bound}",
+                    'include_gene_therapy_cost': include_gt_cost
+                }))
+
+                # Baseline with the same parameter change (a cache hit on the
+                # shared baseline if the parameter does not affect it)
+                requests.append((params_varied, {
+                    'egfr_decline_rate': params_varied.natural_decline_rate,
+                    'scenario_name': f"Baseline_{bound}",
+                    'include_gene_therapy_cost': False
+                }))
+
+        runs = RUN_CACHE.run_many(requests, n_processes=n_processes)
+        baseline_results, intervention_base = runs[0], runs[1]
+        icer_base = self._calculate_icer(intervention_base, baseline_results)
 
+        results_list = []
         for param_name, (low_value, high_value) in parameter_ranges.items():
             print(f"Analyzing parameter: {param_name}")
 
-            # Test low value
-            params_low = self._create_varied_params(param_name, low_value)
-            model_low = MarkovCohortModel(params_low)
-            intervention_low = model_low.run_model(
-                egfr_decline_rate=scenario_decline_rate,
-                scenario_name=f"{param_name}_low",
-                include_gene_therapy_cost=include_gt_cost
-            )
-
-            # Recalculate baseline with same parameter change if it affects baseline
-            if param_name in ['discount_rate', 'base_mortality_rate']:
-                baseline_low = model_low.run_model(
-                    egfr_decline_rate=params_low.natural_decline_rate,
-                    scenario_name="Baseline_low",
-                    include_gene_therapy_cost=False
-                )
-            else:
-                baseline_low = baseline_results
-
-            icer_low = self._calculate_icer(intervention_low, baseline_low)
-
-            # Test high value
-            params_high = self._create_varied_params(param_name, high_value)
-            model_high = MarkovCohortModel(params_high)
-            intervention_high = model_high.run_model(
-                egfr_decline_rate=scenario_decline_rate,
-                scenario_name=f"{param_name}_high",
-                include_gene_therapy_cost=include_gt_cost
-            )
-
-            if param_name in ['discount_rate', 'base_mortality_rate']:
-                baseline_high = model_high.run_model(
-                    egfr_decline_rate=params_high.natural_decline_rate,
-                    scenario_name="Baseline_high",
-                    include_gene_therapy_cost=False
-                )
-            else:
-                baseline_high = baseline_results
-
-            icer_high = self._calculate_icer(intervention_high, baseline_high)
-
-            # Calculate base case ICER for comparison
-            intervention_base = self.model.run_model(
-                egfr_decline_rate=scenario_decline_rate,
-                scenario_name="Base",
-                include_gene_therapy_cost=include_gt_cost
-            )
-            icer_base = self._calculate_icer(intervention_base, baseline_results)
+            icers = {}
+            for bound in ['low', 'high']:
+                index = run_index[param_name, bound]
+                icers[bound] = self._calculate_icer(runs[index], runs[index + 1])
 
+            icer_low, icer_high = icers['low'], icers['high']
             results_list.append({
                 'Parameter': param_name,
                 'Low Value': low_value,
@@ -1191,7 +2281,8 @@ class SensitivityAnalysis:
         self,
         target_icer: float = 100000,  # £100K/QALY threshold
         decline_range: Tuple[float, float] = (0.0, 4.0),
-        n_points: int = 50
+        n_points: int = 50,
+        method: str = 'grid'
     ) -> pd.DataFrame:
         """
         Find the eGFR decline reduction needed to meet ICER threshold.
@@ -1199,13 +2290,19 @@ class SensitivityAnalysis:
         Args:
             target_icer: Target ICER threshold (€/QALY)
             decline_range: Range of decline rates to test (min, max)
-            n_points: Number of points to test
+            n_points: Number of points to test (grid method)
+            method: 'grid' to scan n_points decline rates, or 'brent' to solve
+                    for the exact decline rate with solve_threshold
 
         Returns:
-            DataFrame with threshold analysis results
+            DataFrame with threshold analysis results (one row for 'brent')
         """
+        if method == 'brent':
+            return self._solve_decline_threshold(target_icer, decline_range)
+
         # Get baseline results
-        baseline_results = self.model.run_model(
+        baseline_results = RUN_CACHE.run_model(
+            self.base_params,
             egfr_decline_rate=self.base_params.natural_decline_rate,
             scenario_name="Baseline",
             include_gene_therapy_cost=False
@@ -1259,36 +2356,192 @@ class SensitivityAnalysis:
 
         return df
 
+    def solve_threshold(
+        self,
+        parameter: str = 'egfr_decline_rate',
+        target_icer: float = 100000,
+        bracket: Tuple[float, float] = (0.0, 4.0),
+        scenario_decline_rate: float = 0.52,
+        include_gt_cost: bool = True,
+        xtol: float = 1e-5
+    ) -> Dict:
+        """
+        Solve for the parameter value at which the ICER equals the target.
+
+        Uses Brent's method on the incremental net monetary benefit
+        target × ΔQALYs − ΔCosts, which is zero exactly where ICER = target
+        (for positive ΔQALYs) and, unlike the ICER, stays finite as ΔQALYs
+        approach zero. The baseline is rerun (through the run cache) only if
+        the parameter affects it. If the net benefit jumps across zero (the
+        model is piecewise in the decline rate), the value just on the
+        cost-effective side of the jump is returned; the reported value
+        always lies in the bracket and meets the target.
+
+        Args:
+            parameter: 'egfr_decline_rate' (intervention decline rate) or any
+                       scalar parameter path accepted by with_overrides, e.g.
+                       'gene_therapy_cost', 'lowe_utility_multiplier', 'annual_costs.ESKD'
+            target_icer: Target ICER threshold (€/QALY)
+            bracket: (low, high) parameter values; the net benefit must change
+                     sign between them
+            scenario_decline_rate: Intervention decline rate when solving for
+                                   another parameter
+            include_gt_cost: Whether to include gene therapy costs
+            xtol: Absolute tolerance on the parameter value
+
+        Returns:
+            Dictionary with the solved value (None if the bracket contains no
+            crossing), its ICER, incremental results and evaluation count
+        """
+        evaluations = []
+        net_benefits = {}
+
+        def net_benefit(value):
+            intervention, baseline = self._threshold_runs(
+                parameter, value, scenario_decline_rate, include_gt_cost
+            )
+            evaluations.append(value)
+            net_benefits[value] = (
+                target_icer * (intervention['total_qalys'] - baseline['total_qalys'])
+                - (intervention['total_costs'] - baseline['total_costs'])
+            )
+            return net_benefits[value]
+
+        low, high = bracket
+        net_benefit_low, net_benefit_high = net_benefit(low), net_benefit(high)
+        if np.sign(net_benefit_low) == np.sign(net_benefit_high):
+            return {
+                'parameter': parameter,
+                'value': None,
+                'target_icer': target_icer,
+                'evaluations': len(evaluations),
+                'converged': False
+            }
+
+        value = brentq(net_benefit, low, high, xtol=xtol)
+
+        # At a step change (e.g. the cohort crossing a CKD boundary) the root is
+        # the step itself; report the side of it that meets the target, falling
+        # back to the nearest evaluated cost-effective point (at worst a bracket
+        # end) if the nudge overshoots the bracket or the step
+        if net_benefit(value) < 0:
+            nudged = float(np.clip(value + (2 * xtol if net_benefit_high > 0 else -2 * xtol), low, high))
+            if net_benefit(nudged) >= 0:
+                value = nudged
+            else:
+                cost_effective = [v for v, nb in net_benefits.items() if nb >= 0]
+                value = min(cost_effective, key=lambda v: abs(v - value))
+        intervention, baseline = self._threshold_runs(
+            parameter, value, scenario_decline_rate, include_gt_cost
+        )
+
+        return {
+            'parameter': parameter,
+            'value': value,
+            'target_icer': target_icer,
+            'icer': self._calculate_icer(intervention, baseline),
+            'total_costs': intervention['total_costs'],
+            'total_qalys': intervention['total_qalys'],
+            'incremental_costs': intervention['total_costs'] - baseline['total_costs'],
+            'incremental_qalys': intervention['total_qalys'] - baseline['total_qalys'],
+            'evaluations': len(evaluations),
+            'converged': True
+        }
+
+    def _threshold_runs(
+        self,
+        parameter: str,
+        value: float,
+        scenario_decline_rate: float,
+        include_gt_cost: bool
+    ) -> Tuple[Dict, Dict]:
+        """
+        Intervention and baseline results with one parameter set to value.
+
+        Returns:
+            Tuple of (intervention results, baseline results)
+        """
+        if parameter == 'egfr_decline_rate':
+            params, decline_rate = self.base_params, value
+        else:
+            params = self.base_params.with_overrides({parameter: value})
+            decline_rate = scenario_decline_rate
+
+        baseline = RUN_CACHE.run_model(
+            params,
+            egfr_decline_rate=params.natural_decline_rate,
+            include_gene_therapy_cost=False
+        )
+        intervention = RUN_CACHE.run_model(
+            params,
+            egfr_decline_rate=decline_rate,
+            include_gene_therapy_cost=include_gt_cost
+        )
+        return intervention, baseline
+
+    def _solve_decline_threshold(
+        self,
+        target_icer: float,
+        decline_range: Tuple[float, float]
+    ) -> pd.DataFrame:
+        """
+        Exact required decline rate for threshold_analysis(method='brent').
+
+        Returns:
+            One-row DataFrame with the grid method's columns plus evaluation count
+        """
+        solution = self.solve_threshold('egfr_decline_rate', target_icer, decline_range)
+
+        if not solution['converged']:
+            print(f"\nNo scenario meets the €{target_icer:,.0f}/QALY threshold in tested range.")
+            return pd.DataFrame()
+
+        decline_rate = solution['value']
+        pct_reduction = (
+            (self.base_params.natural_decline_rate - decline_rate) /
+            self.base_params.natural_decline_rate * 100
+        )
+
+        print(f"\nThreshold Analysis Results:")
+        print(f"Target ICER: €{target_icer:,.0f}/QALY")
+        print(f"Required eGFR decline rate: {decline_rate:.4f} ml/min/1.73m²/year")
+        print(f"Required reduction: {pct_reduction:.2f}%")
+        print(f"Model evaluations: {solution['evaluations']}")
+
+        return pd.DataFrame([{
+            'eGFR Decline Rate': decline_rate,
+            'Percent Reduction': pct_reduction,
+            'Total Costs': solution['total_costs'],
+            'Total QALYs': solution['total_qalys'],
+            'Incremental Costs': solution['incremental_costs'],
+            'Incremental QALYs': solution['incremental_qalys'],
+            'ICER': solution['icer'],
+            'Below Threshold': solution['icer'] <= target_icer if solution['icer'] > 0 else False,
+            'Evaluations': solution['evaluations']
+        }])
+
     def _create_varied_params(self, param_name: str, value: float) -> ModelParameters:
         """
-        Create a new ModelParameters object with one parameter varied.
+        Create a copy of the base case parameters with one parameter varied.
 
         Args:
-            param_name: Name of parameter to vary
+            param_name: Dotted parameter path (see ModelParameters.with_overrides),
+                        or the short forms 'utility_<state>' and 'cost_<state>'
             value: New value for parameter
 
         Returns:
             New ModelParameters object
         """
-        params = ModelParameters()
-
-        # Handle different parameter types
-        if param_name == 'discount_rate':
-            params.discount_rate = value
-        elif param_name == 'gene_therapy_cost':
-            params.gene_therapy_cost = value
-        elif param_name == 'natural_decline_rate':
-            params.natural_decline_rate = value
-        elif param_name == 'base_mortality_rate':
-            params.base_mortality_rate = value
-        elif param_name.startswith('utility_'):
-            state = param_name.replace('utility_', '')
-            params.utilities[state] = value
-        elif param_name.startswith('cost_'):
-            state = param_name.replace('cost_', '')
-            params.annual_costs[state] = value
+        return self.base_params.with_overrides({self._parameter_path(param_name): value})
 
-        return params
+    @staticmethod
+    def _parameter_path(param_name: str) -> str:
+        """Dotted path for a sensitivity parameter name."""
+        if param_name.startswith('utility_'):
+            return 'utilities.' + param_name.replace('utility_', '')
+        elif param_name.startswith('cost_'):
+            return 'annual_costs.' + param_name.replace('cost_', '')
+        return param_name
 
     def _calculate_icer(self, intervention: Dict, baseline: Dict) -> float:
         """
@@ -1314,21 +2567,26 @@ class SensitivityAnalysis:
     def generate_tornado_data(
         self,
         parameter_ranges: Dict[str, Tuple[float, float]],
-        scenario_decline_rate: float = 0.0
+        scenario_decline_rate: float = 0.0,
+        n_processes: int = None
     ) -> pd.DataFrame:
         """
         Generate data for tornado diagram (one-way sensitivity).
 
+        Runs already evaluated by one_way_sensitivity are taken from the run cache.
+
         Args:
             parameter_ranges: Parameter ranges for testing
             scenario_decline_rate: Decline rate for intervention
+            n_processes: Worker processes for uncached runs (None = serial)
 
         Returns:
             DataFrame formatted for tornado diagram plotting
         """
         owa_results = self.one_way_sensitivity(
             parameter_ranges,
-            scenario_decline_rate
+            scenario_decline_rate,
+            n_processes=n_processes
         )
 
         tornado_data = []
@@ -1538,14 +2796,14 @@ if __name__ == "__main__":
     print("\n" + "="*80)
     print("MONTE CARLO VALIDATION (Natural History)")
     print("="*80)
-    print("\nRunning 1,000 individual patient simulations to validate cohort model...")
+    print("\nRunning 1,000,000 individual patient simulations to validate cohort model...")
 
     # Run Monte Carlo validation for natural history
     params = ModelParameters()
     model = MarkovCohortModel(params)
     mc_results = model.run_monte_carlo_validation(
         egfr_decline_rate=params.natural_decline_rate,
-        n_simulations=1000,
+        n_simulations=1_000_000,
         random_seed=42
     )
 
@@ -17,7 +17,13 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass, field
 import warnings
 import os
+from multiprocessing import Pool
 from scipy import stats
+from scipy.interpolate import BSpline
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from scipy.spatial.distance import cdist
+from scipy.stats import qmc
 import matplotlib.pyplot as plt
 import seaborn as sns
 from tqdm import tqdm
@@ -26,10 +32,13 @@ from tqdm import tqdm
 import sys
 sys.path.append(os.path.dirname(__file__))
 from markov_cua_model import (
-    load_dst_life_table,
     ModelParameters,
+    ParameterDraws,
     MarkovCohortModel,
-    ScenarioAnalysis
+    ScenarioAnalysis,
+    ValueBasedPrices,
+    threshold_label,
+    RUN_CACHE
 )
 
 warnings.filterwarnings('ignore')
@@ -205,6 +214,380 @@ class ProbabilisticParameters:
         '18+': (5.0, 95.0),        # mean=0.05, SE=0.02
     })
 
+    def distributions(self) -> Dict[str, stats.rv_continuous]:
+        """
+        Frozen scipy distribution of every sampled input, keyed by parameter path.
+
+        Paths match ProbabilisticSensitivityAnalysis.sampled_inputs; treatment
+        effect distributions are keyed 'decline_rate_distributions.<name>'.
+        Truncation and scaling are applied afterwards in ppf.
+
+        Returns:
+            Ordered dictionary of parameter path to frozen distribution
+        """
+        natural_paths = {
+            'natural_early': 'decline_rate_early',
+            'natural_middle': 'decline_rate_middle',
+            'natural_late': 'decline_rate_late',
+        }
+
+        dists = {}
+        for state, (alpha, beta) in self.utility_distributions.items():
+            dists[f'base_utilities.{state}'] = stats.beta(alpha, beta)
+        for state, (shape, scale) in self.cost_distributions.items():
+            dists[f'annual_costs.{state}'] = stats.gamma(shape, scale=scale)
+        for state, (mu, sigma) in self.mortality_rr_distributions.items():
+            dists[f'ckd_relative_risks.{state}'] = stats.lognorm(sigma, scale=np.exp(mu))
+        for name, (mean, sd) in self.decline_rate_distributions.items():
+            path = natural_paths.get(name, f'decline_rate_distributions.{name}')
+            dists[path] = stats.norm(mean, sd)
+        dists['discount_rate'] = stats.beta(*self.discount_rate_distribution)
+        for age_group, (alpha, beta) in self.caregiver_disutility_distributions.items():
+            dists[f'caregiver_params.caregiver_disutility_by_age.{age_group}'] = stats.beta(alpha, beta)
+        return dists
+
+    def ppf(self, u: np.ndarray) -> pd.DataFrame:
+        """
+        Map points of the unit hypercube to parameter values via inverse CDFs.
+
+        Applies the same transforms as sample_parameters: decline rates are
+        truncated at 0.1, the discount rate is scaled to 0-0.06 and caregiver
+        disutilities are negated.
+
+        Args:
+            u: Uniform points, shape (n_samples, len(self.distributions()))
+
+        Returns:
+            DataFrame of parameter values, one column per parameter path
+        """
+        values = {
+            path: dist.ppf(u[:, k])
+            for k, (path, dist) in enumerate(self.distributions().items())
+        }
+        return self._transform(values)
+
+    def sample(self, n_samples: int, rng: np.random.Generator = None) -> pd.DataFrame:
+        """
+        Draw all parameters for n_samples iterations in one call per distribution family.
+
+        Args:
+            n_samples: Number of parameter sets
+            rng: Generator to draw from (default: fresh unseeded Generator)
+
+        Returns:
+            DataFrame of parameter values, columns as in ppf
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        # (path, parameters) per distribution family, in distributions() order
+        paths = list(self.distributions())
+        families = {'beta': {}, 'gamma': {}, 'lognormal': {}, 'normal': {}}
+        for state, dist_params in self.utility_distributions.items():
+            families['beta'][f'base_utilities.{state}'] = dist_params
+        for state, dist_params in self.cost_distributions.items():
+            families['gamma'][f'annual_costs.{state}'] = dist_params
+        for state, dist_params in self.mortality_rr_distributions.items():
+            families['lognormal'][f'ckd_relative_risks.{state}'] = dist_params
+        decline_paths = [p for p in paths if p.startswith('decline_rate_')]
+        for path, dist_params in zip(decline_paths, self.decline_rate_distributions.values()):
+            families['normal'][path] = dist_params
+        families['beta']['discount_rate'] = self.discount_rate_distribution
+        for age_group, dist_params in self.caregiver_disutility_distributions.items():
+            families['beta'][f'caregiver_params.caregiver_disutility_by_age.{age_group}'] = dist_params
+
+        values = {}
+        for family, members in families.items():
+            first, second = np.array(list(members.values()), dtype=float).T
+            draws = getattr(rng, family)(first, second, size=(n_samples, len(members)))
+            values.update(zip(members, draws.T))
+
+        return self._transform({path: values[path] for path in paths})
+
+    @staticmethod
+    def _transform(values: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Apply the truncation, scaling and sign conventions of sample_parameters."""
+        for path in values:
+            if path.startswith(('decline_rate_early', 'decline_rate_middle', 'decline_rate_late',
+                                'decline_rate_distributions.')):
+                values[path] = np.maximum(0.1, values[path])
+            elif path.startswith('caregiver_params.'):
+                values[path] = -values[path]
+        values['discount_rate'] = values['discount_rate'] * 0.06
+        return pd.DataFrame(values)
+
+
+@dataclass
+class PSAResultStore:
+    """
+    Columnar store of PSA outcomes.
+
+    Each outcome is a preallocated (n_iterations × n_scenarios) array, so
+    incremental results are plain column subtractions.
+    """
+
+    scenario_names: List[str]
+    total_costs: np.ndarray
+    total_qalys: np.ndarray
+    life_years: np.ndarray
+    time_to_eskd: np.ndarray
+
+    OUTCOMES = ('total_costs', 'total_qalys', 'life_years', 'time_to_eskd')
+
+    @classmethod
+    def allocate(cls, n_iterations: int, scenario_names: List[str]) -> 'PSAResultStore':
+        """Create an empty store for n_iterations × len(scenario_names) results."""
+        shape = (n_iterations, len(scenario_names))
+        return cls(
+            scenario_names=list(scenario_names),
+            total_costs=np.zeros(shape),
+            total_qalys=np.zeros(shape),
+            life_years=np.zeros(shape),
+            time_to_eskd=np.zeros(shape, dtype=int)
+        )
+
+    @property
+    def n_iterations(self) -> int:
+        return self.total_costs.shape[0]
+
+    def column(self, scenario_name: str) -> int:
+        """Column index of a scenario."""
+        return self.scenario_names.index(scenario_name)
+
+    def store_scenario(
+        self,
+        scenario_name: str,
+        outcomes: Dict[str, np.ndarray],
+        rows: slice = slice(None)
+    ):
+        """Write one scenario's per-iteration outcomes (optionally a block of rows) into its column."""
+        j = self.column(scenario_name)
+        for key in self.OUTCOMES:
+            getattr(self, key)[rows, j] = outcomes[key]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Long-format DataFrame with rows ordered by iteration, then scenario."""
+        n_scenarios = len(self.scenario_names)
+        data = {
+            'iteration': np.repeat(np.arange(self.n_iterations), n_scenarios),
+            'scenario': np.tile(self.scenario_names, self.n_iterations),
+        }
+        for key in self.OUTCOMES:
+            data[key] = getattr(self, key).ravel()
+        return pd.DataFrame(data)
+
+
+def sample_unit_hypercube(
+    n_samples: int,
+    n_dims: int,
+    method: str = 'lhs',
+    seed: int = None
+) -> np.ndarray:
+    """
+    Draw a design of points in the unit hypercube for PSA sampling.
+
+    Args:
+        n_samples: Number of points (PSA iterations)
+        n_dims: Number of dimensions (sampled parameters)
+        method: 'random' (pseudo-random), 'lhs' (Latin hypercube) or
+                'sobol' (scrambled Sobol; powers of 2 keep its balance properties)
+        seed: Random seed for reproducibility
+
+    Returns:
+        Array of shape (n_samples, n_dims) with values in [0, 1)
+    """
+    rng = np.random.default_rng(seed)
+    if method == 'random':
+        return rng.random((n_samples, n_dims))
+    elif method == 'lhs':
+        return qmc.LatinHypercube(d=n_dims, seed=rng).random(n_samples)
+    elif method == 'sobol':
+        return qmc.Sobol(d=n_dims, scramble=True, seed=rng).random(n_samples)
+    else:
+        raise ValueError(f"Unknown sampling method: {method}")
+
+
+# Parameter groups for EVPPI, as prefixes of the sampled input paths
+EVPPI_PARAMETER_GROUPS = {
+    'Utilities': ['base_utilities.'],
+    'Costs': ['annual_costs.'],
+    'Mortality': ['ckd_relative_risks.'],
+    'Decline': ['decline_rate_', 'treatment_decline_rate.'],
+}
+
+
+# Marginal B-spline basis size per input for the tensor-product GAM, by group size
+_GAM_BASIS_SIZE = {1: 10, 2: 7, 3: 5, 4: 4}
+# Maximum number of PSA draws the Gaussian process is trained on
+_GP_MAX_TRAIN = 600
+# Maximum number of PSA draws the GP posterior mean is conditioned on
+_GP_MAX_CONDITION = 4000
+
+
+def _bspline_basis(x: np.ndarray, n_basis: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cubic B-spline basis on equally spaced knots over the range of x.
+
+    Args:
+        x: Input values, shape (N,)
+        n_basis: Number of basis functions (at least 4)
+
+    Returns:
+        Tuple of (basis matrix (N, n_basis), second-order difference penalty
+        (n_basis, n_basis)); a constant input gets a single constant column
+    """
+    lo, hi = x.min(), x.max()
+    if hi <= lo:
+        return np.ones((len(x), 1)), np.zeros((1, 1))
+    degree = 3
+    width = (hi - lo) / (n_basis - degree)
+    steps = width * np.arange(1, degree + 1)
+    knots = np.concatenate([lo - steps[::-1], np.linspace(lo, hi, n_basis - degree + 1), hi + steps])
+    basis = BSpline.design_matrix(x, knots, degree).toarray()
+    difference = np.diff(np.eye(n_basis), n=2, axis=0)
+    return basis, difference.T @ difference
+
+
+def _gam_metamodel(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Tensor-product spline GAM of y on a group of 1-4 inputs.
+
+    The design is the row-wise tensor product of cubic B-spline bases of the
+    inputs, so all interactions are representable; one difference penalty per
+    input (anisotropic smoothing, as mgcv's te()) has its weight chosen by
+    generalized cross-validation.
+
+    Args:
+        x: Inputs, shape (N, p) with p <= 4
+        y: Outcome, shape (N,)
+
+    Returns:
+        Fitted values E[y | x], shape (N,)
+    """
+    n, p = x.shape
+    bases = [_bspline_basis(x[:, d], _GAM_BASIS_SIZE[p]) for d in range(p)]
+
+    design = bases[0][0]
+    for basis, _ in bases[1:]:
+        design = (design[:, :, None] * basis[:, None, :]).reshape(n, -1)
+
+    # Penalty of input d acts along its own axis of the tensor product
+    penalties = []
+    for d, (_, penalty) in enumerate(bases):
+        term = np.ones((1, 1))
+        for e, (basis, _) in enumerate(bases):
+            term = np.kron(term, penalty if e == d else np.eye(basis.shape[1]))
+        penalties.append(term * np.trace(design.T @ design) / max(np.trace(term), 1e-12))
+
+    gram = design.T @ design
+    cross = design.T @ y
+    ridge = 1e-8 * np.trace(gram) / len(gram) * np.eye(len(gram))
+
+    def solve(log_lambdas):
+        penalty = ridge + sum(np.exp(l) * s for l, s in zip(log_lambdas, penalties))
+        factor = cho_factor(gram + penalty)
+        return cho_solve(factor, cross), cho_solve(factor, gram)
+
+    def gcv(log_lambdas):
+        coefficients, hat = solve(log_lambdas)
+        rss = y @ y - 2 * coefficients @ cross + coefficients @ gram @ coefficients
+        return n * max(rss, 0.0) / (n - np.trace(hat)) ** 2
+
+    start = np.zeros(p)
+    best = minimize(gcv, start, method='L-BFGS-B', bounds=[(-15.0, 15.0)] * p)
+    coefficients, _ = solve(best.x)
+    return design @ coefficients
+
+
+def _gp_metamodel(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Gaussian process regression of y on a group of inputs.
+
+    Squared-exponential kernel with one length scale per input plus a noise
+    term. Hyperparameters maximize the marginal likelihood on up to
+    _GP_MAX_TRAIN draws; the fit is checked on held-out draws (leave-one-out
+    when there are none) and a surface that does not predict
+    significantly better than the mean is replaced by the mean, so a group
+    without signal gets no value.
+
+    Args:
+        x: Inputs, shape (N, p)
+        y: Outcome, shape (N,)
+
+    Returns:
+        Fitted values E[y | x], shape (N,)
+    """
+    n, p = x.shape
+    order = np.random.default_rng(0).permutation(n)
+    train = np.sort(order[:_GP_MAX_TRAIN])
+    held_out = np.sort(order[_GP_MAX_TRAIN:2 * _GP_MAX_TRAIN])
+    m = len(train)
+    y_mean, y_scale = y[train].mean(), y[train].std() or 1.0
+    target = (y[train] - y_mean) / y_scale
+    squared = [(x[train, d, None] - x[None, train, d]) ** 2 for d in range(p)]
+
+    def unpack(theta):
+        return np.exp(theta[:p]), np.exp(2 * theta[p]), np.exp(2 * theta[p + 1]) + 1e-8
+
+    def negative_log_likelihood(theta):
+        length_scales, signal, noise = unpack(theta)
+        kernel = signal * np.exp(-0.5 * sum(s / l ** 2 for s, l in zip(squared, length_scales)))
+        factor = cho_factor(kernel + noise * np.eye(m))
+        alpha = cho_solve(factor, target)
+        value = 0.5 * target @ alpha + np.log(np.diag(factor[0])).sum()
+
+        # d/dθ = -½ tr((ααᵀ - K⁻¹) dK/dθ)
+        weights = np.outer(alpha, alpha) - cho_solve(factor, np.eye(m))
+        gradient = np.empty(p + 2)
+        for d in range(p):
+            gradient[d] = -0.5 * np.sum(weights * kernel * squared[d]) / length_scales[d] ** 2
+        gradient[p] = -np.sum(weights * kernel)
+        gradient[p + 1] = -(noise - 1e-8) * np.trace(weights)
+        return value, gradient
+
+    # Start from a rough and a near-constant surface; keep the likelier fit
+    bounds = [(-3.0, 5.0)] * p + [(-5.0, 3.0), (-6.0, 2.0)]
+    fits = [
+        minimize(negative_log_likelihood, np.concatenate([np.full(p, log_scale), [0.0, np.log(0.5)]]),
+                 jac=True, method='L-BFGS-B', bounds=bounds)
+        for log_scale in (np.log(np.sqrt(p)), 4.0)
+    ]
+    length_scales, signal, noise = unpack(min(fits, key=lambda fit: fit.fun).x)
+    scaled = x / length_scales
+
+    def posterior_mean(condition, points):
+        kernel = signal * np.exp(-0.5 * cdist(scaled[condition], scaled[condition], 'sqeuclidean'))
+        alpha = cho_solve(cho_factor(kernel + noise * np.eye(len(condition))),
+                          (y[condition] - y_mean) / y_scale)
+        fitted = np.empty(len(points))
+        for start in range(0, len(points), _GP_MAX_CONDITION):
+            block = scaled[points[start:start + _GP_MAX_CONDITION]]
+            fitted[start:start + len(block)] = signal * np.exp(
+                -0.5 * cdist(block, scaled[condition], 'sqeuclidean')) @ alpha
+        return y_mean + y_scale * fitted
+
+    if len(held_out):
+        residuals = y[held_out] - posterior_mean(train, held_out)
+        baseline = y[held_out] - y_mean
+    else:
+        kernel = signal * np.exp(-0.5 * cdist(scaled[train], scaled[train], 'sqeuclidean'))
+        precision = cho_solve(cho_factor(kernel + noise * np.eye(m)), np.eye(m))
+        residuals = (precision @ target) / np.diag(precision)
+        baseline = (target - target.mean()) * m / (m - 1)
+    gain = baseline ** 2 - residuals ** 2
+    if gain.mean() <= 2 * gain.std() / np.sqrt(len(gain)):
+        return np.full(n, y.mean())
+
+    # Posterior mean conditioned on up to _GP_MAX_CONDITION draws
+    return posterior_mean(np.sort(order[:_GP_MAX_CONDITION]), np.arange(n))
+
+
+def _evppi_metamodel(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Regression metamodel for EVPPI: tensor-product GAM for 1-4 inputs, else Gaussian process."""
+    if x.shape[1] <= max(_GAM_BASIS_SIZE):
+        return _gam_metamodel(x, y)
+    return _gp_metamodel(x, y)
+
 
 class ProbabilisticSensitivityAnalysis:
     """
@@ -228,29 +611,38 @@ class ProbabilisticSensitivityAnalysis:
             base_params: Base case model parameters
             prob_params: Probabilistic parameter distributions
             n_iterations: Number of Monte Carlo iterations
-            random_seed: Random seed for reproducibility
+            random_seed: Random seed for reproducibility (None leaves the
+                         global random state untouched)
         """
         self.base_params = base_params
         self.prob_params = prob_params
         self.n_iterations = n_iterations
         self.random_seed = random_seed
         self.results = None
+        self.store = None
+        self.inputs = None
+        self.scenarios = None
 
         # Set random seed
-        np.random.seed(random_seed)
+        if random_seed is not None:
+            np.random.seed(random_seed)
 
-    def sample_parameters(self) -> EnhancedModelParameters:
+    def sample_parameters(self, rng: np.random.Generator = None) -> EnhancedModelParameters:
         """
         Sample one set of parameters from distributions.
 
+        Args:
+            rng: Generator to draw from (default: global np.random state)
+
         Returns:
             EnhancedModelParameters with sampled values
         """
+        random = np.random if rng is None else rng
         params = EnhancedModelParameters()
 
         # Sample utilities (Beta distributions, then apply Lowe multiplier)
         for state, (alpha, beta) in self.prob_params.utility_distributions.items():
-            sampled = np.random.beta(alpha, beta)
+            sampled = random.beta(alpha, beta)
             params.base_utilities[state] = sampled
 
         # Recalculate utilities with Lowe multiplier
@@ -262,35 +654,32 @@ class ProbabilisticSensitivityAnalysis:
 
         # Sample costs (Gamma distributions)
         for state, (shape, scale) in self.prob_params.cost_distributions.items():
-            params.annual_costs[state] = np.random.gamma(shape, scale)
+            params.annual_costs[state] = random.gamma(shape, scale)
 
         # Sample mortality relative risks (Lognormal)
         for state, (mu, sigma) in self.prob_params.mortality_rr_distributions.items():
-            params.ckd_relative_risks[state] = np.random.lognormal(mu, sigma)
+            params.ckd_relative_risks[state] = random.lognormal(mu, sigma)
 
         # Sample decline rates (Normal, truncated at 0)
-        params.decline_rate_early = max(0.1, np.random.normal(
+        params.decline_rate_early = max(0.1, random.normal(
             *self.prob_params.decline_rate_distributions['natural_early']
         ))
-        params.decline_rate_middle = max(0.1, np.random.normal(
+        params.decline_rate_middle = max(0.1, random.normal(
             *self.prob_params.decline_rate_distributions['natural_middle']
         ))
-        params.decline_rate_late = max(0.1, np.random.normal(
+        params.decline_rate_late = max(0.1, random.normal(
             *self.prob_params.decline_rate_distributions['natural_late']
         ))
 
         # Sample discount rate (Beta scaled to 0-0.06)
         alpha_d, beta_d = self.prob_params.discount_rate_distribution
-        params.discount_rate = np.random.beta(alpha_d, beta_d) * 0.06
+        params.discount_rate = random.beta(alpha_d, beta_d) * 0.06
 
         # Sample caregiver disutilities (Beta scaled to negative)
         for age_group, (alpha, beta) in self.prob_params.caregiver_disutility_distributions.items():
-            sampled = np.random.beta(alpha, beta)
+            sampled = random.beta(alpha, beta)
             params.caregiver_params.caregiver_disutility_by_age[age_group] = -sampled
 
-        # Reload life table (same for all iterations)
-        params.background_mortality = load_dst_life_table()
-
         # Preserve gene therapy cost from base params (critical for correct ICERs!)
         params.gene_therapy_cost = self.base_params.gene_therapy_cost
 
@@ -298,14 +687,30 @@ class ProbabilisticSensitivityAnalysis:
 
     def run_psa(
         self,
-        scenarios: Dict[str, Dict] = None
+        scenarios: Dict[str, Dict] = None,
+        n_processes: int = None,
+        chunk_size: int = 100,
+        sampler: str = None
     ) -> pd.DataFrame:
         """
         Run PSA for multiple scenarios.
 
+        By default parameters are drawn serially from the global random state
+        seeded in __init__. If n_processes is given, iteration i instead draws
+        from its own generator spawned from SeedSequence(random_seed), and
+        chunks of iterations are evaluated on a process pool. Results of this
+        mode depend only on random_seed, not on n_processes or chunk_size.
+
+        If sampler is given ('random', 'lhs' or 'sobol'), the whole
+        (n_iterations × n_params) input matrix is drawn at once from that
+        design (see sample_inputs) and evaluated in one batched pass.
+
         Args:
             scenarios: Dictionary of scenario configurations
                       If None, uses default scenarios (Natural history + Realistic treatment)
+            n_processes: Number of worker processes (None = serial global-RNG run)
+            chunk_size: Iterations per worker task when n_processes is given
+            sampler: Design for whole-matrix sampling (None = per-iteration draws)
 
         Returns:
             DataFrame with PSA results
@@ -323,92 +728,328 @@ class ProbabilisticSensitivityAnalysis:
                 }
             }
 
-        results_list = []
+        self.scenarios = scenarios
+        self.store = PSAResultStore.allocate(self.n_iterations, list(scenarios.keys()))
 
         print(f"Running PSA with {self.n_iterations} iterations...")
-        for i in tqdm(range(self.n_iterations)):
+        if sampler is not None:
+            self.inputs = self.sample_inputs(scenarios, method=sampler)
+            outcomes = self._evaluate_inputs(self.inputs, scenarios)
+            for scenario_name, scenario_outcomes in outcomes.items():
+                self.store.store_scenario(scenario_name, scenario_outcomes)
+        elif n_processes is None:
+            outcomes, inputs = self._run_iterations(
+                scenarios, [None] * self.n_iterations, progress=True
+            )
+            for scenario_name, scenario_outcomes in outcomes.items():
+                self.store.store_scenario(scenario_name, scenario_outcomes)
+            self.inputs = pd.DataFrame(inputs)
+        else:
+            # One independent stream per iteration, split into chunks of work
+            seeds = np.random.SeedSequence(self.random_seed).spawn(self.n_iterations)
+            starts = range(0, self.n_iterations, chunk_size)
+            tasks = [
+                (self.prob_params, self.base_params.gene_therapy_cost, scenarios,
+                 seeds[start:start + chunk_size])
+                for start in starts
+            ]
+
+            if n_processes == 1:
+                chunk_results = map(_run_psa_chunk, tasks)
+            else:
+                pool = Pool(processes=n_processes)
+                chunk_results = pool.imap(_run_psa_chunk, tasks)
+
+            input_chunks = []
+            try:
+                for start, (outcomes, inputs) in tqdm(zip(starts, chunk_results), total=len(tasks)):
+                    rows = slice(start, start + chunk_size)
+                    for scenario_name, scenario_outcomes in outcomes.items():
+                        self.store.store_scenario(scenario_name, scenario_outcomes, rows)
+                    input_chunks.append(pd.DataFrame(inputs))
+            finally:
+                if n_processes != 1:
+                    pool.close()
+                    pool.join()
+            self.inputs = pd.concat(input_chunks, ignore_index=True)
+
+        self.results = self.store.to_dataframe()
+        return self.results
+
+    def _run_iterations(
+        self,
+        scenarios: Dict[str, Dict],
+        rngs: List[Optional[np.random.Generator]],
+        progress: bool = False
+    ) -> Tuple[Dict[str, Dict[str, np.ndarray]], Dict[str, np.ndarray]]:
+        """
+        Sample parameters for a block of iterations and run each scenario batched.
+
+        Args:
+            scenarios: Dictionary of scenario configurations
+            rngs: One generator per iteration (None = global random state)
+            progress: Whether to show a progress bar while sampling
+
+        Returns:
+            Tuple of (run_model_batch outcomes by scenario, sampled input
+            columns keyed by parameter path, see sampled_inputs)
+        """
+        n_iterations = len(rngs)
+        inputs = None
+
+        for i in tqdm(range(n_iterations), disable=not progress):
+            rng = rngs[i]
+            random = np.random if rng is None else rng
+
             # Sample parameters
-            params_sample = self.sample_parameters()
+            params_sample = self.sample_parameters(rng)
 
-            # Run model for each scenario with sampled parameters
-            for scenario_name, config in scenarios.items():
-                model = MarkovCohortModel(params_sample)
+            sampled = self.sampled_inputs(params_sample)
+            if inputs is None:
+                inputs = {key: np.zeros(n_iterations) for key in sampled}
+            for key, value in sampled.items():
+                inputs[key][i] = value
 
-                # Determine decline rate
+            # Determine decline rate for each treatment scenario with sampled parameters
+            for scenario_name, config in scenarios.items():
                 if config['decline_rate'] == 'natural':
-                    decline_rate = params_sample.natural_decline_rate
-                else:
-                    decline_rate = config['decline_rate']
-                    # Sample treatment effect uncertainty
-                    if 'treatment_optimistic' in str(decline_rate):
-                        decline_rate = max(0.1, np.random.normal(
-                            *self.prob_params.decline_rate_distributions['treatment_optimistic']
-                        ))
-                    elif abs(decline_rate - 0.52) < 0.01:
-                        decline_rate = max(0.1, np.random.normal(
-                            *self.prob_params.decline_rate_distributions['treatment_realistic']
-                        ))
-
-                result = model.run_model(
-                    egfr_decline_rate=decline_rate,
-                    scenario_name=scenario_name,
-                    include_gene_therapy_cost=config.get('include_gt_cost', False)
-                )
+                    continue
+                decline_rate = config['decline_rate']
+                # Sample treatment effect uncertainty
+                distribution = self._treatment_distribution(decline_rate)
+                if distribution is not None:
+                    decline_rate = max(0.1, random.normal(
+                        *self.prob_params.decline_rate_distributions[distribution]
+                    ))
+                inputs.setdefault(
+                    f'treatment_decline_rate.{scenario_name}', np.zeros(n_iterations)
+                )[i] = decline_rate
+
+        return self._evaluate_inputs(inputs, scenarios), inputs
+
+    @staticmethod
+    def _treatment_distribution(decline_rate) -> Optional[str]:
+        """Name of the decline rate distribution sampled for a treatment scenario, if any."""
+        if 'treatment_optimistic' in str(decline_rate):
+            return 'treatment_optimistic'
+        elif abs(decline_rate - 0.52) < 0.01:
+            return 'treatment_realistic'
+        return None
+
+    def _evaluate_inputs(
+        self,
+        inputs: Dict[str, np.ndarray],
+        scenarios: Dict[str, Dict]
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Run every scenario for a block of sampled inputs with the batched engine.
 
-                results_list.append({
-                    'iteration': i,
-                    'scenario': scenario_name,
-                    'total_costs': result['total_costs'],
-                    'total_qalys': result['total_qalys'],
-                    'life_years': result['life_years'],
-                    'time_to_eskd': result['time_to_eskd']
-                })
+        Parameters missing from inputs keep their default values, as in
+        sample_parameters.
 
-        self.results = pd.DataFrame(results_list)
-        return self.results
+        Args:
+            inputs: Sampled values keyed by parameter path (see sampled_inputs),
+                    plus 'treatment_decline_rate.<scenario>' for treatment scenarios
+            scenarios: Dictionary of scenario configurations
 
-    def calculate_icers(self) -> pd.DataFrame:
+        Returns:
+            Dictionary of run_model_batch outcomes by scenario
         """
-        Calculate incremental cost-effectiveness ratios for each iteration.
+        # Non-sampled parameters are the defaults, with the base case price
+        reference_params = EnhancedModelParameters()
+        reference_params.gene_therapy_cost = self.base_params.gene_therapy_cost
+        model = MarkovCohortModel(reference_params)
+        draws = ParameterDraws.from_inputs(inputs, reference_params)
+
+        # Run all iterations of each scenario in one batched pass
+        outcomes = {}
+        for scenario_name, config in scenarios.items():
+            treatment_path = f'treatment_decline_rate.{scenario_name}'
+            if config['decline_rate'] == 'natural':
+                decline_rates = np.full(len(draws), reference_params.natural_decline_rate)
+            elif treatment_path in inputs:
+                decline_rates = np.asarray(inputs[treatment_path], dtype=float)
+            else:
+                decline_rates = np.full(len(draws), float(config['decline_rate']))
+            outcomes[scenario_name] = model.run_model_batch(
+                egfr_decline_rates=decline_rates,
+                draws=draws,
+                include_gene_therapy_cost=config.get('include_gt_cost', False)
+            )
+        return outcomes
+
+    def sample_inputs(
+        self,
+        scenarios: Dict[str, Dict],
+        method: str = 'lhs'
+    ) -> pd.DataFrame:
+        """
+        Sample all iterations at once from a design mapped through the inverse CDFs.
+
+        Args:
+            scenarios: Dictionary of scenario configurations
+            method: Design passed to sample_unit_hypercube ('random', 'lhs', 'sobol')
 
         Returns:
-            DataFrame with incremental results and ICERs
+            DataFrame of sampled inputs, one row per iteration, in the
+            sampled_inputs layout plus treatment decline rates per scenario
         """
-        if self.results is None:
-            raise ValueError("Must run run_psa() first")
+        if method == 'random':
+            rng = np.random.default_rng(self.random_seed)
+            sampled = self.prob_params.sample(self.n_iterations, rng)
+        else:
+            n_dims = len(self.prob_params.distributions())
+            u = sample_unit_hypercube(self.n_iterations, n_dims, method, seed=self.random_seed)
+            sampled = self.prob_params.ppf(u)
+
+        treatment_columns = [c for c in sampled.columns if c.startswith('decline_rate_distributions.')]
+        inputs = sampled.drop(columns=treatment_columns)
+        for scenario_name, config in scenarios.items():
+            if config['decline_rate'] == 'natural':
+                continue
+            distribution = self._treatment_distribution(config['decline_rate'])
+            if distribution is None:
+                inputs[f'treatment_decline_rate.{scenario_name}'] = float(config['decline_rate'])
+            else:
+                inputs[f'treatment_decline_rate.{scenario_name}'] = (
+                    sampled[f'decline_rate_distributions.{distribution}']
+                )
+        return inputs
+
+    def sampled_inputs(self, params: EnhancedModelParameters) -> Dict[str, float]:
+        """
+        Flatten the probabilistic inputs of one sampled parameter set.
 
-        # Pivot to get baseline and intervention columns
-        baseline_name = 'Natural History'
-        intervention_scenarios = [s for s in self.results['scenario'].unique() if s != baseline_name]
+        Keys are parameter paths, e.g. 'annual_costs.ESKD' or
+        'caregiver_params.caregiver_disutility_by_age.0-5'.
 
-        icer_results = []
+        Args:
+            params: Sampled parameters
 
-        for scenario in intervention_scenarios:
-            for iteration in range(self.n_iterations):
-                baseline = self.results[
-                    (self.results['scenario'] == baseline_name) &
-                    (self.results['iteration'] == iteration)
-                ].iloc[0]
+        Returns:
+            Dictionary of parameter path to sampled value
+        """
+        values = {}
+        for state in self.prob_params.utility_distributions:
+            values[f'base_utilities.{state}'] = params.base_utilities[state]
+        for state in self.prob_params.cost_distributions:
+            values[f'annual_costs.{state}'] = params.annual_costs[state]
+        for state in self.prob_params.mortality_rr_distributions:
+            values[f'ckd_relative_risks.{state}'] = params.ckd_relative_risks[state]
+        values['decline_rate_early'] = params.decline_rate_early
+        values['decline_rate_middle'] = params.decline_rate_middle
+        values['decline_rate_late'] = params.decline_rate_late
+        values['discount_rate'] = params.discount_rate
+        for age_group, value in params.caregiver_params.caregiver_disutility_by_age.items():
+            values[f'caregiver_params.caregiver_disutility_by_age.{age_group}'] = value
+        return values
+
+    def _incremental_outcomes(
+        self,
+        baseline_name: str = 'Natural History'
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Per-iteration incremental costs and QALYs of each scenario vs baseline.
 
-                intervention = self.results[
-                    (self.results['scenario'] == scenario) &
-                    (self.results['iteration'] == iteration)
-                ].iloc[0]
+        Args:
+            baseline_name: Comparator scenario
 
-                inc_costs = intervention['total_costs'] - baseline['total_costs']
-                inc_qalys = intervention['total_qalys'] - baseline['total_qalys']
+        Returns:
+            Dictionary of (incremental_costs, incremental_qalys) arrays by scenario
+        """
+        if self.store is None:
+            raise ValueError("Must run run_psa() first")
 
-                icer = inc_costs / inc_qalys if inc_qalys > 0 else np.inf
+        baseline = self.store.column(baseline_name)
+        incremental = {}
+        for scenario in self.store.scenario_names:
+            if scenario == baseline_name:
+                continue
+            j = self.store.column(scenario)
+            incremental[scenario] = (
+                self.store.total_costs[:, j] - self.store.total_costs[:, baseline],
+                self.store.total_qalys[:, j] - self.store.total_qalys[:, baseline]
+            )
+        return incremental
 
-                icer_results.append({
-                    'iteration': iteration,
-                    'scenario': scenario,
-                    'incremental_costs': inc_costs,
-                    'incremental_qalys': inc_qalys,
-                    'icer': icer
-                })
+    def calculate_icers(self) -> pd.DataFrame:
+        """
+        Calculate incremental cost-effectiveness ratios for each iteration.
+
+        Returns:
+            DataFrame with incremental results and ICERs
+        """
+        icer_frames = []
+        for scenario, (inc_costs, inc_qalys) in self._incremental_outcomes().items():
+            # ICER is undefined (inf) when the intervention does not gain QALYs
+            icer = np.full(self.store.n_iterations, np.inf)
+            np.divide(inc_costs, inc_qalys, out=icer, where=inc_qalys > 0)
+
+            icer_frames.append(pd.DataFrame({
+                'iteration': np.arange(self.store.n_iterations),
+                'scenario': scenario,
+                'incremental_costs': inc_costs,
+                'incremental_qalys': inc_qalys,
+                'icer': icer
+            }))
+
+        return pd.concat(icer_frames, ignore_index=True)
+
+    def calculate_evppi(
+        self,
+        threshold: float = 150000,
+        parameter_groups: Dict[str, List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Expected value of partial perfect information for parameter groups.
+
+        Uses the regression approach: the incremental net monetary benefit of
+        each scenario vs natural history is regressed on the sampled inputs
+        of a group, and EVPPI = E[max fitted INMB] − max E[INMB], with the
+        comparator at 0. This reuses the PSA draws instead of nested Monte
+        Carlo. The metamodel is a tensor-product spline GAM for groups of up
+        to four inputs and a Gaussian process for larger groups.
+
+        Args:
+            threshold: WTP threshold (€/QALY)
+            parameter_groups: Group name → input path prefixes
+                              (default EVPPI_PARAMETER_GROUPS)
 
-        return pd.DataFrame(icer_results)
+        Returns:
+            DataFrame with EVPPI and EVPI per parameter group
+        """
+        if self.inputs is None:
+            raise ValueError("Must run run_psa() first")
+        if parameter_groups is None:
+            parameter_groups = EVPPI_PARAMETER_GROUPS
+
+        # Incremental net benefit per iteration, comparator column = 0
+        inc_nmb = np.column_stack([np.zeros(self.store.n_iterations)] + [
+            threshold * inc_qalys - inc_costs
+            for inc_costs, inc_qalys in self._incremental_outcomes().values()
+        ])
+        evpi = inc_nmb.max(axis=1).mean() - inc_nmb.mean(axis=0).max()
+
+        evppi_data = []
+        for group, prefixes in parameter_groups.items():
+            columns = [c for c in self.inputs.columns if c.startswith(tuple(prefixes))]
+            x = self.inputs[columns].to_numpy()
+            x = (x - x.mean(axis=0)) / np.where(x.std(axis=0) > 0, x.std(axis=0), 1.0)
+
+            fitted = np.zeros_like(inc_nmb)
+            for j in range(1, inc_nmb.shape[1]):
+                fitted[:, j] = _evppi_metamodel(x, inc_nmb[:, j])
+            evppi = max(fitted.max(axis=1).mean() - fitted.mean(axis=0).max(), 0.0)
+
+            evppi_data.append({
+                'threshold': threshold,
+                'parameter_group': group,
+                'n_parameters': len(columns),
+                'evppi': evppi,
+                'evpi': evpi
+            })
+
+        return pd.DataFrame(evppi_data)
 
     def plot_ce_plane(
         self,
@@ -493,7 +1134,11 @@ class ProbabilisticSensitivityAnalysis:
         """
         Calculate Cost-Effectiveness Acceptability Curve.
 
-        For each threshold, calculates probability that intervention is cost-effective.
+        For each threshold λ, calculates the probability that the incremental
+        net monetary benefit λ·ΔQALY − ΔCost of each scenario vs natural
+        history is non-negative. Each iteration switches at the breakpoint
+        ΔCost/ΔQALY (upwards if QALYs are gained, downwards if lost), so all
+        thresholds are evaluated by searching sorted breakpoints.
 
         Args:
             thresholds: Array of WTP thresholds to test
@@ -503,24 +1148,126 @@ class ProbabilisticSensitivityAnalysis:
         """
         if thresholds is None:
             thresholds = np.linspace(0, 500000, 100)
+        thresholds = np.asarray(thresholds, dtype=float)
+
+        incremental = self._incremental_outcomes()
+        probabilities = np.zeros((len(thresholds), len(incremental)))
+
+        for j, (inc_costs, inc_qalys) in enumerate(incremental.values()):
+            gains = inc_qalys > 0
+            losses = inc_qalys < 0
+
+            # Cost-effective for λ >= breakpoint when gaining QALYs, λ <= breakpoint when losing
+            gain_breaks = np.sort(inc_costs[gains] / inc_qalys[gains])
+            loss_breaks = np.sort(inc_costs[losses] / inc_qalys[losses])
+            n_cost_effective = (
+                np.searchsorted(gain_breaks, thresholds, side='right')
+                + len(loss_breaks) - np.searchsorted(loss_breaks, thresholds, side='left')
+                + np.count_nonzero(inc_costs[~gains & ~losses] <= 0)
+            )
+            probabilities[:, j] = n_cost_effective / len(inc_costs)
 
-        icer_df = self.calculate_icers()
-        scenarios = icer_df['scenario'].unique()
+        return pd.DataFrame({
+            'threshold': np.repeat(thresholds, len(incremental)),
+            'scenario': np.tile(list(incremental.keys()), len(thresholds)),
+            'probability_cost_effective': probabilities.ravel()
+        })
 
-        ceac_data = []
+    def calculate_ceaf(
+        self,
+        thresholds: np.ndarray = None
+    ) -> pd.DataFrame:
+        """
+        Calculate Cost-Effectiveness Acceptability Frontier and EVPI.
 
-        for threshold in thresholds:
-            for scenario in scenarios:
-                scenario_icers = icer_df[icer_df['scenario'] == scenario]['icer']
-                prob_ce = (scenario_icers <= threshold).mean()
+        Net monetary benefit λ·QALY − Cost is broadcast over (thresholds ×
+        iterations × scenarios), in blocks of thresholds to bound memory.
+        At each threshold the frontier is the scenario with the highest
+        expected net benefit; EVPI is the expected gain from choosing the
+        best scenario in every iteration, E[max NMB] − max E[NMB].
 
-                ceac_data.append({
-                    'threshold': threshold,
-                    'scenario': scenario,
-                    'probability_cost_effective': prob_ce
-                })
+        Args:
+            thresholds: Array of WTP thresholds to test
+
+        Returns:
+            DataFrame with one row per threshold: optimal_scenario,
+            probability_cost_effective (probability the optimal scenario
+            has the highest NMB), expected_nmb and evpi
+        """
+        if self.store is None:
+            raise ValueError("Must run run_psa() first")
+        if thresholds is None:
+            thresholds = np.linspace(0, 500000, 100)
+        thresholds = np.asarray(thresholds, dtype=float)
+
+        costs = self.store.total_costs
+        qalys = self.store.total_qalys
+        optimal = np.zeros(len(thresholds), dtype=int)
+        probability_optimal = np.zeros(len(thresholds))
+        expected_nmb = np.zeros(len(thresholds))
+        evpi = np.zeros(len(thresholds))
+
+        block = max(1, 2**22 // costs.size)
+        for start in range(0, len(thresholds), block):
+            rows = slice(start, start + block)
+            nmb = thresholds[rows, None, None] * qalys - costs
+            mean_nmb = nmb.mean(axis=1)
+
+            optimal[rows] = mean_nmb.argmax(axis=1)
+            probability_optimal[rows] = (nmb.argmax(axis=2) == optimal[rows, None]).mean(axis=1)
+            expected_nmb[rows] = mean_nmb.max(axis=1)
+            evpi[rows] = np.maximum(nmb.max(axis=2).mean(axis=1) - expected_nmb[rows], 0)
+
+        return pd.DataFrame({
+            'threshold': thresholds,
+            'optimal_scenario': np.array(self.store.scenario_names)[optimal],
+            'probability_cost_effective': probability_optimal,
+            'expected_nmb': expected_nmb,
+            'evpi': evpi
+        })
+
+    def value_based_prices(
+        self,
+        thresholds: List[float] = None,
+        baseline_name: str = 'Natural History'
+    ) -> ValueBasedPrices:
+        """
+        Maximum justifiable gene therapy price in every PSA iteration.
+
+        Applies the value-based pricing formulas of
+        ScenarioAnalysis.value_based_pricing_analysis to each draw. Costs
+        exclude the fixed gene therapy price for scenarios that include it,
+        and evLYG uses the comparator's QALYs per life year in the same draw.
+
+        Args:
+            thresholds: WTP thresholds. Default: [100K, 150K, 300K]
+            baseline_name: Comparator scenario
 
-        return pd.DataFrame(ceac_data)
+        Returns:
+            ValueBasedPrices with one draw per PSA iteration
+        """
+        if self.store is None:
+            raise ValueError("Must run run_psa() first")
+        if thresholds is None:
+            thresholds = [100000, 150000, 300000]
+
+        baseline = self.store.column(baseline_name)
+        baseline_qalys = self.store.total_qalys[:, baseline]
+        baseline_lys = self.store.life_years[:, baseline]
+        reference_utility = np.full(self.store.n_iterations, 0.6)
+        np.divide(baseline_qalys, baseline_lys, out=reference_utility, where=baseline_lys > 0)
+
+        incremental = self._incremental_outcomes(baseline_name)
+        inc_qalys = np.array([qalys for _, qalys in incremental.values()])
+        evlyg = np.zeros_like(inc_qalys)
+        np.divide(inc_qalys, reference_utility, out=evlyg, where=reference_utility > 0)
+        costs_excl_gt = np.array([
+            inc_costs - (self.base_params.gene_therapy_cost
+                         if self.scenarios[scenario].get('include_gt_cost', False) else 0.0)
+            for scenario, (inc_costs, _) in incremental.items()
+        ])
+
+        return ValueBasedPrices.solve(list(incremental), inc_qalys, evlyg, costs_excl_gt, thresholds)
 
     def plot_ceac(
         self,
@@ -580,6 +1327,29 @@ class ProbabilisticSensitivityAnalysis:
         return fig
 
 
+def _run_psa_chunk(args: Tuple) -> Tuple[Dict[str, Dict[str, np.ndarray]], Dict[str, np.ndarray]]:
+    """
+    Worker for parallel PSA: run one chunk of iterations from their seeds.
+
+    Args:
+        args: (prob_params, gene_therapy_cost, scenarios, seed_sequences)
+              for the chunk
+
+    Returns:
+        Tuple of (outcomes by scenario, sampled input columns)
+    """
+    prob_params, gene_therapy_cost, scenarios, seed_sequences = args
+
+    # Rebuild the sampler from its inputs instead of shipping the whole PSA
+    base_params = EnhancedModelParameters()
+    base_params.gene_therapy_cost = gene_therapy_cost
+    psa = ProbabilisticSensitivityAnalysis(
+        base_params, prob_params, n_iterations=len(seed_sequences), random_seed=None
+    )
+    rngs = [np.random.default_rng(seed) for seed in seed_sequences]
+    return psa._run_iterations(scenarios, rngs)
+
+
 # =============================================================================
 # 4. STARTING AGE SCENARIOS WITH HEATMAP
 # =============================================================================
@@ -639,8 +1409,8 @@ class StartingAgeAnalysis:
             avg_decline = 2.0  # approximate average
             params_age.starting_egfr = max(30, 95 - years_from_birth * avg_decline)
 
-            baseline_model = MarkovCohortModel(params_age)
-            baseline_results = baseline_model.run_model(
+            baseline_results = RUN_CACHE.run_model(
+                params_age,
                 egfr_decline_rate=params_age.natural_decline_rate,
                 scenario_name=f"Natural History (age {age})",
                 include_gene_therapy_cost=False
@@ -648,6 +1418,7 @@ class StartingAgeAnalysis:
             baselines[age] = baseline_results
 
         # Run each age × scenario combination
+        costs_excl_gt = []
         print(f"Running age scenarios: {len(ages)} ages × {len(decline_rates)} scenarios...")
         for age in tqdm(ages):
             for scenario_name, decline_rate in decline_rates.items():
@@ -672,11 +1443,9 @@ class StartingAgeAnalysis:
                 inc_qalys = results['total_qalys'] - baseline['total_qalys']
                 icer = inc_costs / inc_qalys if inc_qalys > 0 else np.inf
 
-                # Calculate max price at thresholds
-                costs_excl_gt = (results['total_costs'] - self.params.gene_therapy_cost) - baseline['total_costs']
-                max_price_100k = max(0, (100000 * inc_qalys) - costs_excl_gt)
-                max_price_150k = max(0, (150000 * inc_qalys) - costs_excl_gt)
-                max_price_300k = max(0, (300000 * inc_qalys) - costs_excl_gt)
+                costs_excl_gt.append(
+                    (results['total_costs'] - self.params.gene_therapy_cost) - baseline['total_costs']
+                )
 
                 results_list.append({
                     'Starting Age': age,
@@ -688,13 +1457,22 @@ class StartingAgeAnalysis:
                     'Life Years': results['life_years'],
                     'Incremental Costs': inc_costs,
                     'Incremental QALYs': inc_qalys,
-                    'ICER': icer,
-                    'Max Price €100K': max_price_100k,
-                    'Max Price €150K': max_price_150k,
-                    'Max Price €300K': max_price_300k
+                    'ICER': icer
                 })
 
         self.results = pd.DataFrame(results_list)
+
+        # Max price at thresholds, solved for all age × scenario rows at once
+        thresholds = [100000, 150000, 300000]
+        prices = ValueBasedPrices.solve(
+            self.results['Scenario'],
+            self.results['Incremental QALYs'],
+            np.zeros(len(self.results)),
+            costs_excl_gt,
+            thresholds
+        )
+        for j, threshold in enumerate(thresholds):
+            self.results[f'Max Price {threshold_label(threshold)}'] = prices.price('QALY')[:, j]
         return self.results
 
     def plot_heatmap(
@@ -1225,7 +2003,9 @@ def _plot_qaly_accumulation(baseline_results: Dict, treatment_results: Dict, out
 def run_enhanced_analysis(
     output_dir: str = '/home/user/HTA-Report/Models/Lowe_HTA/outputs',
     save_results: bool = True,
-    n_psa_iterations: int = 1000
+    n_psa_iterations: int = 1000,
+    n_psa_processes: int = None,
+    probabilistic_pricing: bool = False
 ) -> Dict:
     """
     Run complete enhanced analysis with all new features.
@@ -1234,6 +2014,9 @@ def run_enhanced_analysis(
         output_dir: Directory to save outputs
         save_results: Whether to save results to files
         n_psa_iterations: Number of PSA iterations
+        n_psa_processes: Worker processes for PSA (None = serial run)
+        probabilistic_pricing: Also solve the max justifiable price in every
+                               PSA iteration and report its distribution
 
     Returns:
         Dictionary with all results
@@ -1261,8 +2044,8 @@ def run_enhanced_analysis(
     print("\nCalculating maximum justifiable gene therapy price...")
 
     # Run base case scenario to get health benefits
-    baseline_model = MarkovCohortModel(params)
-    baseline_results = baseline_model.run_model(
+    baseline_results = RUN_CACHE.run_model(
+        params,
         egfr_decline_rate=params.natural_decline_rate,
         scenario_name="Natural History",
         include_gene_therapy_cost=False
@@ -1322,7 +2105,7 @@ def run_enhanced_analysis(
         n_iterations=n_psa_iterations
     )
 
-    psa_results = psa.run_psa()
+    psa_results = psa.run_psa(n_processes=n_psa_processes)
     results['psa_results'] = psa_results
 
     # Calculate ICERs
@@ -1337,15 +2120,49 @@ def run_enhanced_analysis(
     print(f"  Median ICER: €{icer_df['icer'].median():,.0f}/QALY")
     print(f"  95% CI: [€{icer_df['icer'].quantile(0.025):,.0f}, €{icer_df['icer'].quantile(0.975):,.0f}]")
 
-    # Calculate probability cost-effective at key thresholds
-    prob_100k = (icer_df['icer'] <= 100000).mean()
-    prob_150k = (icer_df['icer'] <= 150000).mean()
-    prob_300k = (icer_df['icer'] <= 300000).mean()
+    # Calculate probability cost-effective and EVPI at key thresholds
+    key_thresholds = np.array([100000, 150000, 300000])
+    ceac_df = psa.calculate_ceac(key_thresholds).set_index(['scenario', 'threshold'])
+    prob_100k, prob_150k, prob_300k = (
+        ceac_df.loc[('Realistic Treatment', threshold), 'probability_cost_effective']
+        for threshold in key_thresholds
+    )
+    ceaf_df = psa.calculate_ceaf(key_thresholds)
+    results['psa_ceaf'] = ceaf_df
 
     print(f"\nProbability Cost-Effective:")
     print(f"  At €100K/QALY: {prob_100k*100:.1f}%")
     print(f"  At €150K/QALY (standard): {prob_150k*100:.1f}%")
     print(f"  At €300K/QALY: {prob_300k*100:.1f}%")
+    print(f"\nEVPI per patient:")
+    for _, row in ceaf_df.iterrows():
+        print(f"  At €{row['threshold']/1000:.0f}K/QALY: €{row['evpi']:,.0f}")
+
+    evppi_df = psa.calculate_evppi(threshold=150000)
+    results['psa_evppi'] = evppi_df
+
+    print(f"\nEVPPI per patient at €150K/QALY:")
+    for _, row in evppi_df.iterrows():
+        print(f"  {row['parameter_group']}: €{row['evppi']:,.0f}")
+
+    if probabilistic_pricing:
+        # Max price per iteration from the same draws (the fixed PSA price
+        # is netted out, so no PSA rerun per candidate price)
+        price_draws = psa.value_based_prices(key_thresholds)
+        price_df = price_draws.quantiles().merge(
+            price_draws.price_at_probability((0.5, 0.8, 0.95)),
+            on=['Scenario', 'Threshold', 'Metric']
+        )
+        results['psa_value_based_prices'] = price_df
+
+        standard = price_df[(price_df['Threshold'] == target_threshold) & (price_df['Metric'] == 'QALY')]
+        print(f"\nProbabilistic Max Price at €{target_threshold/1000:.0f}K/QALY:")
+        for _, row in standard.iterrows():
+            print(f"  {row['Scenario']}: mean €{row['Mean']:,.0f}, "
+                  f"95% CI [€{row['Q2.5']:,.0f}, €{row['Q97.5']:,.0f}]")
+            for probability in (50, 80, 95):
+                print(f"    Price with {probability}% probability cost-effective: "
+                      f"€{row[f'P(CE) {probability}%']:,.0f}")
 
     # Generate plots
     if save_results:
@@ -1353,6 +2170,10 @@ def run_enhanced_analysis(
         psa.plot_ceac(save_path=os.path.join(output_dir, 'psa_ceac.png'))
         psa_results.to_csv(os.path.join(output_dir, 'psa_results.csv'), index=False)
         icer_df.to_csv(os.path.join(output_dir, 'psa_icers.csv'), index=False)
+        psa.inputs.to_csv(os.path.join(output_dir, 'psa_inputs.csv'), index=False)
+        evppi_df.to_csv(os.path.join(output_dir, 'psa_evppi.csv'), index=False)
+        if probabilistic_pricing:
+            price_df.to_csv(os.path.join(output_dir, 'psa_value_based_prices.csv'), index=False)
 
     print()
 
@@ -1374,8 +2195,8 @@ def run_enhanced_analysis(
     }
 
     for scenario_name, config in scenario_configs.items():
-        model = MarkovCohortModel(params)
-        result = model.run_model(
+        result = RUN_CACHE.run_model(
+            params,
             egfr_decline_rate=config['decline_rate'],
             scenario_name=scenario_name,
             include_gene_therapy_cost=config['include_gt_cost']
@@ -1446,5 +2267,6 @@ if __name__ == "__main__":
     results = run_enhanced_analysis(
         output_dir='/home/user/HTA-Report/Models/Lowe_HTA/outputs',
         save_results=True,
-        n_psa_iterations=1000  # Use 10000 for publication
+        n_psa_iterations=1000,  # Use 10000 for publication
+        probabilistic_pricing=True
     )
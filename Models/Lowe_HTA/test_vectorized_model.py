@@ -0,0 +1,689 @@
+"""
+Tests that the vectorized model components reproduce the original scalar logic.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from markov_cua_model import (
+    ModelParameters,
+    ParameterDraws,
+    MarkovCohortModel,
+    RunCache,
+    RUN_CACHE,
+    SensitivityAnalysis,
+    ValueBasedPrices,
+    load_dst_life_table,
+)
+from markov_cua_model_enhanced import (
+    EnhancedModelParameters,
+    ProbabilisticParameters,
+    ProbabilisticSensitivityAnalysis,
+    PSAResultStore,
+    sample_unit_hypercube,
+)
+
+
+def test_transition_matrix_matches_cell_by_cell():
+    """Vectorized transition matrix equals per-cell calculate_transition_probability."""
+    model = MarkovCohortModel(ModelParameters())
+
+    for age in [0, 5, 15, 32, 80, 120]:
+        for cohort_egfr in [None, 150.0, 95.0, 61.0, 44.9, 15.2, 3.0]:
+            for decline in [0.0, 0.52, 2.1, 4.2]:
+                matrix = model.build_transition_matrix(decline, age, cohort_egfr)
+
+                expected = np.zeros((model.n_states, model.n_states))
+                for i, from_state in enumerate(model.states):
+                    if cohort_egfr is None:
+                        if from_state == 'Death':
+                            current_egfr = 0
+                        else:
+                            lower, upper = model.params.ckd_thresholds[from_state]
+                            current_egfr = (lower + upper) / 2
+                    else:
+                        current_egfr = cohort_egfr
+                    for j, to_state in enumerate(model.states):
+                        expected[i, j] = model.calculate_transition_probability(
+                            from_state, to_state, decline, current_egfr, age
+                        )
+                expected = expected / expected.sum(axis=1, keepdims=True)
+
+                assert np.allclose(matrix, expected, rtol=0, atol=1e-15)
+                assert np.allclose(matrix.sum(axis=1), 1.0)
+
+    print("✓ Vectorized transition matrix matches scalar construction")
+
+
+def test_egfr_to_state_index_matches_scalar():
+    """Vectorized eGFR → state mapping agrees with egfr_to_state."""
+    model = MarkovCohortModel(ModelParameters())
+    egfr_values = np.array([-5.0, 0.0, 14.99, 15.0, 29.9, 30.0, 45.0, 59.99,
+                            60.0, 89.9, 90.0, 199.0, 250.0])
+
+    indices = model.egfr_to_state_index(egfr_values)
+    for egfr, idx in zip(egfr_values, indices):
+        assert model.states[idx] == model.egfr_to_state(egfr)
+
+    print("✓ Vectorized eGFR → state mapping matches scalar mapping")
+
+
+def test_batched_engine_matches_run_model():
+    """run_model_batch reproduces independent run_model calls per draw."""
+    params = ModelParameters()
+    model = MarkovCohortModel(params)
+    rng = np.random.default_rng(0)
+
+    decline_rates = np.array([params.natural_decline_rate, 0.30, 0.52, 0.74, 1.04, 0.0, 1.7])
+    n_draws = len(decline_rates)
+    utilities = np.array([[params.utilities[s] for s in model.states]] * n_draws)
+    utilities[:, :-1] *= rng.uniform(0.9, 1.1, size=(n_draws, model.n_states - 1))
+    annual_costs = np.array([[params.annual_costs[s] for s in model.states]] * n_draws, dtype=float)
+    annual_costs *= rng.uniform(0.8, 1.2, size=annual_costs.shape)
+    relative_risks = rng.uniform(1.0, 20.0, size=(n_draws, model.n_states))
+    discount_rates = rng.uniform(0.0, 0.06, size=n_draws)
+    natural_rates = rng.uniform(0.5, 5.0, size=(n_draws, 3))
+
+    batch = model.run_model_batch(
+        decline_rates,
+        utilities=utilities,
+        annual_costs=annual_costs,
+        relative_risks=relative_risks,
+        discount_rates=discount_rates,
+        natural_decline_rates=natural_rates,
+        include_gene_therapy_cost=True
+    )
+
+    for n in range(n_draws):
+        draw_params = ModelParameters()
+        draw_params.utilities = dict(zip(model.states, utilities[n]))
+        draw_params.annual_costs = dict(zip(model.states, annual_costs[n]))
+        draw_params.ckd_relative_risks = dict(zip(model.states[:-1], relative_risks[n, :-1]))
+        draw_params.discount_rate = discount_rates[n]
+        (draw_params.decline_rate_early,
+         draw_params.decline_rate_middle,
+         draw_params.decline_rate_late) = natural_rates[n]
+
+        single = MarkovCohortModel(draw_params).run_model(
+            decline_rates[n], include_gene_therapy_cost=True
+        )
+        for key in ['total_costs', 'total_qalys', 'life_years', 'time_to_eskd',
+                    'total_costs_undiscounted', 'total_qalys_undiscounted']:
+            assert np.isclose(batch[key][n], single[key], rtol=1e-10), key
+
+    print("✓ Batched cohort engine matches per-draw run_model")
+
+
+def test_mortality_lookup_matches_life_table_rules():
+    """Dense mortality lookup reproduces nearest-age and interpolation rules."""
+    params = ModelParameters()
+    model = MarkovCohortModel(params)
+    table = params.background_mortality
+    ages = sorted(table)
+
+    for age in range(-3, 130):
+        if age in table:
+            expected = table[age]
+        elif age < ages[0]:
+            expected = table[ages[0]]
+        elif age > ages[-1]:
+            expected = table[ages[-1]]
+        else:
+            lower = max(a for a in ages if a < age)
+            upper = min(a for a in ages if a > age)
+            weight = (age - lower) / (upper - lower)
+            expected = table[lower] + weight * (table[upper] - table[lower])
+        assert np.isclose(model.background_mortality_rate(age), expected, rtol=1e-12)
+
+    matrix = params.mortality_matrix
+    assert matrix.shape == (ages[-1] + 1, model.n_states)
+    for age in range(matrix.shape[0]):
+        for j, state in enumerate(model.states):
+            assert np.isclose(matrix[age, j], model.calculate_mortality_rate(state, age))
+
+    print("✓ Mortality lookup table matches life-table rules")
+
+
+def test_life_table_cache():
+    """Cached life table returns independent dicts and a shared read-only array."""
+    table_a = load_dst_life_table()
+    table_b = load_dst_life_table()
+    assert table_a == table_b and table_a is not table_b
+
+    table_a[50] = 1.0
+    assert load_dst_life_table()[50] != 1.0
+
+    array = load_dst_life_table(as_array=True)
+    assert array is load_dst_life_table(as_array=True)
+    assert not array.flags.writeable
+    assert np.allclose(array, ModelParameters().background_mortality_by_age)
+
+    print("✓ Life table cache behaves as expected")
+
+
+def test_egfr_trajectory_matches_stepwise_decline():
+    """Precomputed eGFR trajectory equals the cycle-by-cycle update, with and without waning."""
+    params = ModelParameters()
+    model = MarkovCohortModel(params)
+
+    for decline_rate, waning in [(params.natural_decline_rate, False), (0.52, False),
+                                 (0.30, True), (-0.5, False)]:
+        trajectory = model.cohort_egfr_trajectory(
+            decline_rate, treatment_waning=waning, waning_decline_rate=0.74
+        )
+
+        egfr = params.starting_egfr
+        for cycle in range(1, model.n_cycles + 1):
+            age = params.starting_age + cycle
+            rate = model.get_decline_rate(age, decline_rate)
+            if waning and cycle >= 10:
+                final = model.get_decline_rate(age, 0.74)
+                fraction = (cycle - 10) / 10
+                rate = final if fraction >= 1 else rate + fraction * (final - rate)
+            egfr = max(0, egfr - rate)
+
+            assert trajectory['egfr_track'][cycle] == egfr
+            assert model.states[trajectory['predicted_state_idx'][cycle]] == \
+                model.egfr_to_state(max(0, egfr - rate))
+
+    print("✓ Precomputed eGFR trajectory matches stepwise decline")
+
+
+def test_outcomes_from_saved_traces():
+    """outcomes_from_trace reproduces run_model totals, also for stacked traces."""
+    params = ModelParameters()
+    model = MarkovCohortModel(params)
+    runs = [model.run_model(rate, include_gene_therapy_cost=True)
+            for rate in [params.natural_decline_rate, 0.52]]
+
+    for run in runs:
+        outcomes = model.outcomes_from_trace(run['trace'], include_gene_therapy_cost=True)
+        for key in ['total_costs', 'total_qalys', 'life_years', 'time_to_eskd']:
+            assert np.isclose(outcomes[key], run[key])
+
+    stacked = model.outcomes_from_trace(
+        np.stack([run['trace'] for run in runs]), include_gene_therapy_cost=True
+    )
+    assert np.allclose(stacked['total_qalys'], [run['total_qalys'] for run in runs])
+    assert list(stacked['time_to_eskd']) == [run['time_to_eskd'] for run in runs]
+
+    undiscounted = model.outcomes_from_trace(runs[0]['trace'], discount_rate=0.0)
+    assert np.isclose(undiscounted['total_qalys'], runs[0]['total_qalys_undiscounted'])
+
+    print("✓ Outcomes from saved traces match run_model")
+
+
+def test_microsimulation_matches_expected_survival():
+    """Vectorized microsimulation survival agrees with the per-year hazard it simulates."""
+    params = ModelParameters()
+    model = MarkovCohortModel(params)
+    rate = params.natural_decline_rate
+    mc = model.run_monte_carlo_validation(rate, n_simulations=200_000, random_seed=1)
+
+    # Expected survival from the scalar per-patient-year rules
+    egfr = params.starting_egfr
+    survival = 1.0
+    expected_survival = []
+    for year in range(model.n_cycles):
+        age = params.starting_age + year + 1
+        egfr = max(0, egfr - model.get_decline_rate(age, rate))
+        survival *= 1 - model.calculate_mortality_rate(model.egfr_to_state(egfr), age)
+        expected_survival.append(survival)
+
+    years_survived = mc['times_to_death'] - params.starting_age
+    simulated_survival = [np.mean(years_survived > year + 1) for year in range(model.n_cycles - 1)]
+    assert np.max(np.abs(np.array(simulated_survival) - expected_survival[:-1])) < 0.005
+
+    # Same seed, same results
+    repeat = model.run_monte_carlo_validation(rate, n_simulations=200_000, random_seed=1)
+    assert np.array_equal(mc['times_to_death'], repeat['times_to_death'])
+
+    print("✓ Microsimulation survival matches expected survival")
+
+
+def test_streaming_microsimulation_records():
+    """Streaming mode writes per-patient records and exact summary statistics."""
+    params = ModelParameters()
+    model = MarkovCohortModel(params)
+    rate = params.natural_decline_rate
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'patients.npy')
+        mc = model.run_monte_carlo_validation(
+            rate, n_simulations=10_001, random_seed=3, chunk_size=997, output_path=path
+        )
+        records = np.load(path)
+        del mc['patient_records']
+
+    assert len(records) == 10_001
+    assert 'times_to_death' not in mc
+
+    death_ages = records['death_age']
+    eskd_ages = records['eskd_age'][records['eskd_age'] >= 0]
+    assert np.isclose(mc['mean_death_age'], death_ages.mean())
+    assert np.isclose(mc['eskd_reached_pct'], 100 * len(eskd_ages) / len(records))
+    for q in [25, 50, 75]:
+        assert np.isclose(mc['death_percentiles'][f'{q}th'], np.percentile(death_ages, q))
+        assert np.isclose(mc['eskd_percentiles'][f'{q}th'], np.percentile(eskd_ages, q))
+
+    # Records hold the same information as the in-memory lists
+    in_memory = model.run_monte_carlo_validation(rate, n_simulations=10_001, random_seed=3)
+    assert np.isclose(in_memory['mean_death_age'], in_memory['times_to_death'].mean())
+    assert set(model.states[i] for i in records['final_state']) <= set(model.states[:-1])
+
+    print("✓ Streaming microsimulation records match summaries")
+
+
+def test_psa_store_and_icers():
+    """Columnar PSA store matches the long DataFrame and per-iteration ICERs."""
+    params = EnhancedModelParameters()
+    params.gene_therapy_cost = 2_000_000
+    psa = ProbabilisticSensitivityAnalysis(params, ProbabilisticParameters(), n_iterations=50)
+    results = psa.run_psa()
+    icer_df = psa.calculate_icers()
+
+    assert len(results) == 100 and len(icer_df) == 50
+    for _, row in icer_df.iterrows():
+        rows = results[results['iteration'] == row['iteration']].set_index('scenario')
+        inc_costs = rows.loc[row['scenario'], 'total_costs'] - rows.loc['Natural History', 'total_costs']
+        inc_qalys = rows.loc[row['scenario'], 'total_qalys'] - rows.loc['Natural History', 'total_qalys']
+        assert np.isclose(row['incremental_costs'], inc_costs)
+        assert np.isclose(row['incremental_qalys'], inc_qalys)
+        assert row['icer'] == (inc_costs / inc_qalys if inc_qalys > 0 else np.inf)
+
+    print("✓ PSA result store and ICERs match row-by-row calculation")
+
+
+def test_parallel_psa_reproducible():
+    """Parallel PSA gives identical results for any worker count and chunk size."""
+    params = EnhancedModelParameters()
+    params.gene_therapy_cost = 2_000_000
+
+    runs = []
+    for n_processes, chunk_size in [(1, 60), (2, 7), (3, 25)]:
+        psa = ProbabilisticSensitivityAnalysis(params, ProbabilisticParameters(), n_iterations=60)
+        runs.append(psa.run_psa(n_processes=n_processes, chunk_size=chunk_size))
+
+    for run in runs[1:]:
+        assert run.equals(runs[0])
+    assert runs[0]['total_costs'].nunique() == len(runs[0])
+
+    print("✓ Parallel PSA is reproducible across worker counts and chunk sizes")
+
+
+def test_ceac_and_evpi_from_net_benefit():
+    """CEAC uses net monetary benefit; CEAF/EVPI match a direct two-strategy calculation."""
+    params = EnhancedModelParameters()
+    params.gene_therapy_cost = 2_000_000
+    psa = ProbabilisticSensitivityAnalysis(params, ProbabilisticParameters(), n_iterations=200)
+    psa.run_psa()
+
+    # Include draws that lose QALYs (south-west quadrant) to exercise the NMB rule
+    psa.store.total_qalys[:20, 1] = psa.store.total_qalys[:20, 0] - 0.5
+    psa.store.total_costs[:20, 1] = psa.store.total_costs[:20, 0] - 200_000
+
+    thresholds = np.linspace(0, 600_000, 61)
+    ceac = psa.calculate_ceac(thresholds)
+    ceaf = psa.calculate_ceaf(thresholds)
+
+    inc_costs = psa.store.total_costs[:, 1] - psa.store.total_costs[:, 0]
+    inc_qalys = psa.store.total_qalys[:, 1] - psa.store.total_qalys[:, 0]
+    for k, threshold in enumerate(thresholds):
+        inc_nmb = threshold * inc_qalys - inc_costs
+        assert np.isclose(ceac['probability_cost_effective'][k], np.mean(inc_nmb >= 0))
+
+        # Relative to natural history: EVPI = E[max(0, INMB)] - max(0, E[INMB])
+        expected_evpi = np.mean(np.maximum(inc_nmb, 0)) - max(np.mean(inc_nmb), 0)
+        assert np.isclose(ceaf['evpi'][k], expected_evpi, atol=1e-6)
+        optimal_is_treatment = np.mean(inc_nmb) > 0
+        assert ceaf['optimal_scenario'][k] == psa.store.scenario_names[int(optimal_is_treatment)]
+
+    print("✓ CEAC, CEAF and EVPI match net monetary benefit calculation")
+
+
+def test_evppi_from_psa_inputs():
+    """PSA keeps sampled inputs; EVPPI is bounded by EVPI and ~0 for unused inputs."""
+    params = EnhancedModelParameters()
+    params.gene_therapy_cost = 1_440_000
+    psa = ProbabilisticSensitivityAnalysis(params, ProbabilisticParameters(), n_iterations=4000)
+    psa.run_psa()
+
+    assert len(psa.inputs) == 4000
+    assert {'annual_costs.ESKD', 'ckd_relative_risks.CKD4', 'decline_rate_middle',
+            'treatment_decline_rate.Realistic Treatment'} <= set(psa.inputs.columns)
+    assert (psa.inputs['treatment_decline_rate.Realistic Treatment'] >= 0.1).all()
+
+    groups = {
+        'Decline': ['decline_rate_', 'treatment_decline_rate.'],
+        'Caregiver': ['caregiver_params.'],
+        'All': [''],
+    }
+    evppi = psa.calculate_evppi(threshold=150000, parameter_groups=groups).set_index('parameter_group')
+    evpi = psa.calculate_ceaf([150000])['evpi'][0]
+
+    assert np.allclose(evppi['evpi'], evpi)
+    assert (evppi['evppi'] <= evpi * 1.05).all()
+    assert evppi.loc['Decline', 'evppi'] > evppi.loc['Caregiver', 'evppi']
+    assert evppi.loc['Caregiver', 'evppi'] < 0.02 * evpi
+    assert evppi.loc['All', 'evppi'] > 0.7 * evpi
+
+    print("✓ EVPPI from stored PSA inputs behaves as expected")
+
+
+def test_evppi_recovers_non_monotone_effect():
+    """EVPPI metamodels recover a quadratic effect and give ~0 for irrelevant inputs."""
+    n = 4000
+    rng = np.random.default_rng(7)
+    x = rng.standard_normal((n, 8))
+    signal = 1000 * (x[:, 0] ** 2 - 1) + 200
+    inc_nmb = signal + 1500 * rng.standard_normal(n)
+
+    psa = ProbabilisticSensitivityAnalysis(EnhancedModelParameters(), ProbabilisticParameters(), n_iterations=n)
+    psa.store = PSAResultStore.allocate(n, ['Natural History', 'Treatment'])
+    psa.store.total_qalys[:, 1] = inc_nmb / 100000
+    psa.inputs = pd.DataFrame({f'{"a" if d == 0 else "b"}.x{d}': x[:, d] for d in range(8)})
+
+    groups = {
+        'Quadratic': ['a.'],                    # 1 input: GAM
+        'Irrelevant': ['b.x1', 'b.x2'],         # 2 inputs: GAM
+        'Quadratic + noise': ['a.', 'b.x'],     # 8 inputs: GP
+        'Irrelevant wide': ['b.'],              # 7 inputs: GP
+    }
+    evppi = psa.calculate_evppi(threshold=100000, parameter_groups=groups).set_index('parameter_group')['evppi']
+
+    z = np.random.default_rng(8).standard_normal(2_000_000)
+    true_evppi = np.maximum(1000 * (z ** 2 - 1) + 200, 0).mean() - 200
+    evpi = np.maximum(inc_nmb, 0).mean() - max(inc_nmb.mean(), 0)
+
+    assert abs(evppi['Quadratic'] / true_evppi - 1) < 0.15
+    assert abs(evppi['Quadratic + noise'] / true_evppi - 1) < 0.15
+    assert evppi['Irrelevant'] < 0.02 * evpi
+    assert evppi['Irrelevant wide'] < 0.02 * evpi
+
+    print("✓ EVPPI metamodels recover non-monotone effects")
+
+
+def test_quasi_random_psa_samplers():
+    """LHS/Sobol designs are stratified and mapped through the parameter inverse CDFs."""
+    prob_params = ProbabilisticParameters()
+    dists = prob_params.distributions()
+
+    u = sample_unit_hypercube(64, len(dists), 'lhs', seed=0)
+    for k in range(u.shape[1]):
+        assert sorted(np.floor(u[:, k] * 64).astype(int)) == list(range(64))
+
+    inputs = prob_params.ppf(u)
+    for path in ['base_utilities.CKD4', 'annual_costs.ESKD', 'ckd_relative_risks.CKD2']:
+        k = list(dists).index(path)
+        assert np.allclose(dists[path].cdf(inputs[path]), u[:, k])
+    k = list(dists).index('discount_rate')
+    assert np.allclose(inputs['discount_rate'], dists['discount_rate'].ppf(u[:, k]) * 0.06)
+
+    params = EnhancedModelParameters()
+    params.gene_therapy_cost = 1_440_000
+    reference = ProbabilisticSensitivityAnalysis(params, prob_params, n_iterations=2000)
+    reference.run_psa()
+    reference_mean = reference.calculate_icers()['incremental_qalys'].mean()
+
+    for sampler in ['lhs', 'sobol']:
+        psa = ProbabilisticSensitivityAnalysis(params, prob_params, n_iterations=256)
+        psa.run_psa(sampler=sampler)
+        assert len(psa.inputs) == 256
+        assert np.isclose(psa.calculate_icers()['incremental_qalys'].mean(), reference_mean, rtol=0.02)
+
+    print("✓ Latin hypercube and Sobol PSA samplers behave as expected")
+
+
+def test_vectorized_parameter_sampling_and_draw_view():
+    """Matrix sampling matches the distribution means; draw views index the batched engine."""
+    prob_params = ProbabilisticParameters()
+    samples = prob_params.sample(200_000, np.random.default_rng(0))
+    dists = prob_params.distributions()
+
+    assert list(samples.columns) == list(dists)
+    for path in ['base_utilities.Normal', 'annual_costs.ESKD', 'ckd_relative_risks.CKD4',
+                 'decline_rate_middle']:
+        assert np.isclose(samples[path].mean(), dists[path].mean(), rtol=0.01)
+    assert np.isclose(samples['discount_rate'].mean(), dists['discount_rate'].mean() * 0.06, rtol=0.01)
+    assert (samples['caregiver_params.caregiver_disutility_by_age.0-5'] < 0).all()
+
+    params = EnhancedModelParameters()
+    model = MarkovCohortModel(params)
+    draws = ParameterDraws.from_inputs(samples.iloc[:20], params)
+    assert len(draws) == 20 and not hasattr(draws, '__dict__')
+
+    decline_rates = np.full(20, 0.52)
+    batch = model.run_model_batch(decline_rates, draws=draws)
+    for i in [0, 7, 19]:
+        single = model.run_model_batch(decline_rates[i:i + 1], draws=draws[i])
+        assert np.isclose(single['total_qalys'][0], batch['total_qalys'][i], rtol=1e-12)
+    expected_utilities = samples['base_utilities.Normal'][:20] * params.lowe_utility_multiplier
+    assert np.allclose(draws.utilities[:, 0], expected_utilities)
+
+    print("✓ Vectorized parameter sampling and draw view behave as expected")
+
+
+def test_run_cache():
+    """Run cache is keyed by parameter content and run arguments, with LRU and disk tiers."""
+    params = ModelParameters()
+    direct = MarkovCohortModel(params).run_model(0.52, include_gene_therapy_cost=True)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = RunCache(max_entries=2, cache_dir=tmpdir)
+        first = cache.run_model(params, egfr_decline_rate=0.52, include_gene_therapy_cost=True)
+        second = cache.run_model(ModelParameters(), scenario_name="Again",
+                                 egfr_decline_rate=0.52, include_gene_therapy_cost=True)
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert second['scenario'] == "Again" and first['scenario'] == "Baseline"
+        assert np.array_equal(first['trace'], direct['trace'])
+        assert first['total_costs'] == direct['total_costs']
+        assert not first['trace'].flags.writeable
+
+        # Price only matters when gene therapy costs are included
+        priced = ModelParameters()
+        priced.gene_therapy_cost = 1_000_000
+        assert cache.key(priced, egfr_decline_rate=2.48) == cache.key(params, egfr_decline_rate=2.48)
+        assert cache.key(priced, egfr_decline_rate=0.52, include_gene_therapy_cost=True) != \
+            cache.key(params, egfr_decline_rate=0.52, include_gene_therapy_cost=True)
+        priced.annual_costs['ESKD'] += 1
+        assert cache.key(priced, egfr_decline_rate=2.48) != cache.key(params, egfr_decline_rate=2.48)
+
+        # Evicted entries are reloaded from disk
+        cache.run_model(params, egfr_decline_rate=0.30)
+        cache.run_model(params, egfr_decline_rate=0.74)
+        cache.run_model(params, egfr_decline_rate=0.52, include_gene_therapy_cost=True)
+        assert (cache.hits, cache.misses) == (2, 3)
+
+        # A new model version never reads results written by the old one
+        stale = RunCache(cache_dir=tmpdir)
+        stale.model_version = 'older model'
+        assert stale.key(params, egfr_decline_rate=0.30) != cache.key(params, egfr_decline_rate=0.30)
+        stale.run_model(params, egfr_decline_rate=0.30)
+        assert (stale.hits, stale.misses) == (0, 1)
+
+        # The disk tier keeps the most recently used files and can be cleared
+        bounded = RunCache(cache_dir=tmpdir, max_disk_entries=2)
+        assert len(os.listdir(tmpdir)) == 2
+        bounded.run_model(params, egfr_decline_rate=0.90)
+        assert len(os.listdir(tmpdir)) == 2
+        bounded.clear(disk=True)
+        assert os.listdir(tmpdir) == []
+
+    print("✓ Run cache behaves as expected")
+
+
+def test_threshold_solver():
+    """Brent threshold solver hits the target ICER and agrees with the grid scan."""
+    params = ModelParameters()
+    params.gene_therapy_cost = 2_000_000
+    analysis = SensitivityAnalysis(params)
+
+    price = analysis.solve_threshold('gene_therapy_cost', 100000, bracket=(0, 1e7))
+    assert price['converged'] and np.isclose(price['icer'], 100000)
+    assert price['evaluations'] <= 12
+
+    multiplier = analysis.solve_threshold('lowe_utility_multiplier', 300000, bracket=(0.3, 1.0))
+    assert multiplier['converged'] and np.isclose(multiplier['icer'], 300000)
+
+    solved = analysis.threshold_analysis(300000, method='brent').iloc[0]
+    grid = analysis.threshold_analysis(300000, decline_range=(0.0, 1.0), n_points=101)
+    below = grid[grid['Below Threshold']]['eGFR Decline Rate']
+    assert solved['ICER'] <= 300000 and solved['Below Threshold']
+    assert below.max() <= solved['eGFR Decline Rate'] < below.max() + 0.01
+
+    # A coarse tolerance must not nudge the answer out of a tight bracket
+    step = analysis.solve_threshold('egfr_decline_rate', 300000, bracket=(0.0, 1.0))['value']
+    bracket = (step - 0.01, step + 0.001)
+    coarse = analysis.solve_threshold('egfr_decline_rate', 300000, bracket=bracket, xtol=0.05)
+    assert bracket[0] <= coarse['value'] <= bracket[1] and coarse['icer'] <= 300000
+
+    assert not analysis.solve_threshold('gene_therapy_cost', 100000, bracket=(0, 1))['converged']
+
+    print("✓ Threshold solver matches target ICER")
+
+
+def test_parallel_cached_owsa():
+    """Parallel OWSA matches serial results and the tornado reuses cached runs."""
+    params = ModelParameters()
+    params.gene_therapy_cost = 3_000_000
+    ranges = {
+        'discount_rate': (0.0, 0.05),
+        'gene_therapy_cost': (2_000_000, 4_000_000),
+        'utility_CKD2': (0.6, 0.7),
+        'cost_ESKD': (100000, 200000),
+    }
+
+    RUN_CACHE.clear()
+    parallel = SensitivityAnalysis(params).one_way_sensitivity(ranges, 0.52, n_processes=2)
+    RUN_CACHE.clear()
+    serial = SensitivityAnalysis(params).one_way_sensitivity(ranges, 0.52)
+    assert parallel.equals(serial)
+
+    misses = RUN_CACHE.misses
+    tornado = SensitivityAnalysis(params).generate_tornado_data(ranges, 0.52)
+    assert RUN_CACHE.misses == misses
+    assert np.allclose(tornado.set_index('Parameter')['Total_Range'],
+                       serial.set_index('Parameter')['Range'].loc[tornado['Parameter']])
+
+    print("✓ Parallel cached OWSA matches serial results")
+
+
+def test_parameter_overrides():
+    """Dotted-path overrides copy only the touched containers and validate input."""
+    params = ModelParameters()
+    varied = params.with_overrides({
+        'annual_costs.ESKD': 1.0,
+        'base_utilities.CKD2': 0.5,
+        'utilities.ESKD': 0.1,
+    })
+
+    assert params.annual_costs['ESKD'] == 163000
+    assert varied.annual_costs['ESKD'] == 1.0
+    assert varied.utilities['CKD2'] == 0.5 * params.lowe_utility_multiplier
+    assert varied.utilities['ESKD'] == 0.1
+    assert params.utilities['ESKD'] != 0.1
+    assert varied.ckd_relative_risks is params.ckd_relative_risks
+    assert varied.background_mortality is params.background_mortality
+    assert varied.get_parameter('annual_costs.ESKD') == 1.0
+
+    for bad, error in [({'base_mortality_rate': 0.01}, ValueError),
+                       ({'annual_costs.XYZ': 1.0}, ValueError),
+                       ({'discount_rate': 'high'}, TypeError)]:
+        try:
+            params.with_overrides(bad)
+        except error:
+            pass
+        else:
+            raise AssertionError(f"{bad} was accepted")
+
+    print("✓ Parameter overrides are copy-on-write and validated")
+
+
+def test_value_based_price_tensor():
+    """Batched max prices match the scalar formula and the PSA net-benefit rule."""
+    inc_qalys = np.array([2.0, -0.5, 1.0])
+    evlyg = np.array([3.0, 0.0, 1.5])
+    costs_excl_gt = np.array([50_000.0, -20_000.0, 400_000.0])
+    thresholds = [100000, 150000, 300000]
+
+    prices = ValueBasedPrices.solve(['A', 'B', 'C'], inc_qalys, evlyg, costs_excl_gt, thresholds)
+    assert prices.prices.shape == (3, 3, 2, 1)
+    for i in range(3):
+        for j, threshold in enumerate(thresholds):
+            for metric, gain in [('QALY', inc_qalys[i]), ('evLYG', evlyg[i])]:
+                expected = max(0, threshold * gain - costs_excl_gt[i]) if gain > 0 else 0
+                assert prices.price(metric)[i, j] == expected
+
+    params = EnhancedModelParameters()
+    params.gene_therapy_cost = 2_000_000
+    psa = ProbabilisticSensitivityAnalysis(params, ProbabilisticParameters(), n_iterations=200)
+    psa.run_psa()
+    draws = psa.value_based_prices(thresholds)
+    assert draws.prices.shape == (1, 3, 2, 200)
+
+    # At the fixed PSA price, P(max price >= price) is the probability of INMB >= 0
+    inc_costs = psa.store.total_costs[:, 1] - psa.store.total_costs[:, 0]
+    inc_qalys = psa.store.total_qalys[:, 1] - psa.store.total_qalys[:, 0]
+    acceptability = draws.acceptability([params.gene_therapy_cost])
+    for j, threshold in enumerate(thresholds):
+        assert np.isclose(acceptability[0, j, 0, 0], np.mean(threshold * inc_qalys - inc_costs >= 0))
+
+    summary = draws.quantiles()
+    assert len(summary) == 3 * 2
+    assert (summary['Q2.5'] <= summary['Q50']).all() and (summary['Q50'] <= summary['Q97.5']).all()
+
+    print("✓ Value-based price tensor matches scalar pricing and PSA net benefit")
+
+
+def test_price_at_probability_cost_effective():
+    """Price at a target P(cost-effective) is the highest price still reaching it."""
+    params = EnhancedModelParameters()
+    params.gene_therapy_cost = 1_500_000
+    psa = ProbabilisticSensitivityAnalysis(params, ProbabilisticParameters(), n_iterations=200)
+    psa.run_psa()
+    draws = psa.value_based_prices([150000])
+
+    table = draws.price_at_probability((0.5, 0.8, 0.95))
+    qaly = table[table['Metric'] == 'QALY'].iloc[0]
+    max_prices = draws.prices[0, 0, 0]
+    for probability in (0.5, 0.8, 0.95):
+        price = qaly[f'P(CE) {probability*100:g}%']
+        assert np.mean(max_prices >= price) >= probability
+        assert np.mean(max_prices >= np.nextafter(price, np.inf)) < probability
+
+    # The same answer as re-evaluating the PSA with that price fixed
+    inc_costs = psa.store.total_costs[:, 1] - psa.store.total_costs[:, 0]
+    inc_qalys = psa.store.total_qalys[:, 1] - psa.store.total_qalys[:, 0]
+    price = qaly['P(CE) 80%']
+    repriced_costs = inc_costs - params.gene_therapy_cost + price
+    assert np.mean(150000 * inc_qalys - repriced_costs >= -1e-6) >= 0.8
+
+    print("✓ Price at target probability cost-effective read from PSA draws")
+
+
+if __name__ == "__main__":
+    test_transition_matrix_matches_cell_by_cell()
+    test_egfr_to_state_index_matches_scalar()
+    test_batched_engine_matches_run_model()
+    test_mortality_lookup_matches_life_table_rules()
+    test_life_table_cache()
+    test_egfr_trajectory_matches_stepwise_decline()
+    test_outcomes_from_saved_traces()
+    test_microsimulation_matches_expected_survival()
+    test_streaming_microsimulation_records()
+    test_psa_store_and_icers()
+    test_parallel_psa_reproducible()
+    test_ceac_and_evpi_from_net_benefit()
+    test_evppi_from_psa_inputs()
+    test_quasi_random_psa_samplers()
+    test_vectorized_parameter_sampling_and_draw_view()
+    test_run_cache()
+    test_threshold_solver()
+    test_parallel_cached_owsa()
+    test_parameter_overrides()
+    test_value_based_price_tensor()
+    test_price_at_probability_cost_effective()
+    print("ALL TESTS PASSED ✓")